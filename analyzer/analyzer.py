@@ -1,23 +1,78 @@
+import numpy as np
+
 from .hs import HeadShouldersAnalyzer
 from .trendline import TrendlineAnalyzer
 from .dtb import DoubleTopBottomAnalyzer
 from .channel import ChannelAnalyzer
+from .extrema import ExtremaTracker
+from .window import PriceWindow
 
 class Analyzer:
-    def __init__(self):
-        self.hs_analyzer = HeadShouldersAnalyzer()
-        self.trendline_analyzer = TrendlineAnalyzer()
-        self.dtb_analyzer = DoubleTopBottomAnalyzer()
+    def __init__(self, window_size=100):
+        # One price window and one extrema tracker shared by the analyzers,
+        # both fed once per tick
+        self.window = PriceWindow(window_size)
+        self.extrema = ExtremaTracker()
+        shared = dict(window_size=window_size, window=self.window, extrema=self.extrema)
+        self.hs_analyzer = HeadShouldersAnalyzer(**shared)
+        self.trendline_analyzer = TrendlineAnalyzer(**shared)
+        self.dtb_analyzer = DoubleTopBottomAnalyzer(**shared)
         self.channel_analyzer = ChannelAnalyzer()
-
-    def update(self, price, timestamp):
-        signals = []
-        for analyzer in [
+        self.analyzers = [
             self.hs_analyzer,
             self.trendline_analyzer,
             self.dtb_analyzer,
             self.channel_analyzer,
-        ]:
+        ]
+
+    def update(self, price, timestamp):
+        self.window.append(price, timestamp)
+        self.extrema.update(price)
+        return self._signals(price, timestamp)
+
+    def update_many(self, prices, timestamps, chunk_size=4096):
+        """Feed a run of ticks (e.g. stored history on warm-up) as `update` would one by one.
+
+        Each chunk goes through the shared tracker in one vectorized pass.
+        Analyzers with a `replay` method then check the whole chunk at once;
+        the others still step through it tick by tick. The result is exactly
+        that of calling `update` per tick: {index: signals} for the ticks
+        that produced signals.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        timestamps = np.asarray(timestamps)
+        if len(prices) != len(timestamps):
+            raise ValueError(f"{len(prices)} prices but {len(timestamps)} timestamps")
+        batched = [analyzer for analyzer in self.analyzers if hasattr(analyzer, "replay")]
+        stepped = [analyzer for analyzer in self.analyzers if not hasattr(analyzer, "replay")]
+
+        emitted = {}
+        for start in range(0, len(prices), chunk_size):
+            chunk = prices[start:start + chunk_size]
+            times = timestamps[start:start + chunk_size]
+            ticks = list(zip(chunk.tolist(), times.tolist()))
+            before = np.array(self.window.prices())
+            found = {analyzer: {} for analyzer in self.analyzers}
+
+            def step(i):
+                price, timestamp = ticks[i]
+                self.window.append(price, timestamp)
+                for analyzer in stepped:
+                    signal = analyzer.update(price, timestamp)
+                    if signal:
+                        found[analyzer][i] = signal
+
+            self.extrema.update_many(chunk, step)
+            for analyzer in batched:
+                found[analyzer] = analyzer.replay(chunk, times, before)
+
+            for i in sorted(set().union(*found.values())):
+                emitted[start + i] = [found[analyzer][i] for analyzer in self.analyzers if i in found[analyzer]]
+        return emitted
+
+    def _signals(self, price, timestamp):
+        signals = []
+        for analyzer in self.analyzers:
             signal = analyzer.update(price, timestamp)
             if signal:
                 signals.append(signal)
@@ -1,44 +1,126 @@
 # analyzer/channel.py
 
+from collections import deque
 from datetime import datetime
 import pytz
 
+from .extrema import LineFit
+
+JOHANNESBURG = pytz.timezone('Africa/Johannesburg')
+
 class ChannelAnalyzer:
-    def __init__(self):
+    """Channels over the last `window` bars, fed tick by tick.
+
+    `update` is fed ticks and builds `bar_seconds` bars from them: a bar
+    closes on the first tick of a later bar and ticks older than the
+    current bar are ignored. The channel's high and low (the signals'
+    TP/SL levels) are the max high and min low of the last `window`
+    closed bars, read off monotonic deques of their highs and lows in
+    O(1) amortized per bar. Its type comes from the slopes of least-squares lines
+    through their highs and lows (x in minutes), kept as running sums so
+    each bar costs O(1) to fit. The channel only changes when a bar
+    closes; every tick is checked against it.
+    """
+
+    def __init__(self, bar_seconds=60, window=20, min_bars=10):
         self.last_signal_time = None
         self.min_distance = 0.0005  # acceptable proximity to boundaries for signal
+        self.bar_seconds = bar_seconds
+        self.window = window
+        self.min_bars = min_bars
+
+        self.bar = None  # the bar still forming: {'time', 'high', 'low', 'close'}
+        self.bars = deque()  # closed bars in the fits, oldest first
+        self.highs = deque()  # bars of the window with falling highs; the front has the max
+        self.lows = deque()  # bars of the window with rising lows; the front has the min
+        self.high_fit = self.low_fit = None
+        self.current = None  # channel of the closed bars, or None
 
     def is_parallel(self, slope1, slope2, tolerance=0.2):
         return abs(slope1 - slope2) < tolerance
 
-    def detect_channel(self, candles):
-        if len(candles) < 10:
+    def update(self, price, timestamp):
+        start = timestamp - timestamp % self.bar_seconds
+        bar = self.bar
+        if bar is None or start > bar['time']:
+            if bar is not None:
+                self.close_bar(bar)
+            bar = self.bar = {'time': start, 'high': price, 'low': price, 'close': price}
+        elif start < bar['time']:
+            return None  # late tick
+        else:
+            bar['high'] = max(bar['high'], price)
+            bar['low'] = min(bar['low'], price)
+            bar['close'] = price
+
+        if not self.current or self.last_signal_time == bar['time']:
+            return None  # one signal per bar at most
+        signal = self.build_signal(self.current, price, timestamp)
+        if signal:
+            self.last_signal_time = bar['time']
+        return signal
+
+    def close_bar(self, bar):
+        x = bar['time'] / 60
+        if self.high_fit is None:
+            self.high_fit, self.low_fit = LineFit(x0=x), LineFit(x0=x)
+        self.bars.append(bar)
+        while self.highs and self.highs[-1]['high'] <= bar['high']:
+            self.highs.pop()
+        self.highs.append(bar)
+        while self.lows and self.lows[-1]['low'] >= bar['low']:
+            self.lows.pop()
+        self.lows.append(bar)
+        self.high_fit.add(x, bar['high'])
+        self.low_fit.add(x, bar['low'])
+        if len(self.bars) > self.window:
+            old = self.bars.popleft()
+            if self.highs[0] is old:
+                self.highs.popleft()
+            if self.lows[0] is old:
+                self.lows.popleft()
+            self.high_fit.remove(old['time'] / 60, old['high'])
+            self.low_fit.remove(old['time'] / 60, old['low'])
+
+        # Re-centre the fits once the window has moved on by its length
+        if x - self.high_fit.x0 > self.window * self.bar_seconds / 60:
+            x0 = self.bars[0]['time'] / 60
+            self.high_fit.reset(((b['time'] / 60, b['high']) for b in self.bars), x0)
+            self.low_fit.reset(((b['time'] / 60, b['low']) for b in self.bars), x0)
+
+        if len(self.bars) < self.min_bars:
+            return
+        self.current = self.channel(self.high_fit, self.low_fit, self.highs[0]['high'], self.lows[0]['low'])
+
+    def channel(self, high_fit, low_fit, high, low):
+        """Channel type from the fitted slopes, with `high`/`low` as its levels, or None if not parallel."""
+        high_line, low_line = high_fit.line(), low_fit.line()
+        if high_line is None or low_line is None:
             return None
-
-        highs = [c['high'] for c in candles]
-        lows = [c['low'] for c in candles]
-        times = [c['time'] for c in candles]
-
-        # Use the last 20 bars to try and find a channel
-        recent_highs = highs[-20:]
-        recent_lows = lows[-20:]
-
-        max_high = max(recent_highs)
-        min_low = min(recent_lows)
-
-        # Identify slopes (for up/down) or flatness (sideways)
-        high_slope = (recent_highs[-1] - recent_highs[0]) / max(1, (times[-1] - times[-20]) / 60)
-        low_slope = (recent_lows[-1] - recent_lows[0]) / max(1, (times[-1] - times[-20]) / 60)
+        high_slope, low_slope = high_line[0], low_line[0]
 
         if self.is_parallel(high_slope, low_slope):
             if abs(high_slope) < 0.01:
-                return {'type': 'sideways', 'high': max_high, 'low': min_low}
+                return {'type': 'sideways', 'high': high, 'low': low}
             elif high_slope > 0:
-                return {'type': 'up', 'high': max_high, 'low': min_low}
+                return {'type': 'up', 'high': high, 'low': low}
             else:
-                return {'type': 'down', 'high': max_high, 'low': min_low}
+                return {'type': 'down', 'high': high, 'low': low}
         return None
 
+    def detect_channel(self, candles):
+        if len(candles) < self.min_bars:
+            return None
+
+        # The last `window` bars, as update uses
+        recent = candles[-self.window:]
+        x0 = recent[0]['time'] / 60
+        high_fit = LineFit(((c['time'] / 60, c['high']) for c in recent), x0)
+        low_fit = LineFit(((c['time'] / 60, c['low']) for c in recent), x0)
+        high = max(c['high'] for c in recent)
+        low = min(c['low'] for c in recent)
+        return self.channel(high_fit, low_fit, high, low)
+
     def generate_signal(self, candles):
         if not candles:
             return None
@@ -48,12 +130,17 @@ class ChannelAnalyzer:
             return None
 
         last_candle = candles[-1]
-        current_price = last_candle['close']
         timestamp = last_candle['time']
 
         if self.last_signal_time == timestamp:
             return None  # avoid duplicate signal
 
+        signal = self.build_signal(channel, last_candle['close'], timestamp)
+        if signal:
+            self.last_signal_time = timestamp
+        return signal
+
+    def build_signal(self, channel, current_price, timestamp):
         if abs(current_price - channel['high']) <= self.min_distance:
             direction = 'sell'
             entry = current_price
@@ -67,10 +154,8 @@ class ChannelAnalyzer:
         else:
             return None
 
-        self.last_signal_time = timestamp
-
         # Convert to Johannesburg time
-        jhb_time = datetime.fromtimestamp(timestamp, pytz.timezone('Africa/Johannesburg')).strftime('%Y-%m-%d %H:%M:%S')
+        jhb_time = datetime.fromtimestamp(timestamp, JOHANNESBURG).strftime('%Y-%m-%d %H:%M:%S')
 
         return {
             'type': channel['type'],
@@ -80,4 +165,3 @@ class ChannelAnalyzer:
             'sl': round(sl, 5),
             'time': jhb_time
         }
-
@@ -1,20 +1,50 @@
+
 import numpy as np
-from collections import deque
+
+from .extrema import HIGH, LOW, ExtremaTracker, ExtremaWindow
+from .window import PriceWindow
 
 class DoubleTopBottomAnalyzer:
-    def __init__(self, window_size=100, tolerance=0.01, retest_window=10):
-        self.prices = deque(maxlen=window_size)
-        self.times = deque(maxlen=window_size)
+    def __init__(self, window_size=100, tolerance=0.01, retest_window=10, extrema=None,
+                 window=None):
+        # Prices and timestamps from a window shared with other analyzers
+        # when one is given (its owner appends to it); otherwise a private one
+        self.owns_window = window is None
+        self.window = window if window is not None else PriceWindow(window_size)
+        self.window_size = window_size
+        self._first = self.window.count
         self.tolerance = tolerance
         self.retest_window = retest_window
 
         self.pending_retest = None  # Track if waiting for retest
 
+        # Local highs/lows of the window, from a shared tracker when one is
+        # given (the owner then feeds it); otherwise from a private one
+        self.owns_extrema = extrema is None
+        self.extrema = ExtremaWindow(extrema or ExtremaTracker(), window_size)
+
+    @property
+    def size(self):
+        """Number of prices in the window."""
+        size = self.window.count - self._first
+        return size if size < self.window_size else self.window_size
+
+    @property
+    def prices(self):
+        """Read-only view of the window's prices, oldest first."""
+        return self.window.prices(self.size)
+
+    @property
+    def times(self):
+        return self.window.times(self.size)
+
     def update(self, price, timestamp):
-        self.prices.append(price)
-        self.times.append(timestamp)
+        if self.owns_window:
+            self.window.append(price, timestamp)
+        if self.owns_extrema:
+            self.extrema.tracker.update(price)
 
-        if len(self.prices) < 20:
+        if self.size < 20:
             return None
 
         # First handle retest logic
@@ -30,34 +60,102 @@ class DoubleTopBottomAnalyzer:
 
         return None
 
+    def replay(self, prices, timestamps, before=None):
+        """Run `update` over ticks already added to the window and extrema tracker.
+
+        For batch feeds (`Analyzer.update_many`): `detect_pattern`'s checks
+        are vectorized over the whole run, then the retest state steps
+        through the ticks in order. `before` holds the window's prices from
+        just before the run, where midpoints may fall. Returns {i: signal}
+        for the ticks where `update` would have returned a signal.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        n = len(prices)
+        steps = np.arange(1, n + 1)
+        counts = self.window.count - n + steps
+        sizes = np.minimum(counts - self._first, self.window_size)
+        extrema_counts = self.extrema.tracker.count - n + steps
+
+        # detect_pattern's midpoints, looked up in the window prices before and during the run
+        before = np.zeros(0) if before is None else np.asarray(before, dtype=np.float64)
+        history = np.concatenate([before, prices])
+        first = self.window.count - n - len(before)  # window count of history[0]
+
+        def midpoints(indices):
+            middle = indices[:, 0] + (indices[:, 1] - indices[:, 0]) // 2
+            return history[np.clip(counts - sizes + middle - first, 0, len(history) - 1)]
+
+        high_n, highs, high_prices = self.extrema.recent_many(HIGH, extrema_counts, 2)
+        low_n, lows, low_prices = self.extrema.recent_many(LOW, extrema_counts, 2)
+        high_mid, low_mid = midpoints(highs), midpoints(lows)
+        with np.errstate(invalid="ignore"):
+            top1, top2 = high_prices.T
+            top = (high_n >= 2) & (np.abs(top1 - top2) / top1 < self.tolerance) & (prices < high_mid)
+            bottom1, bottom2 = low_prices.T
+            bottom = (low_n >= 2) & (np.abs(bottom1 - bottom2) / bottom1 < self.tolerance) & (prices > low_mid)
+
+        signals = {}
+        prices, timestamps = prices.tolist(), np.asarray(timestamps).tolist()
+        top, bottom = top.tolist(), bottom.tolist()
+        for i in range(int(np.searchsorted(sizes, 20)), n):
+            last = prices[i]
+            if self.pending_retest:
+                signal = self.check_retest(last)
+                if signal:
+                    signal["time"] = timestamps[i]
+                    signals[i] = signal
+                    continue
+            if top[i]:
+                top1, top2 = high_prices[i].tolist()
+                self.pending_retest = {
+                    "type": "double_top",
+                    "entry_zone": high_mid[i],
+                    "top_level": max(top1, top2),
+                    "bottom_level": min(top1, top2, last),
+                    "countdown": self.retest_window
+                }
+            if bottom[i]:
+                bottom1, bottom2 = low_prices[i].tolist()
+                self.pending_retest = {
+                    "type": "double_bottom",
+                    "entry_zone": low_mid[i],
+                    "bottom_level": min(bottom1, bottom2),
+                    "top_level": max(bottom1, bottom2, last),
+                    "countdown": self.retest_window
+                }
+        return signals
+
     def detect_pattern(self):
-        prices = np.array(self.prices)
-        highs = self.find_local_highs(prices)
-        lows = self.find_local_lows(prices)
+        last = self.window.last_price
+        highs, high_prices = self.extrema.highs(last=2)
+        lows, low_prices = self.extrema.lows(last=2)
 
+        # The window is only read for the midpoint of a matching pair
         if len(highs) >= 2:
-            h1, h2 = highs[-2], highs[-1]
-            mid = prices[h1 + (h2 - h1) // 2]
-            if abs(prices[h1] - prices[h2]) / prices[h1] < self.tolerance:
-                if prices[-1] < mid:  # Broken below the midline
+            h1, h2 = highs
+            top1, top2 = high_prices
+            if abs(top1 - top2) / top1 < self.tolerance:
+                mid = self.prices[h1 + (h2 - h1) // 2]
+                if last < mid:  # Broken below the midline
                     self.pending_retest = {
                         "type": "double_top",
                         "entry_zone": mid,
-                        "top_level": max(prices[h1], prices[h2]),
-                        "bottom_level": min(prices[h1], prices[h2], prices[-1]),
+                        "top_level": max(top1, top2),
+                        "bottom_level": min(top1, top2, last),
                         "countdown": self.retest_window
                     }
 
         if len(lows) >= 2:
-            l1, l2 = lows[-2], lows[-1]
-            mid = prices[l1 + (l2 - l1) // 2]
-            if abs(prices[l1] - prices[l2]) / prices[l1] < self.tolerance:
-                if prices[-1] > mid:  # Broken above midline
+            l1, l2 = lows
+            bottom1, bottom2 = low_prices
+            if abs(bottom1 - bottom2) / bottom1 < self.tolerance:
+                mid = self.prices[l1 + (l2 - l1) // 2]
+                if last > mid:  # Broken above midline
                     self.pending_retest = {
                         "type": "double_bottom",
                         "entry_zone": mid,
-                        "bottom_level": min(prices[l1], prices[l2]),
-                        "top_level": max(prices[l1], prices[l2], prices[-1]),
+                        "bottom_level": min(bottom1, bottom2),
+                        "top_level": max(bottom1, bottom2, last),
                         "countdown": self.retest_window
                     }
 
@@ -76,13 +174,14 @@ class DoubleTopBottomAnalyzer:
         dist = abs(price - entry_zone) / entry_zone
 
         if dist < self.tolerance:
-            signal_type = self.pending_retest["type"]
+            retest = self.pending_retest
+            signal_type = retest["type"]
             self.pending_retest = None
 
             if signal_type == "double_top":
                 entry = price
-                tp = entry - (self.pending_retest["top_level"] - entry)
-                sl = self.pending_retest["top_level"] * 1.01
+                tp = entry - (retest["top_level"] - entry)
+                sl = retest["top_level"] * 1.01
                 return {
                     "pattern": "Double Top (Confirmed)",
                     "entry": round(entry, 4),
@@ -92,8 +191,8 @@ class DoubleTopBottomAnalyzer:
 
             elif signal_type == "double_bottom":
                 entry = price
-                tp = entry + (entry - self.pending_retest["bottom_level"])
-                sl = self.pending_retest["bottom_level"] * 0.99
+                tp = entry + (entry - retest["bottom_level"])
+                sl = retest["bottom_level"] * 0.99
                 return {
                     "pattern": "Double Bottom (Confirmed)",
                     "entry": round(entry, 4),
@@ -102,11 +201,3 @@ class DoubleTopBottomAnalyzer:
                 }
 
         return None
-
-    def find_local_highs(self, prices, order=3):
-        return [i for i in range(order, len(prices) - order)
-                if prices[i] == max(prices[i - order:i + order + 1])]
-
-    def find_local_lows(self, prices, order=3):
-        return [i for i in range(order, len(prices) - order)
-                if prices[i] == min(prices[i - order:i + order + 1])]
@@ -0,0 +1,321 @@
+from collections import deque
+from itertools import islice
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+HIGH = "high"
+LOW = "low"
+
+
+def find_local_highs(prices, order=3):
+    """Indices whose price equals the max of the `order` points either side (interior only)."""
+    return [i for i in range(order, len(prices) - order)
+            if prices[i] == max(prices[i - order:i + order + 1])]
+
+
+def find_local_lows(prices, order=3):
+    """Indices whose price equals the min of the `order` points either side (interior only)."""
+    return [i for i in range(order, len(prices) - order)
+            if prices[i] == min(prices[i - order:i + order + 1])]
+
+
+class ExtremaTracker:
+    """Confirm local highs and lows tick by tick and publish them to subscribers.
+
+    A point is a high (low) when it equals the max (min) of the `order`
+    points on either side, as in `find_local_highs`/`find_local_lows`. It
+    is confirmed once its `order`-th right neighbour arrives. Monotonic
+    deques hold the running max and min of the last `2 * order + 1` prices,
+    so each update is amortized O(1) whatever the analyzers' window sizes.
+
+    Subscribers are called as `callback(kind, index, price)` with `kind`
+    HIGH or LOW and `index` the absolute tick number (0 = first update).
+    """
+
+    def __init__(self, order=3):
+        self.order = order
+        self.count = 0
+        self.subscribers = []
+        self._recent = deque(maxlen=2 * order + 1)
+        self._max = deque()  # (index, price), prices decreasing
+        self._min = deque()  # (index, price), prices increasing
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def update(self, price):
+        """Add the next price; returns its absolute index."""
+        index = self.count
+        self.count += 1
+        self._recent.append(price)
+
+        while self._max and self._max[-1][1] <= price:
+            self._max.pop()
+        self._max.append((index, price))
+        while self._min and self._min[-1][1] >= price:
+            self._min.pop()
+        self._min.append((index, price))
+
+        span = 2 * self.order + 1
+        if self.count < span:
+            return index
+        oldest = index - span + 1
+        while self._max[0][0] < oldest:
+            self._max.popleft()
+        while self._min[0][0] < oldest:
+            self._min.popleft()
+
+        center = index - self.order
+        value = self._recent[self.order]
+        if value == self._max[0][1]:
+            self._publish(HIGH, center, value)
+        if value == self._min[0][1]:
+            self._publish(LOW, center, value)
+        return index
+
+    def update_many(self, prices, callback=None):
+        """Add `prices` in turn as `update` would, finding their extrema in one vectorized pass.
+
+        After the i-th price is counted and its extrema published,
+        `callback(i)` is called, so subscribers and the caller see the same
+        sequence of states as with one `update` per price. Returns the
+        absolute index of the last price.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        span = 2 * self.order + 1
+        # The last 2 * order prices already in still centre extrema confirmed by this run
+        tail = list(self._recent)[1:] if len(self._recent) == span else list(self._recent)
+        values = np.concatenate([np.asarray(tail, dtype=np.float64), prices])
+        first = self.count  # absolute index of prices[0]
+
+        events = []  # (tick, kind, absolute index, price), in publishing order
+        if len(values) >= span:
+            windows = sliding_window_view(values, span)
+            centers = values[self.order:len(values) - self.order]
+            # Center k is confirmed by values[k + span - 1], i.e. tick k + span - 1 - len(tail)
+            lag = span - 1 - len(tail)
+            highs = centers == windows.max(axis=1)
+            lows = centers == windows.min(axis=1)
+            for k in np.flatnonzero(highs | lows).tolist():
+                index = first - len(tail) + k + self.order
+                price = float(centers[k])
+                if highs[k]:
+                    events.append((k + lag, HIGH, index, price))
+                if lows[k]:
+                    events.append((k + lag, LOW, index, price))
+
+        # The deques and recent prices go straight to their final state;
+        # subscribers only read `count`, which advances tick by tick below
+        self._recent.extend(prices[-span:].tolist())
+        self._max.clear()
+        self._min.clear()
+        start = first + len(prices) - len(self._recent)
+        for index, price in enumerate(self._recent, start):
+            while self._max and self._max[-1][1] <= price:
+                self._max.pop()
+            self._max.append((index, price))
+            while self._min and self._min[-1][1] >= price:
+                self._min.pop()
+            self._min.append((index, price))
+
+        events.append((len(prices), None, None, None))  # sentinel
+        pending = iter(events)
+        tick, kind, index, price = next(pending)
+        for i in range(len(prices)):
+            self.count = first + i + 1
+            while tick == i:
+                self._publish(kind, index, price)
+                tick, kind, index, price = next(pending)
+            if callback is not None:
+                callback(i)
+        return self.count - 1
+
+    def _publish(self, kind, index, price):
+        for callback in self.subscribers:
+            callback(kind, index, price)
+
+
+class LineFit:
+    """Least-squares line through points that come and go, from running sums.
+
+    n and the sums of x, y, x*x, x*y and y*y are updated as points are
+    added and removed, so a fit costs O(1). They are kept relative to an
+    origin (x0, y0) near the points so the centred moments keep their
+    precision; `reset` re-centres them and clears accumulated rounding.
+    """
+
+    __slots__ = ("n", "sx", "sy", "sxx", "sxy", "syy", "x0", "y0")
+
+    def __init__(self, points=(), x0=0):
+        self.reset(points, x0)
+
+    def reset(self, points, x0):
+        self.n = 0
+        self.sx = self.sy = self.sxx = self.sxy = self.syy = 0.0
+        self.x0, self.y0 = x0, None
+        for x, y in points:
+            self.add(x, y)
+
+    def add(self, x, y):
+        if self.y0 is None:
+            self.y0 = y
+        x -= self.x0
+        y -= self.y0
+        self.n += 1
+        self.sx += x
+        self.sy += y
+        self.sxx += x * x
+        self.sxy += x * y
+        self.syy += y * y
+
+    def remove(self, x, y):
+        if self.n == 1:
+            self.reset((), self.x0)
+            return
+        x -= self.x0
+        y -= self.y0
+        self.n -= 1
+        self.sx -= x
+        self.sy -= y
+        self.sxx -= x * x
+        self.sxy -= x * y
+        self.syy -= y * y
+
+    def line(self, at=0):
+        """(slope, intercept at x = `at`, sum of squared residuals), or None below two points."""
+        n = self.n
+        if n < 2:
+            return None
+        mean_x, mean_y = self.sx / n, self.sy / n
+        sxx = self.sxx - self.sx * mean_x
+        sxy = self.sxy - self.sx * mean_y
+        syy = self.syy - self.sy * mean_y
+        slope = sxy / sxx
+        residual = max(0.0, syy - slope * sxy)
+        return slope, self.y0 + mean_y + slope * (at - self.x0 - mean_x), residual
+
+
+class ExtremaWindow:
+    """The confirmed highs and lows inside one analyzer's trailing window.
+
+    Subscribes to `tracker` and keeps the extrema an analyzer holding the
+    last `window_size` prices would find with `find_local_highs`/`lows`
+    on that window: those with `order` window points on either side.
+    Extrema leave from the front as the window moves, so queries cost
+    O(returned) amortized. Rises and falls between consecutive extrema are
+    counted as they enter and leave, so `trend` is O(1). With `fit`, a
+    `LineFit` per kind follows them too, for O(1) trendlines (`fit`).
+    """
+
+    def __init__(self, tracker, window_size, fit=False):
+        self.tracker = tracker
+        self.window_size = window_size
+        self.offset = tracker.count  # first tick this window has seen
+        self._extrema = {HIGH: deque(), LOW: deque()}
+        self._rises = {HIGH: 0, LOW: 0}
+        self._falls = {HIGH: 0, LOW: 0}
+        self._fits = {HIGH: LineFit(x0=self.offset), LOW: LineFit(x0=self.offset)} if fit else None
+        tracker.subscribe(self._on_extremum)
+
+    def _on_extremum(self, kind, index, price):
+        if index - self.tracker.order >= self.offset:
+            extrema = self._extrema[kind]
+            if extrema:
+                self._count_step(kind, extrema[-1][1], price, 1)
+            extrema.append((index, price))
+            if self._fits is not None:
+                self._fits[kind].add(index, price)
+
+    def _count_step(self, kind, before, after, sign):
+        if after > before:
+            self._rises[kind] += sign
+        elif after < before:
+            self._falls[kind] += sign
+
+    def close(self):
+        self.tracker.unsubscribe(self._on_extremum)
+
+    @property
+    def start(self):
+        """Absolute index of the oldest price in the window."""
+        return max(self.offset, self.tracker.count - self.window_size)
+
+    def _current(self, kind):
+        extrema = self._extrema[kind]
+        first = self.start + self.tracker.order
+        while extrema and extrema[0][0] < first:
+            index, price = extrema.popleft()
+            if extrema:
+                self._count_step(kind, price, extrema[0][1], -1)
+            if self._fits is not None:
+                self._fits[kind].remove(index, price)
+        return extrema
+
+    def highs(self, last=None):
+        """(indices, prices) of the window's highs, oldest first; indices are window-relative."""
+        return self._query(HIGH, last)
+
+    def lows(self, last=None):
+        return self._query(LOW, last)
+
+    def _query(self, kind, last):
+        extrema = self._current(kind)
+        if last is not None and last < len(extrema):
+            extrema = list(islice(reversed(extrema), last))[::-1]
+        start = self.start
+        return [index - start for index, _ in extrema], [price for _, price in extrema]
+
+    def recent_many(self, kind, counts, last):
+        """The window's last `last` extrema of `kind` as of each tracker count in `counts`.
+
+        For batch replays (see `HeadShouldersAnalyzer.replay`): `counts`
+        must be ascending, none past `tracker.count` and none before the
+        last query. Returns (n, indices, prices): n[j] is how many extrema
+        the window held at counts[j]; indices (window-relative) and prices
+        have shape (len(counts), last), oldest first, padded with 0 / NaN
+        where n[j] < last.
+        """
+        counts = np.asarray(counts, dtype=np.int64)
+        extrema = self._extrema[kind]
+        index = np.fromiter((i for i, _ in extrema), dtype=np.int64, count=len(extrema))
+        price = np.fromiter((p for _, p in extrema), dtype=np.float64, count=len(extrema))
+        starts = np.maximum(self.offset, counts - self.window_size)
+        # Confirmed once `order` later prices are in, and inside while `order` window prices precede it
+        hi = np.searchsorted(index, counts - 1 - self.tracker.order, side="right")
+        lo = np.searchsorted(index, starts + self.tracker.order, side="left")
+        n = np.maximum(hi - lo, 0)
+
+        pos = hi[:, None] + np.arange(-last, 0)
+        pad = pos < lo[:, None]
+        if len(index):
+            pos = np.clip(pos, 0, len(index) - 1)
+            indices = np.where(pad, 0, index[pos] - starts[:, None])
+            prices = np.where(pad, np.nan, price[pos])
+        else:
+            indices = np.zeros(pos.shape, dtype=np.int64)
+            prices = np.full(pos.shape, np.nan)
+        self._current(kind)  # drop what has left the window by now
+        return n, indices, prices
+
+    def fit(self, kind):
+        """(slope, intercept, residual) of the least-squares line through the window's extrema.
+
+        x is the window-relative index, as from `highs`/`lows`; residual is
+        the sum of squared residuals. None below two extrema. Needs `fit=True`.
+        """
+        extrema = self._current(kind)
+        line = self._fits[kind]
+        start = self.start
+        if start - line.x0 > self.window_size:
+            line.reset(extrema, start)  # re-centre once the window has moved on by its length
+        return line.line(start)
+
+    def trend(self, kind):
+        """(rising, falling): whether every step between the window's extrema is up / down."""
+        steps = max(0, len(self._current(kind)) - 1)
+        return self._rises[kind] == steps, self._falls[kind] == steps
@@ -1,19 +1,48 @@
 import numpy as np
-from collections import deque
+
+from .extrema import HIGH, LOW, ExtremaTracker, ExtremaWindow
+from .window import PriceWindow
 
 class HeadShouldersAnalyzer:
-    def __init__(self, window_size=100, tolerance=0.015, retest_window=10):
-        self.prices = deque(maxlen=window_size)
-        self.times = deque(maxlen=window_size)
+    def __init__(self, window_size=100, tolerance=0.015, retest_window=10, extrema=None,
+                 window=None):
+        # Prices and timestamps from a window shared with other analyzers
+        # when one is given (its owner appends to it); otherwise a private one
+        self.owns_window = window is None
+        self.window = window if window is not None else PriceWindow(window_size)
+        self.window_size = window_size
+        self._first = self.window.count
         self.tolerance = tolerance
         self.retest_window = retest_window
         self.pending_retest = None  # Stores pattern after breakout for retest confirmation
 
+        # Local highs/lows of the window, from a shared tracker when one is
+        # given (the owner then feeds it); otherwise from a private one
+        self.owns_extrema = extrema is None
+        self.extrema = ExtremaWindow(extrema or ExtremaTracker(), window_size)
+
+    @property
+    def size(self):
+        """Number of prices in the window."""
+        size = self.window.count - self._first
+        return size if size < self.window_size else self.window_size
+
+    @property
+    def prices(self):
+        """Read-only view of the window's prices, oldest first."""
+        return self.window.prices(self.size)
+
+    @property
+    def times(self):
+        return self.window.times(self.size)
+
     def update(self, price, timestamp):
-        self.prices.append(price)
-        self.times.append(timestamp)
+        if self.owns_window:
+            self.window.append(price, timestamp)
+        if self.owns_extrema:
+            self.extrema.tracker.update(price)
 
-        if len(self.prices) < 20:
+        if self.size < 20:
             return None
 
         # 1. Handle breakout retest check
@@ -25,34 +54,97 @@ class HeadShouldersAnalyzer:
         # 2. Scan for new Head and Shoulders pattern
         return self.detect_pattern()
 
+    def replay(self, prices, timestamps, before=None):
+        """Run `update` over ticks already added to the window and extrema tracker.
+
+        For batch feeds (`Analyzer.update_many`): `detect_pattern`'s checks
+        are vectorized over the whole run, then the retest state steps
+        through the ticks in order. Returns {i: signal} for the ticks where
+        `update` would have returned a signal. `before` is unused (see
+        `DoubleTopBottomAnalyzer.replay`).
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        n = len(prices)
+        steps = np.arange(1, n + 1)
+        sizes = np.minimum(self.window.count - n + steps - self._first, self.window_size)
+        counts = self.extrema.tracker.count - n + steps
+
+        # Same checks as detect_pattern; the lows only count without three highs
+        high_n, highs, high_prices = self.extrema.recent_many(HIGH, counts, 3)
+        low_n, lows, low_prices = self.extrema.recent_many(LOW, counts, 3)
+        with np.errstate(invalid="ignore"):
+            price_l, price_h, price_r = high_prices.T
+            top = ((high_n >= 3) & (highs[:, 1] > price_l) & (highs[:, 1] > price_r)
+                   & (np.abs(price_l - price_r) / price_h < self.tolerance)
+                   & (prices < (price_l + price_r) / 2))
+            price_l, price_h, price_r = low_prices.T
+            bottom = ((high_n < 3) & (low_n >= 3) & (lows[:, 1] < price_l) & (lows[:, 1] < price_r)
+                      & (np.abs(price_l - price_r) / price_h < self.tolerance)
+                      & (prices > (price_l + price_r) / 2))
+
+        signals = {}
+        prices, timestamps = prices.tolist(), np.asarray(timestamps).tolist()
+        top, bottom = top.tolist(), bottom.tolist()
+        for i in range(int(np.searchsorted(sizes, 20)), n):
+            price = prices[i]
+            if self.pending_retest:
+                signal = self.check_retest(price)
+                if signal:
+                    signal["time"] = timestamps[i]
+                    signals[i] = signal
+                    continue
+            if top[i]:
+                price_l, price_h, price_r = high_prices[i].tolist()
+                self.pending_retest = {
+                    "type": "head_and_shoulders",
+                    "neckline": (price_l + price_r) / 2,
+                    "head": price_h,
+                    "direction": "down",
+                    "countdown": self.retest_window
+                }
+            elif bottom[i]:
+                price_l, price_h, price_r = low_prices[i].tolist()
+                self.pending_retest = {
+                    "type": "inverse_head_and_shoulders",
+                    "neckline": (price_l + price_r) / 2,
+                    "head": price_h,
+                    "direction": "up",
+                    "countdown": self.retest_window
+                }
+        return signals
+
     def detect_pattern(self):
-        prices = np.array(self.prices)
-        highs = self.find_local_highs(prices)
-        lows = self.find_local_lows(prices)
+        # Only the last three highs (or lows) and the latest price are needed
+        highs, high_prices = self.extrema.highs(last=3)
 
         if len(highs) >= 3:
-            l, h, r = highs[-3], highs[-2], highs[-1]
-            if h > prices[l] and h > prices[r] and abs(prices[l] - prices[r]) / prices[h] < self.tolerance:
+            l, h, r = highs
+            price_l, price_h, price_r = high_prices
+            if h > price_l and h > price_r and abs(price_l - price_r) / price_h < self.tolerance:
                 # Neckline
-                neckline = (prices[l] + prices[r]) / 2
-                if prices[-1] < neckline:  # Broke below neckline
+                neckline = (price_l + price_r) / 2
+                if self.window.last_price < neckline:  # Broke below neckline
                     self.pending_retest = {
                         "type": "head_and_shoulders",
                         "neckline": neckline,
-                        "head": prices[h],
+                        "head": price_h,
                         "direction": "down",
                         "countdown": self.retest_window
                     }
 
-        elif len(lows) >= 3:
-            l, h, r = lows[-3], lows[-2], lows[-1]
-            if h < prices[l] and h < prices[r] and abs(prices[l] - prices[r]) / prices[h] < self.tolerance:
-                neckline = (prices[l] + prices[r]) / 2
-                if prices[-1] > neckline:  # Broke above neckline
+            return None
+
+        lows, low_prices = self.extrema.lows(last=3)
+        if len(lows) >= 3:
+            l, h, r = lows
+            price_l, price_h, price_r = low_prices
+            if h < price_l and h < price_r and abs(price_l - price_r) / price_h < self.tolerance:
+                neckline = (price_l + price_r) / 2
+                if self.window.last_price > neckline:  # Broke above neckline
                     self.pending_retest = {
                         "type": "inverse_head_and_shoulders",
                         "neckline": neckline,
-                        "head": prices[h],
+                        "head": price_h,
                         "direction": "up",
                         "countdown": self.retest_window
                     }
@@ -97,11 +189,3 @@ class HeadShouldersAnalyzer:
                 }
 
         return None
-
-    def find_local_highs(self, prices, order=3):
-        return [i for i in range(order, len(prices) - order)
-                if prices[i] == max(prices[i - order:i + order + 1])]
-
-    def find_local_lows(self, prices, order=3):
-        return [i for i in range(order, len(prices) - order)
-                if prices[i] == min(prices[i - order:i + order + 1])]
@@ -1,26 +1,53 @@
-import numpy as np
-from collections import deque
+from .extrema import HIGH, LOW, ExtremaTracker, ExtremaWindow
+from .window import PriceWindow
 
 class TrendlineAnalyzer:
-    def __init__(self, window_size=100, tolerance=0.01, min_points=3, retest_window=10):
-        self.prices = deque(maxlen=window_size)
-        self.times = deque(maxlen=window_size)
+    def __init__(self, window_size=100, tolerance=0.01, min_points=3, retest_window=10, extrema=None,
+                 window=None):
+        # Prices and timestamps from a window shared with other analyzers
+        # when one is given (its owner appends to it); otherwise a private one
+        self.owns_window = window is None
+        self.window = window if window is not None else PriceWindow(window_size)
+        self.window_size = window_size
+        self._first = self.window.count
         self.tolerance = tolerance
         self.min_points = min_points
         self.retest_window = retest_window
 
         self.trend = "sideways"
-        self.support_points = []
-        self.resistance_points = []
 
         # Retest logic
         self.pending_retest = None  # Dict: {type, level, triggered}
 
+        # Local highs/lows of the window, from a shared tracker when one is
+        # given (the owner then feeds it); otherwise from a private one
+        self.owns_extrema = extrema is None
+        # Support and resistance lines are fitted from running sums over the
+        # window's lows and highs (see LineFit)
+        self.extrema = ExtremaWindow(extrema or ExtremaTracker(), window_size, fit=True)
+
+    @property
+    def size(self):
+        """Number of prices in the window."""
+        size = self.window.count - self._first
+        return size if size < self.window_size else self.window_size
+
+    @property
+    def prices(self):
+        """Read-only view of the window's prices, oldest first."""
+        return self.window.prices(self.size)
+
+    @property
+    def times(self):
+        return self.window.times(self.size)
+
     def update(self, price, timestamp):
-        self.prices.append(price)
-        self.times.append(timestamp)
+        if self.owns_window:
+            self.window.append(price, timestamp)
+        if self.owns_extrema:
+            self.extrema.tracker.update(price)
 
-        if len(self.prices) < self.min_points:
+        if self.size < self.min_points:
             return None
 
         self.identify_trend()
@@ -41,15 +68,11 @@ class TrendlineAnalyzer:
         return None
 
     def identify_trend(self):
-        prices = np.array(self.prices)
-        highs = self.find_local_highs(prices)
-        lows = self.find_local_lows(prices)
-
-        is_uptrend = all(prices[highs[i]] < prices[highs[i + 1]] for i in range(len(highs) - 1)) and \
-                     all(prices[lows[i]] < prices[lows[i + 1]] for i in range(len(lows) - 1))
+        highs_rising, highs_falling = self.extrema.trend(HIGH)
+        lows_rising, lows_falling = self.extrema.trend(LOW)
 
-        is_downtrend = all(prices[highs[i]] > prices[highs[i + 1]] for i in range(len(highs) - 1)) and \
-                       all(prices[lows[i]] > prices[lows[i + 1]] for i in range(len(lows) - 1))
+        is_uptrend = highs_rising and lows_rising
+        is_downtrend = highs_falling and lows_falling
 
         if is_uptrend:
             self.trend = "uptrend"
@@ -58,28 +81,33 @@ class TrendlineAnalyzer:
         else:
             self.trend = "sideways"
 
-    def find_trendlines(self):
-        prices = np.array(self.prices)
-        times = np.arange(len(prices))
+    @property
+    def support_points(self):
+        """(index, price) of the window's lows, which the support line is fitted to."""
+        return list(zip(*self.extrema.lows()))
 
+    @property
+    def resistance_points(self):
+        return list(zip(*self.extrema.highs()))
+
+    def find_trendlines(self):
+        # Residuals are sums of squared residuals, for gating on line quality
         if self.trend == "uptrend":
-            lows_idx = self.find_local_lows(prices)
-            if len(lows_idx) >= 2:
-                self.support_points = [(times[i], prices[i]) for i in lows_idx]
-                self.support_slope, self.support_intercept = self.linear_fit(lows_idx, prices)
+            fit = self.extrema.fit(LOW)
+            if fit is not None:
+                self.support_slope, self.support_intercept, self.support_residual = fit
             else:
-                self.support_slope = self.support_intercept = None
+                self.support_slope = self.support_intercept = self.support_residual = None
 
         elif self.trend == "downtrend":
-            highs_idx = self.find_local_highs(prices)
-            if len(highs_idx) >= 2:
-                self.resistance_points = [(times[i], prices[i]) for i in highs_idx]
-                self.resistance_slope, self.resistance_intercept = self.linear_fit(highs_idx, prices)
+            fit = self.extrema.fit(HIGH)
+            if fit is not None:
+                self.resistance_slope, self.resistance_intercept, self.resistance_residual = fit
             else:
-                self.resistance_slope = self.resistance_intercept = None
+                self.resistance_slope = self.resistance_intercept = self.resistance_residual = None
 
     def check_signals(self, current_price):
-        idx = len(self.prices) - 1
+        idx = self.size - 1
 
         # Check breakout from support
         if self.trend == "uptrend" and self.support_slope is not None:
@@ -148,17 +176,3 @@ class TrendlineAnalyzer:
                 }
 
         return None
-
-    def linear_fit(self, indices, prices):
-        x = np.array(indices)
-        y = prices[x]
-        A = np.vstack([x, np.ones(len(x))]).T
-        return np.linalg.lstsq(A, y, rcond=None)[0]
-
-    def find_local_highs(self, prices, order=3):
-        return [i for i in range(order, len(prices) - order)
-                if prices[i] == max(prices[i - order:i + order + 1])]
-
-    def find_local_lows(self, prices, order=3):
-        return [i for i in range(order, len(prices) - order)
-                if prices[i] == min(prices[i - order:i + order + 1])]
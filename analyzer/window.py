@@ -0,0 +1,48 @@
+import numpy as np
+
+
+class PriceWindow:
+    """Fixed-capacity ring buffer of prices and timestamps shared by analyzers.
+
+    Every value is written twice, at slot `i` and `i + capacity`, so the
+    latest `n` points always form one contiguous slice: `prices(n)` and
+    `times(n)` are read-only views, not copies. Analyzers with different
+    window sizes read the tail they need from one buffer sized for the
+    largest of them.
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self._prices = np.zeros(2 * capacity, dtype=np.float64)
+        self._times = np.zeros(2 * capacity, dtype=np.float64)
+        # Views are cut from read-only aliases, so they come out read-only
+        self._prices_view = self._prices.view()
+        self._prices_view.flags.writeable = False
+        self._times_view = self._times.view()
+        self._times_view.flags.writeable = False
+        self.count = 0  # total points ever appended
+        self.last_price = None
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, price, timestamp):
+        slot = self.count % self.capacity
+        self._prices[slot] = self._prices[slot + self.capacity] = price
+        self._times[slot] = self._times[slot + self.capacity] = timestamp
+        self.count += 1
+        self.last_price = price
+
+    def _view(self, values, n):
+        size = len(self)
+        n = size if n is None else min(n, size)
+        # The next write slot mirrored into the upper half bounds the newest point
+        end = self.count % self.capacity + self.capacity
+        return values[end - n:end]
+
+    def prices(self, n=None):
+        """Read-only view of the latest `n` prices, oldest first."""
+        return self._view(self._prices_view, n)
+
+    def times(self, n=None):
+        return self._view(self._times_view, n)
@@ -0,0 +1,2 @@
+from .synthetic import SHAPES, generate
+from .suite import GROUPS, SIZES, compare, run_suite
@@ -0,0 +1,74 @@
+"""Benchmark the detectors and analyzers on seeded synthetic ticks.
+
+    python -m bench run --out bench.json                  # 1k, 10k, 100k and 1M points
+    python -m bench run --sizes 1000,10000 --groups detectors --out quick.json
+    python -m bench startup --out startup.json            # import time and RSS, fresh processes
+    python -m bench compare base.json bench.json --threshold 0.1 [--normalize]
+"""
+
+import argparse
+import sys
+
+from .suite import (GROUPS, SIZES, STARTUP, compare, format_comparison, format_results, load, run_startup,
+                    run_suite, save)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the suite and save the timings as JSON")
+    run.add_argument("--sizes", default=",".join(str(n) for n in SIZES),
+                     help="comma-separated series lengths")
+    run.add_argument("--groups", default=",".join(GROUPS), help=f"subset of {','.join(GROUPS)}")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--out", default="bench.json")
+
+    startup = commands.add_parser("startup", help="time imports and the first detection in fresh processes")
+    startup.add_argument("--probes", default=",".join(STARTUP), help=f"subset of {','.join(STARTUP)}")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.add_argument("--out", default="startup.json")
+
+    cmp = commands.add_parser("compare", help="compare two saved runs and flag regressions")
+    cmp.add_argument("base")
+    cmp.add_argument("new")
+    cmp.add_argument("--threshold", type=float, default=0.10,
+                     help="relative slowdown that counts as a regression")
+    cmp.add_argument("--normalize", action="store_true",
+                     help="scale by the runs' calibration timings (different or noisy machines)")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        sizes = [int(n) for n in args.sizes.split(",")]
+        groups = args.groups.split(",")
+        unknown = set(groups) - set(GROUPS)
+        if unknown:
+            parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+        document = run_suite(sizes, groups, args.seed, progress=lambda line: print(line, file=sys.stderr))
+        save(document, args.out)
+        print(format_results(document))
+        print(f"saved {args.out}")
+        return 0
+
+    if args.command == "startup":
+        probes = args.probes.split(",")
+        unknown = set(probes) - set(STARTUP)
+        if unknown:
+            parser.error(f"unknown probes: {', '.join(sorted(unknown))}")
+        document = run_startup(probes, args.runs)
+        save(document, args.out)
+        print(format_results(document))
+        print(f"saved {args.out}")
+        return 0
+
+    rows = compare(load(args.base), load(args.new), args.threshold, args.normalize)
+    print(format_comparison(rows))
+    regressions = [row for row in rows if row[4] == "REGRESSION"]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,459 @@
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .synthetic import generate
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+DETECTORS = (
+    "head_and_shoulders", "inverse_head_and_shoulders", "double_top", "double_bottom",
+    "triple_top", "triple_bottom", "falling_wedge", "rising_wedge", "flag", "pennant",
+    "ascending_triangle", "descending_triangle", "diamond", "cup_and_handle", "rectangle",
+    "broadening_triangle", "symmetrical_triangle",
+)
+# detect_* methods that take (peaks, troughs) only
+PEAKS_ONLY = DETECTORS[:6]
+
+
+def measure(fn, min_time=0.2, max_runs=100, setup=None):
+    """Time `fn` (called with `setup()`'s result when given) until `min_time` or `max_runs`."""
+    runs = []
+    while not runs or (len(runs) < max_runs and sum(runs) < min_time):
+        arg = setup() if setup else None
+        started = time.perf_counter()
+        fn(arg) if setup else fn()
+        runs.append(time.perf_counter() - started)
+    return _timing(runs)
+
+
+def _timing(runs, per="call"):
+    return {
+        "median_us": statistics.median(runs) * 1e6,
+        "min_us": min(runs) * 1e6,
+        "runs": len(runs),
+        "per": per,
+    }
+
+
+def _frame(epochs, prices):
+    import pandas as pd
+
+    return pd.DataFrame({"timestamp": pd.to_datetime(epochs, unit="s"), "price": prices})
+
+
+def bench_identify(n, epochs, prices, steps=50):
+    from pattern_detector import PatternDetector
+
+    results = {}
+    df = _frame(epochs[:n], prices[:n])
+    results["identify_peaks_and_troughs/cold"] = measure(
+        lambda detector: detector.identify_peaks_and_troughs(df),
+        setup=PatternDetector, max_runs=20,
+    )
+
+    # Window of n points moving forward one tick per call
+    frame = _frame(epochs[:n + steps], prices[:n + steps])
+    windows = [frame.iloc[i:i + n] for i in range(steps + 1)]
+    detector = PatternDetector()
+    detector.identify_peaks_and_troughs(windows[0])
+    runs = []
+    for window in windows[1:]:
+        started = time.perf_counter()
+        detector.identify_peaks_and_troughs(window)
+        runs.append(time.perf_counter() - started)
+    results["identify_peaks_and_troughs/step"] = _timing(runs)
+    return results
+
+
+def bench_detectors(n, epochs, prices):
+    from pattern_detector import PatternDetector
+
+    detector = PatternDetector()
+    df = _frame(epochs[:n], prices[:n])
+    peaks, troughs = detector.identify_peaks_and_troughs(df)
+    results = {}
+    for name in DETECTORS:
+        method = getattr(detector, f"detect_{name}")
+        if name in PEAKS_ONLY:
+            results[f"detect_{name}"] = measure(lambda: method(peaks, troughs))
+        else:
+            results[f"detect_{name}"] = measure(lambda: method(peaks, troughs, df))
+    return results
+
+
+def bench_run_detection(n, epochs, prices, cycles=50):
+    """One polling cycle per call: one new tick arrives, then detection runs.
+
+    Signals are never sent (the send methods report failure), so every
+    cycle evaluates all patterns and no cooldown kicks in.
+    """
+    from detector.extrema import IncrementalExtrema
+    from pattern_detector import PatternDetector
+
+    detector = PatternDetector(max_points=n)
+    detector.store.extend(epochs[:n] * 1000, prices[:n])
+    detector.extrema = IncrementalExtrema.from_prices(prices[:n], detector.extrema_window)
+    ticks = [{"epoch": int(e), "quote": float(p)} for e, p in zip(epochs[n:n + cycles], prices[n:n + cycles])]
+
+    async def fetch_data():
+        return detector.append_ticks([ticks.pop(0)])
+
+    async def refuse(*args):
+        return False
+
+    detector.fetch_data = fetch_data
+    detector.send_signal = detector.send_signals = refuse
+
+    async def run():
+        runs = []
+        while ticks:
+            started = time.perf_counter()
+            await detector.run_detection()
+            runs.append(time.perf_counter() - started)
+        return runs
+
+    return {"run_detection": _timing(asyncio.run(run()))}
+
+
+def bench_analyzers(n, epochs, prices, max_ticks=5_000):
+    """Per-tick update cost of each analyzer fed min(n, max_ticks) ticks, and of Analyzer.update_many."""
+    from analyzer.channel import ChannelAnalyzer
+    from analyzer.dtb import DoubleTopBottomAnalyzer
+    from analyzer.hs import HeadShouldersAnalyzer
+    from analyzer.trendline import TrendlineAnalyzer
+
+    count = min(n, max_ticks)
+    feed = list(zip(prices[:count].tolist(), epochs[:count].tolist()))
+    results = {}
+    for name, factory in (
+        ("hs", HeadShouldersAnalyzer),
+        ("dtb", DoubleTopBottomAnalyzer),
+        ("trendline", TrendlineAnalyzer),
+        ("channel", ChannelAnalyzer),
+        ("Analyzer", None),
+    ):
+        try:
+            if factory is None:
+                from analyzer.analyzer import Analyzer as factory
+            analyzer = factory()
+            started = time.perf_counter()
+            for price, epoch in feed:
+                analyzer.update(price, epoch)
+            elapsed = time.perf_counter() - started
+        except Exception as e:
+            results[f"analyzer/{name}.update"] = {"skipped": f"{type(e).__name__}: {e}"}
+            continue
+        results[f"analyzer/{name}.update"] = {
+            "median_us": elapsed / count * 1e6,
+            "min_us": elapsed / count * 1e6,
+            "runs": count,
+            "per": "tick",
+        }
+
+    # The same ticks as one batch, as on warm-up
+    try:
+        from analyzer.analyzer import Analyzer
+
+        analyzer = Analyzer()
+        started = time.perf_counter()
+        analyzer.update_many(prices[:count], epochs[:count])
+        elapsed = time.perf_counter() - started
+    except Exception as e:
+        results["analyzer/Analyzer.update_many"] = {"skipped": f"{type(e).__name__}: {e}"}
+    else:
+        results["analyzer/Analyzer.update_many"] = {
+            "median_us": elapsed / count * 1e6,
+            "min_us": elapsed / count * 1e6,
+            "runs": count,
+            "per": "tick",
+        }
+    return results
+
+
+def bench_analyzer_window(n, epochs, prices, windows=(100, 1_000, 10_000), max_ticks=5_000):
+    """hs + dtb + trendline with private windows vs. one shared PriceWindow and tracker.
+
+    Per-tick time over min(n, max_ticks) ticks, and the memory the three
+    analyzers hold (`retained_kb`) once a full window has been fed.
+    """
+    import tracemalloc
+
+    from analyzer.dtb import DoubleTopBottomAnalyzer
+    from analyzer.extrema import ExtremaTracker
+    from analyzer.hs import HeadShouldersAnalyzer
+    from analyzer.trendline import TrendlineAnalyzer
+    from analyzer.window import PriceWindow
+
+    classes = (HeadShouldersAnalyzer, DoubleTopBottomAnalyzer, TrendlineAnalyzer)
+
+    def separate(window_size):
+        analyzers = [cls(window_size=window_size) for cls in classes]
+
+        def feed(price, epoch):
+            for analyzer in analyzers:
+                analyzer.update(price, epoch)
+        return analyzers, feed
+
+    def shared(window_size):
+        window, tracker = PriceWindow(window_size), ExtremaTracker()
+        analyzers = [cls(window_size=window_size, window=window, extrema=tracker) for cls in classes]
+
+        def feed(price, epoch):
+            window.append(price, epoch)
+            tracker.update(price)
+            for analyzer in analyzers:
+                analyzer.update(price, epoch)
+        return analyzers, feed
+
+    count = min(n, max_ticks)
+    results = {}
+    for window_size in windows:
+        fill = list(zip(prices[:max(count, window_size)].tolist(), epochs[:max(count, window_size)].tolist()))
+        for mode, build in (("separate", separate), ("shared", shared)):
+            _, feed = build(window_size)
+            started = time.perf_counter()
+            for price, epoch in fill[:count]:
+                feed(price, epoch)
+            elapsed = time.perf_counter() - started
+
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            analyzers, feed = build(window_size)
+            for price, epoch in fill[:window_size]:
+                feed(price, epoch)
+            retained = tracemalloc.get_traced_memory()[0] - before
+            tracemalloc.stop()
+            del analyzers, feed
+
+            results[f"analyzer_window/{mode}/w{window_size}"] = {
+                "median_us": elapsed / count * 1e6,
+                "min_us": elapsed / count * 1e6,
+                "runs": count,
+                "per": "tick",
+                "retained_kb": retained / 1024,
+            }
+    return results
+
+
+def calibrate(rounds=5):
+    """Best-of time (us) of a fixed Python + numpy workload, to gauge machine speed."""
+    data = np.random.default_rng(0).normal(size=100_000)
+
+    def workload():
+        np.sort(data)
+        total = 0.0
+        for value in data[:20_000].tolist():
+            total += value
+        return total
+
+    return min(measure(workload, min_time=0, max_runs=1)["min_us"] for _ in range(rounds))
+
+
+# Fresh-interpreter probes: name -> code timed after interpreter start-up
+STARTUP = {
+    "python": "pass",
+    "import pattern_detector": "import pattern_detector",
+    "first detection": """
+import asyncio
+from pattern_detector import PatternDetector
+from bench.synthetic import generate
+
+detector = PatternDetector()
+epochs, prices, _ = generate(1000, seed=0)
+detector.append_ticks({"epoch": int(e), "quote": float(p)} for e, p in zip(epochs, prices))
+
+async def refuse(*args):
+    return False
+
+detector.send_signal = detector.send_signals = refuse
+asyncio.run(detector.detect_signals())
+""",
+    "import detector.backtest": "import detector.backtest",
+    "import analyzer.analyzer": "import analyzer.analyzer",
+}
+# Modules the core runtime should not need to load
+HEAVY_MODULES = ("pandas", "scipy")
+
+_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+exec(compile(sys.argv[1], "<probe>", "exec"))
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  "loaded": sorted(m for m in sys.argv[2:] if m in sys.modules)}))
+"""
+
+
+def bench_startup(probes=tuple(STARTUP), runs=5):
+    """Import/first-cycle time and peak RSS of each probe, each run in a fresh interpreter.
+
+    `wall_us` also counts interpreter start-up; `median_us` is the probe
+    alone. `loaded` lists the HEAVY_MODULES the probe pulled in.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    results = {}
+    for name in probes:
+        runs_s, walls, rss = [], [], []
+        for _ in range(runs):
+            started = time.perf_counter()
+            out = subprocess.run([sys.executable, "-c", _PROBE, STARTUP[name], *HEAVY_MODULES],
+                                 capture_output=True, text=True, cwd=root, env=env)
+            walls.append(time.perf_counter() - started)
+            if out.returncode:
+                results[f"startup/{name}"] = {"skipped": out.stderr.strip().splitlines()[-1]}
+                break
+            probe = json.loads(out.stdout.strip().splitlines()[-1])
+            runs_s.append(probe["seconds"])
+            rss.append(probe["rss_kb"])
+        else:
+            results[f"startup/{name}"] = dict(
+                _timing(runs_s, per="process"),
+                wall_us=statistics.median(walls) * 1e6,
+                rss_kb=max(rss),
+                loaded=probe["loaded"],
+            )
+    return results
+
+
+GROUPS = {
+    "identify": bench_identify,
+    "detectors": bench_detectors,
+    "run_detection": bench_run_detection,
+    "analyzers": bench_analyzers,
+    "analyzer_window": bench_analyzer_window,
+}
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _meta(**extra):
+    return dict(
+        created=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        revision=_git_revision(),
+        python=sys.version.split()[0],
+        numpy=np.__version__,
+        platform=platform.platform(),
+        cpus=os.cpu_count(),
+        **extra,
+    )
+
+
+def run_suite(sizes=SIZES, groups=tuple(GROUPS), seed=0, progress=print):
+    """Run the selected benchmark groups at every size; returns the JSON document."""
+    import pandas as pd
+
+    logging.getLogger("pattern_detector").setLevel(logging.WARNING)
+    epochs, prices, injected = generate(max(sizes) + 100, seed=seed)
+    document = {
+        "meta": _meta(pandas=pd.__version__, seed=seed, sizes=list(sizes), injected_shapes=len(injected)),
+        "results": {},
+    }
+    calibration = calibrate()
+    for n in sizes:
+        for group in groups:
+            started = time.perf_counter()
+            for name, timing in GROUPS[group](n, epochs, prices).items():
+                document["results"][f"{name}@{n}"] = timing
+            if progress:
+                progress(f"{group}@{n}: {time.perf_counter() - started:.1f}s")
+    # Averaged over the start and end of the run, in case the machine drifts
+    document["meta"]["calibration_us"] = (calibration + calibrate()) / 2
+    return document
+
+
+def run_startup(probes=tuple(STARTUP), runs=5):
+    """Run the start-up probes; returns a JSON document comparable with `compare`."""
+    calibration = calibrate()
+    results = bench_startup(probes, runs)
+    return {"meta": _meta(runs=runs, calibration_us=(calibration + calibrate()) / 2), "results": results}
+
+
+def save(document, path):
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(base, new, threshold=0.10, normalize=False):
+    """Rows (key, base_us, new_us, ratio, status) for benchmarks in either run.
+
+    A benchmark regresses when its median is more than `threshold`
+    (relative) slower than in `base`, and improves when it is that much
+    faster. With `normalize`, ratios are divided by the ratio of the two
+    runs' calibration timings, so a slower machine alone flags nothing.
+    """
+    scale = 1.0
+    if normalize:
+        scale = new["meta"]["calibration_us"] / base["meta"]["calibration_us"]
+    rows = []
+    base_results, new_results = base["results"], new["results"]
+    for key in sorted(set(base_results) | set(new_results)):
+        old, cur = base_results.get(key, {}), new_results.get(key, {})
+        if "median_us" not in old or "median_us" not in cur:
+            status = "added" if "median_us" in cur else "removed" if "median_us" in old else "skipped"
+            rows.append((key, old.get("median_us"), cur.get("median_us"), None, status))
+            continue
+        ratio = cur["median_us"] / old["median_us"] / scale if old["median_us"] else float("inf")
+        if ratio > 1 + threshold:
+            status = "REGRESSION"
+        elif ratio < 1 / (1 + threshold):
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((key, old["median_us"], cur["median_us"], ratio, status))
+    return rows
+
+
+def format_results(document):
+    lines = [f"{'benchmark':<52} {'median':>12} {'min':>12} {'runs':>6}"]
+    for key, timing in document["results"].items():
+        if "rss_kb" in timing:
+            lines.append(f"{key:<52} {_us(timing['median_us']):>12} {_us(timing['min_us']):>12} {timing['runs']:>6}"
+                         f"  wall {_us(timing['wall_us'])}, rss {timing['rss_kb'] / 1024:.1f} MB"
+                         + (f", loads {', '.join(timing['loaded'])}" if timing["loaded"] else ""))
+        elif "median_us" in timing:
+            lines.append(f"{key:<52} {_us(timing['median_us']):>12} {_us(timing['min_us']):>12} {timing['runs']:>6}"
+                         + (" /tick" if timing["per"] == "tick" else "")
+                         + (f"  holds {timing['retained_kb']:.0f} KB" if "retained_kb" in timing else ""))
+        else:
+            lines.append(f"{key:<52} skipped ({timing['skipped']})")
+    return "\n".join(lines)
+
+
+def format_comparison(rows):
+    lines = [f"{'benchmark':<52} {'base':>12} {'new':>12} {'ratio':>7}  status"]
+    for key, old, cur, ratio, status in rows:
+        lines.append(f"{key:<52} {_us(old):>12} {_us(cur):>12} "
+                     f"{(f'{ratio:.2f}x' if ratio is not None else '-'):>7}  {status}")
+    return "\n".join(lines)
+
+
+def _us(value):
+    if value is None:
+        return "-"
+    if value >= 1e6:
+        return f"{value / 1e6:.2f} s"
+    if value >= 1e3:
+        return f"{value / 1e3:.2f} ms"
+    return f"{value:.1f} us"
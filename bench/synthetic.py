@@ -0,0 +1,39 @@
+import numpy as np
+
+# Pattern templates as (x, y) knots: x is the fraction of the shape's
+# length, y a multiple of the shape amplitude relative to its start.
+SHAPES = {
+    "head_and_shoulders": [(0, 0), (0.15, 0.6), (0.3, 0.15), (0.5, 1.0), (0.7, 0.15), (0.85, 0.6), (1, -0.3)],
+    "double_top": [(0, 0), (0.25, 1.0), (0.5, 0.45), (0.75, 1.0), (1, -0.2)],
+    "wedge": [(0, 0), (0.15, 0.8), (0.3, 0.3), (0.45, 1.1), (0.6, 0.7), (0.75, 1.3), (0.85, 1.1), (1, 0.2)],
+    "triangle": [(0, 0), (0.15, 1.2), (0.3, -0.8), (0.45, 0.8), (0.6, -0.4), (0.75, 0.4), (0.85, -0.1), (1, 0.9)],
+}
+
+
+def shape_path(name, length, amplitude):
+    """`length` prices tracing the template `name`, starting at 0."""
+    x, y = zip(*SHAPES[name])
+    return np.interp(np.linspace(0, 1, length), x, y) * amplitude
+
+
+def generate(n, seed=0, start=1000.0, volatility=0.5, shape_every=2000, shape_length=200,
+             amplitude=15.0, shape_noise=0.1, shapes=tuple(SHAPES), start_epoch=1_600_000_000):
+    """Seeded random walk of `n` ticks with pattern shapes spliced in.
+
+    Every `shape_every` ticks the walk's steps are replaced by one of
+    `shapes` (cycling) for `shape_length` ticks, with a little noise, and
+    the walk carries on from where the shape ended. Returns (epochs,
+    prices, injected) with `injected` a list of (start_index, shape).
+    """
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, volatility, n)
+    injected = []
+    if shapes and shape_length > 1:
+        for i, at in enumerate(range(shape_every // 2, n - shape_length, shape_every)):
+            name = shapes[i % len(shapes)]
+            path = shape_path(name, shape_length + 1, amplitude * rng.uniform(0.7, 1.3))
+            steps[at:at + shape_length] = np.diff(path) + rng.normal(0, shape_noise, shape_length)
+            injected.append((at, name))
+    prices = np.round(start + np.cumsum(steps), 3)
+    epochs = start_epoch + np.arange(n, dtype=np.int64)
+    return epochs, prices, injected
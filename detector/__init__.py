@@ -0,0 +1 @@
+from .stream import FirebaseEventStream
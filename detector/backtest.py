@@ -0,0 +1,364 @@
+"""Replay a tick archive through the pattern detectors and analyzers.
+
+Signals are collected by sliding PatternDetector's window over the archive
+(every `stride` ticks) and by feeding the analyzer package tick by tick.
+Every signal is then entered at the market price and resolved against the
+future price array: whichever of take-profit and stop-loss is touched
+first, or the price at `horizon` ticks (timeout).
+
+    python -m detector.backtest ticks.npz --stride 10 --horizon 300
+    python -m detector.backtest journal/ --symbol R_25 --analyzers
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .engine import DetectionEngine
+from .extrema import IncrementalExtrema
+
+TP, TIMEOUT, SL = 1, 0, -1
+OUTCOMES = {TP: "tp", TIMEOUT: "timeout", SL: "sl"}
+
+ANALYZERS = ("hs", "dtb", "trendline")
+
+
+def load_ticks(path, symbol=None):
+    """Load (epochs, prices) sorted by epoch from an archive.
+
+    Supported: a TickJournal directory (`symbol` picks one symbol), a .npz
+    with `epoch` and `quote` arrays, a structured .npy with those fields,
+    or a CSV with `epoch` and `quote` columns.
+    """
+    if os.path.isdir(path):
+        epochs, prices = _load_journal(path, symbol)
+    elif path.endswith(".npz"):
+        with np.load(path) as archive:
+            epochs, prices = archive["epoch"], archive["quote"]
+    elif path.endswith(".npy"):
+        records = np.load(path, mmap_mode="r")
+        epochs, prices = records["epoch"], records["quote"]
+    else:
+        import pandas as pd
+
+        frame = pd.read_csv(path, usecols=["epoch", "quote"])
+        epochs, prices = frame["epoch"].to_numpy(), frame["quote"].to_numpy()
+
+    epochs = np.asarray(epochs, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    if len(epochs) > 1 and np.any(np.diff(epochs) < 0):
+        order = np.argsort(epochs, kind="stable")
+        epochs, prices = epochs[order], prices[order]
+    return epochs, prices
+
+
+def _load_journal(directory, symbol):
+    from ingest.journal import RECORD
+
+    with open(os.path.join(directory, "symbols.json")) as f:
+        symbols = json.load(f)
+    if symbol is None:
+        if len(symbols) != 1:
+            raise ValueError(f"journal holds {symbols}; pick one with symbol=")
+        symbol = symbols[0]
+    symbol_id = symbols.index(symbol)
+
+    chunks = []
+    for name in sorted(os.listdir(directory)):
+        if name.startswith("segment-") and name.endswith(".bin"):
+            records = np.fromfile(os.path.join(directory, name), dtype=RECORD)
+            chunks.append(records[(records["epoch"] != 0) & (records["symbol"] == symbol_id)])
+    records = np.concatenate(chunks) if chunks else np.zeros(0, dtype=RECORD)
+    return records["epoch"], records["quote"]
+
+
+def simulate_outcomes(prices, entry_at, direction, take_profit, stop_loss, horizon, chunk=4096):
+    """Resolve trades entered at `prices[entry_at]` by first touch of TP or SL.
+
+    `direction` is +1 (long) or -1 (short). Each chunk of trades is checked
+    against its next `horizon` prices at once. A tick touching both levels
+    counts as a stop. Returns (outcome, exit_price, exit_at) arrays; trades
+    that time out exit at the last price seen, which is also what happens
+    when the archive ends first.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    entry_at = np.asarray(entry_at, dtype=np.int64)
+    direction = np.asarray(direction, dtype=np.float64)
+    take_profit = np.asarray(take_profit, dtype=np.float64)
+    stop_loss = np.asarray(stop_loss, dtype=np.float64)
+    n = len(prices)
+    count = len(entry_at)
+
+    outcome = np.full(count, TIMEOUT, dtype=np.int8)
+    exit_price = np.empty(count)
+    exit_at = np.empty(count, dtype=np.int64)
+    if not count:
+        return outcome, exit_price, exit_at
+
+    # future[i] = prices[i + 1:i + 1 + horizon], NaN past the end
+    padded = np.concatenate([prices[1:], np.full(horizon, np.nan)])
+    future = sliding_window_view(padded, horizon)
+
+    for lo in range(0, count, chunk):
+        hi = min(lo + chunk, count)
+        t = entry_at[lo:hi]
+        d = direction[lo:hi, None]
+        path = future[t] * d  # short trades become long ones on the negated path
+        with np.errstate(invalid="ignore"):
+            hit_tp = path >= (take_profit[lo:hi] * direction[lo:hi])[:, None]
+            hit_sl = path <= (stop_loss[lo:hi] * direction[lo:hi])[:, None]
+        first_tp = np.where(hit_tp.any(axis=1), hit_tp.argmax(axis=1), horizon)
+        first_sl = np.where(hit_sl.any(axis=1), hit_sl.argmax(axis=1), horizon)
+
+        available = np.minimum(horizon, n - 1 - t)
+        last = np.maximum(available - 1, 0)
+        timeout_price = np.where(available > 0, future[t, last], prices[t])
+        timeout_at = t + np.where(available > 0, last + 1, 0)
+
+        is_sl = (first_sl <= first_tp) & (first_sl < horizon)
+        is_tp = (first_tp < first_sl)
+        outcome[lo:hi] = np.where(is_tp, TP, np.where(is_sl, SL, TIMEOUT))
+        exit_price[lo:hi] = np.where(is_tp, take_profit[lo:hi], np.where(is_sl, stop_loss[lo:hi], timeout_price))
+        exit_at[lo:hi] = np.where(is_tp, t + 1 + first_tp, np.where(is_sl, t + 1 + first_sl, timeout_at))
+    return outcome, exit_price, exit_at
+
+
+def _scan(prices, offset, points, window, order, engine):
+    """Every (t, detector, signal) firing at the absolute ticks in `points`.
+
+    `prices` starts at absolute tick `offset` and must cover `window` ticks
+    before the first point; extrema confirmed inside it are identical to
+    those of the full archive.
+    """
+    extrema = IncrementalExtrema.from_prices(prices, order)
+    detections = []
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for t in points.tolist():
+            lo = max(0, t + 1 - window - offset)
+            series = prices[lo:t + 1 - offset]
+            features = engine.compute(*extrema.window(series, lo), series)
+            detections.extend((t, detector, signal) for detector, signal in engine.evaluate(features))
+    return detections
+
+
+class Signals:
+    """Column lists of raw signals, converted to arrays by `arrays()`."""
+
+    FIELDS = ("entry_at", "source", "pattern", "direction", "take_profit", "stop_loss")
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, [])
+
+    def add(self, entry_at, source, pattern, direction, take_profit, stop_loss):
+        self.entry_at.append(entry_at)
+        self.source.append(source)
+        self.pattern.append(pattern)
+        self.direction.append(direction)
+        self.take_profit.append(take_profit)
+        self.stop_loss.append(stop_loss)
+
+    def __len__(self):
+        return len(self.entry_at)
+
+    def arrays(self):
+        return {
+            "entry_at": np.asarray(self.entry_at, dtype=np.int64),
+            "source": np.asarray(self.source, dtype=object),
+            "pattern": np.asarray(self.pattern, dtype=object),
+            "direction": np.asarray(self.direction, dtype=np.int8),
+            "take_profit": np.asarray(self.take_profit, dtype=np.float64),
+            "stop_loss": np.asarray(self.stop_loss, dtype=np.float64),
+        }
+
+
+class Backtest:
+    """Collect signals from an archive and score their outcomes.
+
+    `window`, `order` and `engine` mirror PatternDetector (max_points,
+    extrema_window, DetectionEngine). A detector that fired is muted for
+    `cooldown` seconds of archive time, like the live cooldown.
+    `analyzer_params` maps an analyzer name to its constructor kwargs.
+    """
+
+    def __init__(self, epochs, prices, window=1000, stride=10, horizon=300, cooldown=300,
+                 order=5, engine=None, min_points=5, analyzer_params=None):
+        self.epochs = np.asarray(epochs, dtype=np.int64)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.window = window
+        self.stride = stride
+        self.horizon = horizon
+        self.cooldown = cooldown
+        self.order = order
+        self.engine = engine or DetectionEngine()
+        self.min_points = min_points
+        self.analyzer_params = analyzer_params or {}
+
+    def detector_signals(self, signals=None, jobs=1):
+        """Slide the detection window over the archive, every `stride` ticks.
+
+        With `jobs` > 1 the evaluation points are split into contiguous
+        ranges scanned in worker processes; the cooldown is applied here
+        afterwards, so the result is the same as a serial scan.
+        """
+        signals = Signals() if signals is None else signals
+        points = np.arange(self.min_points - 1, len(self.prices), self.stride)
+        if jobs > 1 and len(points) > jobs:
+            with ProcessPoolExecutor(jobs) as pool:
+                futures = []
+                for part in np.array_split(points, jobs):
+                    lo = max(0, part[0] + 1 - self.window)
+                    futures.append(pool.submit(_scan, self.prices[lo:part[-1] + 1], lo, part,
+                                               self.window, self.order, self.engine))
+                detections = [item for future in futures for item in future.result()]
+        else:
+            detections = _scan(self.prices, 0, points, self.window, self.order, self.engine)
+
+        muted_until = {}
+        for t, detector, signal in detections:
+            now = self.epochs[t]
+            if muted_until.get(detector, now) > now:
+                continue
+            muted_until[detector] = now + self.cooldown
+            direction = 1 if signal["direction"] == "Bullish" else -1
+            signals.add(t, detector, signal["pattern"], direction,
+                        signal["take_profit"], signal["stop_loss"])
+        return signals
+
+    def analyzer_signals(self, names=ANALYZERS, stride=1, signals=None):
+        """Feed every `stride`-th tick to fresh analyzers and record their signals.
+
+        The analyzers keep per-tick retest state, so they replay the
+        (optionally decimated) series in order rather than sampled windows.
+        """
+        from analyzer.dtb import DoubleTopBottomAnalyzer
+        from analyzer.hs import HeadShouldersAnalyzer
+        from analyzer.trendline import TrendlineAnalyzer
+
+        factories = {
+            "hs": HeadShouldersAnalyzer,
+            "dtb": DoubleTopBottomAnalyzer,
+            "trendline": TrendlineAnalyzer,
+        }
+        analyzers = [(name, factories[name](**self.analyzer_params.get(name, {}))) for name in names]
+        signals = Signals() if signals is None else signals
+        prices = self.prices[::stride].tolist()
+        epochs = self.epochs[::stride].tolist()
+
+        for i, (price, epoch) in enumerate(zip(prices, epochs)):
+            for name, analyzer in analyzers:
+                signal = analyzer.update(price, epoch)
+                if signal:
+                    direction = 1 if signal["tp"] > signal["entry"] else -1
+                    signals.add(i * stride, name, signal["pattern"], direction, signal["tp"], signal["sl"])
+        return signals
+
+    def resolve(self, signals):
+        """Simulate every signal; returns the signal columns plus outcome columns."""
+        columns = signals.arrays()
+        outcome, exit_price, exit_at = simulate_outcomes(
+            self.prices, columns["entry_at"], columns["direction"],
+            columns["take_profit"], columns["stop_loss"], self.horizon,
+        )
+        fill = self.prices[columns["entry_at"]]
+        pnl = columns["direction"] * (exit_price - fill)
+        risk = np.abs(fill - columns["stop_loss"])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r_multiple = np.where(risk > 0, pnl / risk, np.nan)
+        columns.update(fill=fill, outcome=outcome, exit_price=exit_price, exit_at=exit_at,
+                       pnl=pnl, r_multiple=r_multiple)
+        return columns
+
+    def run(self, detectors=True, analyzers=(), analyzer_stride=1, jobs=1):
+        signals = Signals()
+        if detectors:
+            self.detector_signals(signals, jobs)
+        if analyzers:
+            self.analyzer_signals(analyzers, analyzer_stride, signals)
+        return self.resolve(signals)
+
+
+def stats(results, mask=None):
+    """Hit rate (TP share), win rate, expectancy and drawdown of the selected trades.
+
+    Expectancy is the mean P&L per trade in price units (and in R, P&L over
+    initial risk). Drawdown is the deepest peak-to-trough fall of cumulative
+    P&L with trades taken in entry order, each trade sized at one unit.
+    """
+    if mask is None:
+        mask = np.ones(len(results["entry_at"]), dtype=bool)
+    order = np.argsort(results["entry_at"][mask], kind="stable")
+    pnl = results["pnl"][mask][order]
+    outcome = results["outcome"][mask]
+    r_multiple = results["r_multiple"][mask]
+    equity = np.concatenate([[0.0], np.cumsum(pnl)])
+    finite_r = r_multiple[np.isfinite(r_multiple)]
+    count = len(pnl)
+    return {
+        "signals": count,
+        "tp": int((outcome == TP).sum()),
+        "sl": int((outcome == SL).sum()),
+        "timeout": int((outcome == TIMEOUT).sum()),
+        "hit_rate": float((outcome == TP).mean()) if count else 0.0,
+        "win_rate": float((pnl > 0).mean()) if count else 0.0,
+        "expectancy": float(pnl.mean()) if count else 0.0,
+        "expectancy_r": float(finite_r.mean()) if len(finite_r) else float("nan"),
+        "total": float(equity[-1]),
+        "max_drawdown": float((np.maximum.accumulate(equity) - equity).max()),
+    }
+
+
+def summarize(results, by="source"):
+    """One `stats` row per source (or pattern)."""
+    keys = results[by]
+    return [dict({by: key}, **stats(results, keys == key)) for key in sorted(set(keys.tolist()))]
+
+
+def format_table(rows, by="source"):
+    header = f"{by:<28} {'signals':>8} {'tp':>6} {'sl':>6} {'t/o':>6} {'hit':>6} {'win':>6} {'exp':>9} {'exp R':>7} {'total':>10} {'max dd':>10}"
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            f"{str(row[by])[:28]:<28} {row['signals']:>8} {row['tp']:>6} {row['sl']:>6} {row['timeout']:>6} "
+            f"{row['hit_rate']:>6.1%} {row['win_rate']:>6.1%} {row['expectancy']:>9.4f} {row['expectancy_r']:>7.2f} "
+            f"{row['total']:>10.2f} {row['max_drawdown']:>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("archive", help="journal directory, .npz, .npy or .csv")
+    parser.add_argument("--symbol")
+    parser.add_argument("--window", type=int, default=1000)
+    parser.add_argument("--stride", type=int, default=10)
+    parser.add_argument("--horizon", type=int, default=300)
+    parser.add_argument("--cooldown", type=int, default=300)
+    parser.add_argument("--no-detectors", action="store_true")
+    parser.add_argument("--analyzers", nargs="*", choices=ANALYZERS,
+                        help="also replay these analyzers (all when given without names)")
+    parser.add_argument("--analyzer-stride", type=int, default=1)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes for the detector scan")
+    parser.add_argument("--by", choices=("source", "pattern"), default="source")
+    parser.add_argument("--json", help="write the summary rows to this file")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    epochs, prices = load_ticks(args.archive, args.symbol)
+    backtest = Backtest(epochs, prices, window=args.window, stride=args.stride,
+                        horizon=args.horizon, cooldown=args.cooldown)
+    analyzers = ANALYZERS if args.analyzers == [] else (args.analyzers or ())
+    results = backtest.run(not args.no_detectors, analyzers, args.analyzer_stride, args.jobs)
+    rows = summarize(results, args.by)
+
+    print(format_table(rows, args.by))
+    print(f"{len(prices)} ticks, {len(results['entry_at'])} signals in {time.perf_counter() - started:.1f}s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
@@ -0,0 +1,223 @@
+import numpy as np
+
+# Detector names in the order PatternDetector.run_detection has always
+# tried them; the first one that fires wins in single-signal mode.
+DETECTORS = (
+    "head_and_shoulders",
+    "inverse_head_and_shoulders",
+    "double_top",
+    "double_bottom",
+    "triple_top",
+    "triple_bottom",
+    "falling_wedge",
+    "rising_wedge",
+    "flag",
+    "pennant",
+    "ascending_triangle",
+    "descending_triangle",
+    "diamond",
+    "cup_and_handle",
+    "rectangle",
+    "broadening_triangle",
+    "symmetrical_triangle",
+)
+
+
+def _signal(pattern, entry, stop, target, direction):
+    return {
+        "pattern": pattern,
+        "entry_price": float(entry),
+        "stop_loss": float(stop),
+        "take_profit": float(target),
+        "direction": direction,
+    }
+
+
+class Features:
+    """Everything the detectors read, computed once per cycle.
+
+    `p`/`t` hold the last (up to) `rectangle_window` peak/trough values and
+    `pi`/`ti` their window indices; the scalar fields are derived from them
+    and from the price window.
+    """
+
+    __slots__ = (
+        "n", "np", "nt", "price", "p", "t", "pi", "ti",
+        "peak_slope", "trough_slope", "change20", "cup", "cup_low",
+        "peak_mean", "peak_std", "trough_mean", "trough_std",
+    )
+
+
+class DetectionEngine:
+    """Evaluate every PatternDetector.detect_* predicate from shared features.
+
+    `compute` slices the extrema and price window once; `evaluate` turns
+    the features into one boolean vector (one entry per detector) and only
+    builds signal dicts for the detectors that fired. Each (fired, signal)
+    pair is identical to what the corresponding detect_* method returns.
+    """
+
+    def __init__(self, hs_tolerance=0.05, level_tolerance=0.03, flag_tolerance=0.2,
+                 rectangle_std_ratio=0.03, rectangle_window=10, breakout_margin=0.01):
+        self.hs_tolerance = hs_tolerance
+        self.level_tolerance = level_tolerance
+        self.flag_tolerance = flag_tolerance
+        self.rectangle_std_ratio = rectangle_std_ratio
+        self.rectangle_window = rectangle_window
+        self.breakout_margin = breakout_margin
+
+    def compute(self, peak_idx, peak_val, trough_idx, trough_val, prices):
+        k = max(4, self.rectangle_window)
+        f = Features()
+        f.n = len(prices)
+        f.np = len(peak_val)
+        f.nt = len(trough_val)
+        f.price = prices[-1] if f.n else np.nan
+        f.p = peak_val[-k:]
+        f.t = trough_val[-k:]
+        f.pi = peak_idx[-3:]
+        f.ti = trough_idx[-3:]
+
+        f.peak_slope = f.trough_slope = np.nan
+        if f.np >= 3 and f.nt >= 3:
+            f.peak_slope = (f.p[-1] - f.p[-3]) / (f.pi[-1] - f.pi[-3])
+            f.trough_slope = (f.t[-1] - f.t[-3]) / (f.ti[-1] - f.ti[-3])
+
+        f.change20 = prices[-1] - prices[-20] if f.n >= 20 else np.nan
+
+        f.cup = False
+        f.cup_low = np.nan
+        if f.n >= 30:
+            window = prices[-30:]
+            center = np.mean(window[12:18])
+            f.cup = np.mean(window[:15]) > center and np.mean(window[15:]) > center
+            f.cup_low = min(window[-10:])
+
+        f.peak_mean = f.peak_std = f.trough_mean = f.trough_std = np.nan
+        if f.np >= 2 and f.nt >= 2:
+            rp = f.p[-self.rectangle_window:]
+            rt = f.t[-self.rectangle_window:]
+            f.peak_std, f.peak_mean = np.std(rp), np.mean(rp)
+            f.trough_std, f.trough_mean = np.std(rt), np.mean(rt)
+        return f
+
+    def conditions(self, f):
+        """Boolean vector, aligned with DETECTORS, of which detectors fire."""
+        p, t, price = f.p, f.t, f.price
+        hs, lvl = self.hs_tolerance, self.level_tolerance
+        np_, nt = f.np, f.nt
+        ps, ts = f.peak_slope, f.trough_slope
+
+        def level(a, b, tol):
+            return abs(a - b) / a < tol
+
+        flag = False
+        if f.n >= 20 and np_ >= 2 and nt >= 2:
+            peak_step = p[-1] - p[-2]
+            trough_step = t[-1] - t[-2]
+            flag = peak_step != 0 and abs(peak_step - trough_step) / abs(peak_step) < self.flag_tolerance
+
+        rectangle = (np_ >= 2 and nt >= 2
+                     and f.peak_std / f.peak_mean < self.rectangle_std_ratio
+                     and f.trough_std / f.trough_mean < self.rectangle_std_ratio
+                     and (price > f.peak_mean * (1 + self.breakout_margin)
+                          or price < f.trough_mean * (1 - self.breakout_margin)))
+
+        diamond = False
+        if np_ >= 4 and nt >= 4:
+            widths = p[-3:] - t[-3:]
+            diamond = (widths[0] < widths[1] and widths[1] > widths[2]
+                       and (price < t[-1] or price > p[-1]))
+
+        three = np_ >= 3 and nt >= 3
+        return np.array([
+            np_ >= 3 and nt >= 2 and p[-2] > p[-3] and p[-2] > p[-1] and level(t[-2], t[-1], hs),
+            nt >= 3 and np_ >= 2 and t[-2] < t[-3] and t[-2] < t[-1] and level(p[-2], p[-1], hs),
+            np_ >= 2 and nt >= 1 and level(p[-2], p[-1], lvl),
+            nt >= 2 and np_ >= 1 and level(t[-2], t[-1], lvl),
+            np_ >= 3 and nt >= 2 and level(p[-3], p[-2], lvl) and level(p[-2], p[-1], lvl),
+            nt >= 3 and np_ >= 2 and level(t[-3], t[-2], lvl) and level(t[-2], t[-1], lvl),
+            three and ps < 0 and ts < 0 and ps < ts,
+            three and ps > 0 and ts > 0 and ps < ts,
+            flag,
+            f.n >= 20 and three and ps < 0 and ts > 0,
+            np_ >= 2 and nt >= 3 and level(p[-2], p[-1], lvl) and t[-3] < t[-2] < t[-1],
+            np_ >= 3 and nt >= 2 and level(t[-2], t[-1], lvl) and p[-3] > p[-2] > p[-1],
+            diamond,
+            f.n >= 30 and np_ >= 3 and f.cup and p[-1] < p[-2],
+            rectangle,
+            three and p[-3] < p[-2] < p[-1] and t[-3] > t[-2] > t[-1] and (price > p[-1] or price < t[-1]),
+            three and ps < 0 and ts > 0 and (price > p[-1] or price < t[-1]),
+        ], dtype=bool)
+
+    def _build(self, name, f):
+        p, t, price = f.p, f.t, f.price
+        if name == "head_and_shoulders":
+            entry = t[-1]
+            return _signal("Head and Shoulders", entry, p[-1], entry - (p[-1] - entry), "Bearish")
+        if name == "inverse_head_and_shoulders":
+            entry = p[-1]
+            return _signal("Inverse Head and Shoulders", entry, t[-1], entry + (entry - t[-1]), "Bullish")
+        if name == "double_top":
+            entry, stop = t[-1], max(p[-2:])
+            return _signal("Double Top", entry, stop, entry - (stop - entry), "Bearish")
+        if name == "double_bottom":
+            entry, stop = p[-1], min(t[-2:])
+            return _signal("Double Bottom", entry, stop, entry + (entry - stop), "Bullish")
+        if name == "triple_top":
+            entry, stop = t[-1], max(p[-3:])
+            return _signal("Triple Top", entry, stop, entry - (stop - entry), "Bearish")
+        if name == "triple_bottom":
+            entry, stop = p[-1], min(t[-3:])
+            return _signal("Triple Bottom", entry, stop, entry + (entry - stop), "Bullish")
+        if name == "falling_wedge":
+            stop = min(t[-3:])
+            return _signal("Falling Wedge", price, stop, price + 2 * (price - stop), "Bullish")
+        if name == "rising_wedge":
+            stop = max(p[-3:])
+            return _signal("Rising Wedge", price, stop, price - 2 * (stop - price), "Bearish")
+        if name == "flag":
+            if f.change20 > 0:
+                return _signal("Bullish Flag", price, min(t[-2:]), price + abs(f.change20), "Bullish")
+            return _signal("Bearish Flag", price, max(p[-2:]), price - abs(f.change20), "Bearish")
+        if name == "pennant":
+            if f.change20 > 0:
+                return _signal("Bullish Pennant", price, min(t[-3:]), price + abs(f.change20), "Bullish")
+            return _signal("Bearish Pennant", price, max(p[-3:]), price - abs(f.change20), "Bearish")
+        if name == "ascending_triangle":
+            entry = p[-1]
+            return _signal("Ascending Triangle", entry, t[-1], entry + (entry - t[-1]), "Bullish")
+        if name == "descending_triangle":
+            entry = t[-1]
+            return _signal("Descending Triangle", entry, p[-1], entry - (p[-1] - entry), "Bearish")
+        if name == "diamond":
+            middle = p[-2] - t[-2]
+            if price < t[-1]:
+                return _signal("Diamond (Bearish)", price, p[-1], price - middle, "Bearish")
+            return _signal("Diamond (Bullish)", price, t[-1], price + middle, "Bullish")
+        if name == "cup_and_handle":
+            return _signal("Cup and Handle", price, f.cup_low, price + (price - f.cup_low) * 2, "Bullish")
+        if name == "rectangle":
+            height = f.peak_mean - f.trough_mean
+            if price > f.peak_mean * (1 + self.breakout_margin):
+                return _signal("Rectangle (Bullish Breakout)", price, f.trough_mean, price + height, "Bullish")
+            return _signal("Rectangle (Bearish Breakout)", price, f.peak_mean, price - height, "Bearish")
+        if name == "broadening_triangle":
+            if price > p[-1]:
+                return _signal("Broadening Triangle (Bullish)", price, t[-1], price + (price - t[-1]), "Bullish")
+            return _signal("Broadening Triangle (Bearish)", price, p[-1], price - (p[-1] - price), "Bearish")
+        if name == "symmetrical_triangle":
+            middle = (p[-1] + t[-1]) / 2
+            if price > p[-1]:
+                return _signal("Symmetrical Triangle (Bullish)", price, middle, price + (price - middle), "Bullish")
+            return _signal("Symmetrical Triangle (Bearish)", price, middle, price - (middle - price), "Bearish")
+        raise KeyError(name)
+
+    def evaluate(self, f):
+        """Return [(detector, signal)] for every detector that fires, in DETECTORS order."""
+        fired = self.conditions(f)
+        return [(DETECTORS[i], self._build(DETECTORS[i], f)) for i in np.flatnonzero(fired)]
+
+    def detect(self, peak_idx, peak_val, trough_idx, trough_val, prices):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.evaluate(self.compute(peak_idx, peak_val, trough_idx, trough_val, prices))
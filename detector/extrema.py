@@ -0,0 +1,176 @@
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def relative_extrema(prices, order):
+    """Boolean peak/trough masks with scipy `argrelextrema` semantics.
+
+    Matches `argrelextrema(prices, np.greater_equal / np.less_equal,
+    order=order)` with its default `mode='clip'`: neighbours past either
+    end are clamped to the first/last point.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if not len(prices):
+        return np.zeros(0, dtype=bool), np.zeros(0, dtype=bool)
+    # Clamped neighbours are the same as padding with the edge values
+    padded = np.concatenate([np.full(order, prices[0]), prices, np.full(order, prices[-1])])
+    windows = sliding_window_view(padded, 2 * order + 1)
+    return prices >= windows.max(axis=1), prices <= windows.min(axis=1)
+
+
+class _AppendArray:
+    """Append-only numpy array with amortised O(1) appends and prefix drops."""
+
+    def __init__(self, dtype, capacity=64):
+        self.data = np.empty(capacity, dtype=dtype)
+        self.start = 0
+        self.end = 0
+
+    def append(self, value):
+        if self.end == len(self.data):
+            live = self.data[self.start:self.end]
+            grown = np.empty(max(64, 2 * len(live)), dtype=self.data.dtype)
+            grown[:len(live)] = live
+            self.data, self.start, self.end = grown, 0, len(live)
+        self.data[self.end] = value
+        self.end += 1
+
+    def drop(self, count):
+        self.start += count
+
+    def view(self):
+        return self.data[self.start:self.end]
+
+
+class IncrementalExtrema:
+    """Track peaks and troughs tick by tick instead of rescanning the series.
+
+    A point is confirmed once `order` newer points exist, which costs
+    O(order) per appended price. Confirmed extrema are kept in append-only
+    arrays indexed by absolute tick number (the first appended price is 0).
+    `extrema` combines them with a re-check of the first and last `order`
+    points of the requested window, where clipping makes the result depend
+    on the window edges, so the output is identical to running
+    `argrelextrema(window, ..., order=order)` on that window.
+    """
+
+    def __init__(self, order=5):
+        self.order = order
+        self.count = 0
+        self._recent = deque(maxlen=2 * order + 1)
+        self._peak_idx = _AppendArray(np.int64)
+        self._peak_val = _AppendArray(np.float64)
+        self._trough_idx = _AppendArray(np.int64)
+        self._trough_val = _AppendArray(np.float64)
+
+    @classmethod
+    def from_prices(cls, prices, order=5):
+        """Engine that has already seen `prices`, built in one vectorized pass."""
+        prices = np.asarray(prices, dtype=np.float64)
+        engine = cls(order)
+        peaks, troughs = relative_extrema(prices, order)
+        # Only points with `order` newer neighbours are confirmed
+        confirmed = max(0, len(prices) - order)
+        for mask, indices, values in (
+            (peaks, engine._peak_idx, engine._peak_val),
+            (troughs, engine._trough_idx, engine._trough_val),
+        ):
+            idx = np.flatnonzero(mask[:confirmed])
+            indices.data, indices.end = idx.astype(np.int64), len(idx)
+            values.data, values.end = prices[idx], len(idx)
+        engine._recent.extend(prices[-(2 * order + 1):].tolist())
+        engine.count = len(prices)
+        return engine
+
+    def reset(self):
+        self.__init__(self.order)
+
+    def append(self, price):
+        self._recent.append(price)
+        self.count += 1
+
+        center = self.count - 1 - self.order
+        if center < 0:
+            return
+        recent = list(self._recent)
+        i = center - (self.count - len(recent))
+        value = recent[i]
+        # Left neighbours clamp to the first tick ever seen, which only
+        # matters for the first `order` points
+        neighbours = recent[max(0, i - self.order):i] + recent[i + 1:]
+        if all(value >= v for v in neighbours):
+            self._peak_idx.append(center)
+            self._peak_val.append(value)
+        if all(value <= v for v in neighbours):
+            self._trough_idx.append(center)
+            self._trough_val.append(value)
+
+    def extend(self, prices):
+        for price in prices:
+            self.append(float(price))
+
+    def _confirmed(self, indices, values, low, high):
+        view = indices.view()
+        first, last = np.searchsorted(view, [low, high], side="left")
+        return view[first:last], values.view()[first:last]
+
+    def _discard_before(self, start):
+        for indices, values in ((self._peak_idx, self._peak_val), (self._trough_idx, self._trough_val)):
+            drop = int(np.searchsorted(indices.view(), start, side="left"))
+            indices.drop(drop)
+            values.drop(drop)
+
+    def extrema(self, prices, start=None):
+        """Return (peak_idx, peak_values, trough_idx, trough_values) for a window.
+
+        `prices` must be the most recent `len(prices)` appended prices and
+        `start` the absolute index of `prices[0]`; indices are returned
+        relative to the window. Windows are expected to move forward only:
+        confirmed extrema before `start` are discarded.
+        """
+        n = len(prices)
+        if start is None:
+            start = self.count - n
+        if start + n != self.count:
+            raise ValueError("window must end at the most recent price")
+
+        self._discard_before(start)
+        return self.window(prices, start)
+
+    def window(self, prices, start):
+        """Like `extrema` for any window of already appended prices.
+
+        The window may end before the latest price and nothing is
+        discarded, so windows can be queried in any order (e.g. when
+        replaying an archive built with `from_prices`).
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        n = len(prices)
+        w = self.order
+        if start < 0 or start + n > self.count:
+            raise ValueError("window extends past the appended prices")
+
+        if n <= 4 * w + 2:
+            peaks, troughs = relative_extrema(prices, w)
+            p = np.flatnonzero(peaks)
+            t = np.flatnonzero(troughs)
+            return p, prices[p], t, prices[t]
+
+        head_peaks, head_troughs = relative_extrema(prices[:2 * w + 1], w)
+        tail_peaks, tail_troughs = relative_extrema(prices[n - 2 * w - 1:], w)
+        tail_offset = n - w
+
+        result = []
+        for head, tail, indices, values in (
+            (head_peaks, tail_peaks, self._peak_idx, self._peak_val),
+            (head_troughs, tail_troughs, self._trough_idx, self._trough_val),
+        ):
+            head_idx = np.flatnonzero(head[:w])
+            tail_idx = np.flatnonzero(tail[-w:]) + tail_offset
+            mid_idx, mid_val = self._confirmed(indices, values, start + w, start + n - w)
+            idx = np.concatenate([head_idx, mid_idx - start, tail_idx])
+            val = np.concatenate([prices[head_idx], mid_val, prices[tail_idx]])
+            result.extend([idx, val])
+        return tuple(result)
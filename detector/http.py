@@ -0,0 +1,60 @@
+import aiohttp
+
+
+class ConnectionStats:
+    """Count requests, new connections and pooled-connection reuse for a session."""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.dns_lookups = 0
+        self.dns_cache_hits = 0
+
+    def trace_config(self):
+        config = aiohttp.TraceConfig()
+        config.on_request_start.append(self._on_request_start)
+        config.on_connection_create_end.append(self._on_connection_create_end)
+        config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        config.on_dns_resolvehost_end.append(self._on_dns_resolvehost_end)
+        config.on_dns_cache_hit.append(self._on_dns_cache_hit)
+        return config
+
+    async def _on_request_start(self, session, context, params):
+        self.requests += 1
+
+    async def _on_connection_create_end(self, session, context, params):
+        self.connections_created += 1
+
+    async def _on_connection_reuseconn(self, session, context, params):
+        self.connections_reused += 1
+
+    async def _on_dns_resolvehost_end(self, session, context, params):
+        self.dns_lookups += 1
+
+    async def _on_dns_cache_hit(self, session, context, params):
+        self.dns_cache_hits += 1
+
+    def as_dict(self):
+        opened = self.connections_created + self.connections_reused
+        return {
+            "requests": self.requests,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": self.connections_reused / opened if opened else 0.0,
+            "dns_lookups": self.dns_lookups,
+            "dns_cache_hits": self.dns_cache_hits,
+        }
+
+
+def create_session(stats=None, limit=10, keepalive=60, dns_ttl=300, connect_timeout=10, total_timeout=30):
+    """Create a long-lived pooled session with keep-alive, DNS caching and timeouts."""
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        keepalive_timeout=keepalive,
+        ttl_dns_cache=dns_ttl,
+        enable_cleanup_closed=True,
+    )
+    timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+    trace_configs = [stats.trace_config()] if stats is not None else None
+    return aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=trace_configs)
@@ -0,0 +1,164 @@
+import heapq
+from bisect import bisect_left, insort
+
+from .backtest import OUTCOMES, SL, TIMEOUT, TP
+
+
+class _Levels:
+    """Price levels of open signals that trigger once the price reaches them.
+
+    `above` levels trigger at price >= level, the others at price <= level.
+    Keys are kept sorted so that triggered levels always sit at the end of
+    the list (above levels are stored negated): finding them is one bisect
+    and removing them a slice deletion, O(log n + k).
+    """
+
+    def __init__(self, above):
+        self.sign = -1.0 if above else 1.0
+        self.keys = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, level, seq, outcome):
+        insort(self.keys, (self.sign * level, seq, outcome))
+
+    def pop_triggered(self, price):
+        """Remove and return the (seq, outcome) of every level `price` has reached."""
+        at = bisect_left(self.keys, (self.sign * price,))
+        triggered = self.keys[at:]
+        del self.keys[at:]
+        return [(seq, outcome) for _, seq, outcome in triggered]
+
+    def rebuild(self, live):
+        self.keys = [key for key in self.keys if key[1] in live]
+
+
+class _SymbolBook:
+    __slots__ = ("above", "below")
+
+    def __init__(self):
+        self.above = _Levels(above=True)
+        self.below = _Levels(above=False)
+
+
+class OutcomeTracker:
+    """Resolve open signals against the tick stream as their TP or SL is hit.
+
+    Each symbol keeps two sorted indexes: levels hit from below (bullish
+    take-profits, bearish stop-losses) and levels hit from above (bullish
+    stop-losses, bearish take-profits). A signal sits in both; whichever
+    index reaches it first resolves it and its entry in the other index is
+    left behind and skipped when it surfaces (lazy deletion), until dead
+    entries outnumber live ones and the indexes are compacted. A tick that
+    reaches both levels of a signal counts as a stop-loss, as in the
+    backtest. Signals older than `max_age` seconds (if set) time out at the
+    latest price.
+
+    Resolved outcomes queue up in `pending` ({key: record}) until `flush`.
+    """
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age
+        self.books = {}
+        self.open = {}  # seq -> (key, symbol, signal, opened_ms)
+        self.pending = {}
+        self.last_price = {}
+        self.resolved = 0
+        self._dead = 0
+        self._seq = 0
+        self._expiry = []  # heap of (expires_ms, seq)
+
+    def __len__(self):
+        return len(self.open)
+
+    def has_open(self):
+        """Whether any signal is still waiting for its TP, SL or timeout."""
+        return bool(self.open)
+
+    def add(self, key, signal, symbol, time_ms):
+        """Start tracking `signal` (a dict with entry_price, stop_loss, take_profit, direction)."""
+        seq = self._seq
+        self._seq += 1
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = _SymbolBook()
+        take_profit, stop_loss = float(signal["take_profit"]), float(signal["stop_loss"])
+        if signal["direction"] == "Bullish":
+            book.above.add(take_profit, seq, TP)
+            book.below.add(stop_loss, seq, SL)
+        else:
+            book.below.add(take_profit, seq, TP)
+            book.above.add(stop_loss, seq, SL)
+        self.open[seq] = (key, symbol, signal, time_ms)
+        if self.max_age is not None:
+            heapq.heappush(self._expiry, (time_ms + self.max_age * 1000, seq))
+        return seq
+
+    def update(self, symbol, time_ms, price):
+        """Feed one tick; returns the keys of the signals it resolved."""
+        self.last_price[symbol] = price
+        resolved = []
+        book = self.books.get(symbol)
+        if book is not None and self.open:
+            hits = {}
+            for seq, outcome in book.above.pop_triggered(price) + book.below.pop_triggered(price):
+                if seq not in self.open:
+                    self._dead -= 1  # the other side already resolved it
+                elif seq in hits:
+                    # Both levels reached by one tick: stop-loss, and no entry is left behind
+                    hits[seq] = SL
+                    self._dead -= 1
+                else:
+                    hits[seq] = outcome
+            for seq, outcome in hits.items():
+                resolved.append(self._resolve(seq, outcome, time_ms, price))
+        if self._expiry:
+            resolved.extend(self._expire(time_ms))
+        if self._dead > max(64, len(self.open)):
+            self._compact()
+        return resolved
+
+    def _expire(self, time_ms):
+        resolved = []
+        while self._expiry and self._expiry[0][0] <= time_ms:
+            _, seq = heapq.heappop(self._expiry)
+            entry = self.open.get(seq)
+            if entry is not None:
+                # Both index entries are now dead
+                self._dead += 1
+                resolved.append(self._resolve(seq, TIMEOUT, time_ms, self.last_price.get(entry[1])))
+        return resolved
+
+    def _resolve(self, seq, outcome, time_ms, price):
+        key, symbol, signal, opened_ms = self.open.pop(seq)
+        self._dead += 1  # its entry in the other index
+        entry = float(signal["entry_price"])
+        if outcome == TP:
+            exit_price = float(signal["take_profit"])
+        elif outcome == SL:
+            exit_price = float(signal["stop_loss"])
+        else:
+            exit_price = entry if price is None else float(price)
+        side = 1.0 if signal["direction"] == "Bullish" else -1.0
+        self.pending[key] = {
+            "outcome": OUTCOMES[outcome],
+            "exit_price": exit_price,
+            "exit_time": int(time_ms),
+            "pnl": side * (exit_price - entry),
+            "duration": (int(time_ms) - opened_ms) / 1000,
+        }
+        self.resolved += 1
+        return key
+
+    def _compact(self):
+        for book in self.books.values():
+            book.above.rebuild(self.open)
+            book.below.rebuild(self.open)
+        self._dead = 0
+
+    def flush(self):
+        """Return the pending outcomes as a multi-path PATCH body and clear them."""
+        payload = {f"{key}/outcome": record for key, record in self.pending.items()}
+        self.pending = {}
+        return payload
@@ -0,0 +1,295 @@
+"""Run pattern detectors for many symbols across worker processes.
+
+The supervisor shards symbols over N worker processes with a consistent
+hash ring, so adding or losing a worker only moves the symbols that hashed
+to it. Each worker runs one asyncio loop hosting a PatternDetector per
+symbol over one pooled HTTP session. Symbols listed with `--isolate` get a
+worker process of their own, so detection on a busy symbol never delays
+the others. A crashed worker's symbols move to the survivors at once; the
+worker is restarted with backoff and then takes its share back.
+
+    python -m detector.shard --symbols R_10,R_25,R_50,R_75 --workers 2
+    python -m detector.shard --symbols R_10,R_25,R_50 --isolate R_100 --polling
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring of worker names, `replicas` virtual nodes each."""
+
+    def __init__(self, workers=(), replicas=100):
+        self.replicas = replicas
+        self._points = []  # sorted (hash, worker)
+        for worker in workers:
+            self.add(worker)
+
+    def __len__(self):
+        return len(self.workers)
+
+    def __contains__(self, worker):
+        return worker in self.workers
+
+    @property
+    def workers(self):
+        return sorted({worker for _, worker in self._points})
+
+    def add(self, worker):
+        if worker in self:
+            return
+        points = [(_hash(f"{worker}#{i}"), worker) for i in range(self.replicas)]
+        self._points = sorted(self._points + points)
+
+    def remove(self, worker):
+        self._points = [point for point in self._points if point[1] != worker]
+
+    def lookup(self, key):
+        """Worker owning `key`: the first virtual node clockwise from its hash."""
+        if not self._points:
+            raise LookupError("no workers in the ring")
+        i = bisect_left(self._points, (_hash(key),))
+        return self._points[i % len(self._points)][1]
+
+    def assign(self, keys):
+        """{worker: [keys]} for every worker in the ring."""
+        shards = {worker: [] for worker in self.workers}
+        for key in keys:
+            shards[self.lookup(key)].append(key)
+        return shards
+
+
+async def _run_detector(detector, streaming):
+    while True:
+        try:
+            if streaming:
+                await detector.run_streaming()
+            else:
+                await detector.run_polling()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"{detector.symbol}: detector stopped: {str(e)}")
+            await asyncio.sleep(10)
+
+
+async def _serve(worker, commands, streaming, options):
+    from pattern_detector import PatternDetector
+
+    from .http import ConnectionStats, create_session
+
+    loop = asyncio.get_running_loop()
+    parent = os.getppid()
+    stats = ConnectionStats()
+    session = create_session(stats)
+    tasks = {}
+    try:
+        while True:
+            try:
+                command, *args = await loop.run_in_executor(None, commands.get, True, 1.0)
+            except queue.Empty:
+                if os.getppid() != parent:
+                    logger.warning(f"{worker}: supervisor is gone, exiting")
+                    break
+                continue
+            if command == "stop":
+                break
+
+            symbols = args[0]
+            for symbol in set(tasks) - set(symbols):
+                tasks.pop(symbol).cancel()
+            for symbol in symbols:
+                if symbol not in tasks:
+                    detector = PatternDetector(symbol=symbol, **options)
+                    detector.session = session
+                    tasks[symbol] = asyncio.ensure_future(_run_detector(detector, streaming))
+            logger.info(f"{worker} hosting {', '.join(sorted(tasks)) or 'no symbols'}")
+    finally:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        await session.close()
+        logger.info(f"{worker} connection stats: {stats.as_dict()}")
+
+
+def _worker_main(worker, commands, streaming, options):
+    try:
+        asyncio.run(_serve(worker, commands, streaming, options))
+    except KeyboardInterrupt:
+        pass
+
+
+class Supervisor:
+    """Keep `symbols` spread over worker processes and restart crashed workers.
+
+    Shared workers are named `worker-<n>` and sit on the hash ring;
+    isolated symbols each get a worker named `isolated-<symbol>` outside
+    it. While an isolated worker is down its symbol is hosted by the ring.
+    `options` are extra PatternDetector keyword arguments.
+    """
+
+    def __init__(self, symbols, workers=2, isolate=(), streaming=True, options=None, replicas=100,
+                 check_interval=1.0, restart_delay=1.0, max_restart_delay=60.0, context=None):
+        self.isolate = list(dict.fromkeys(isolate))
+        self.symbols = list(dict.fromkeys(list(symbols) + self.isolate))
+        self.initial_workers = workers
+        self.streaming = streaming
+        self.options = options or {}
+        self.ring = HashRing(replicas=replicas)
+        self.check_interval = check_interval
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.context = context or multiprocessing.get_context()
+
+        self.processes = {}  # worker -> (process, command queue, started at)
+        self.assignment = {}  # worker -> tuple of symbols it was told to host
+        self._restarts = {}  # worker -> (restart at, delay)
+        self._delays = {}
+        self._next = 0
+
+    def start(self):
+        for _ in range(self.initial_workers):
+            self.add_worker(rebalance=False)
+        for symbol in self.isolate:
+            self._spawn(f"isolated-{symbol}")
+        self.rebalance()
+
+    def _spawn(self, worker):
+        commands = self.context.Queue()
+        process = self.context.Process(target=_worker_main, name=f"detector-{worker}", daemon=True,
+                                       args=(worker, commands, self.streaming, self.options))
+        process.start()
+        self.processes[worker] = (process, commands, time.monotonic())
+        self.assignment[worker] = ()
+        if not worker.startswith("isolated-"):
+            self.ring.add(worker)
+        logger.info(f"Started {worker} (pid {process.pid})")
+
+    def add_worker(self, rebalance=True):
+        worker = f"worker-{self._next}"
+        self._next += 1
+        self._spawn(worker)
+        if rebalance:
+            self.rebalance()
+        return worker
+
+    def remove_worker(self, worker):
+        """Move `worker`'s symbols to the others, then stop it."""
+        self.ring.remove(worker)
+        self._restarts.pop(worker, None)
+        process, commands, _ = self.processes.pop(worker)
+        self.assignment.pop(worker, None)
+        self.rebalance()
+        commands.put(("stop",))
+        self._join(process)
+
+    def plan(self):
+        """{worker: [symbols]} for the workers currently running."""
+        isolated = {symbol: f"isolated-{symbol}" for symbol in self.isolate
+                    if f"isolated-{symbol}" in self.processes}
+        shared = [symbol for symbol in self.symbols if symbol not in isolated]
+        plan = self.ring.assign(shared) if len(self.ring) else {}
+        if shared and not plan:
+            logger.warning(f"No shared workers running; {len(shared)} symbols unassigned")
+        for symbol, worker in isolated.items():
+            plan[worker] = [symbol]
+        return plan
+
+    def rebalance(self):
+        """Send every worker whose symbol set changed its new set."""
+        moved = 0
+        for worker, symbols in self.plan().items():
+            symbols = tuple(symbols)
+            if symbols == self.assignment.get(worker):
+                continue
+            moved += len(set(symbols) - set(self.assignment.get(worker, ())))
+            self.processes[worker][1].put(("assign", list(symbols)))
+            self.assignment[worker] = symbols
+        if moved:
+            logger.info(f"Rebalanced: {moved} symbol(s) assigned across {len(self.processes)} workers")
+        return moved
+
+    def check(self):
+        """Reap crashed workers (rebalancing at once) and restart those that are due."""
+        now = time.monotonic()
+        changed = False
+        for worker, (process, _, started) in list(self.processes.items()):
+            if process.is_alive():
+                continue
+            # Workers that ran a while start over with the shortest delay
+            delay = self._delays.get(worker, self.restart_delay)
+            if now - started > self.max_restart_delay:
+                delay = self.restart_delay
+            logger.error(f"{worker} exited with code {process.exitcode}; restarting in {delay:.1f}s")
+            del self.processes[worker]
+            self.assignment.pop(worker, None)
+            self.ring.remove(worker)
+            self._restarts[worker] = (now + delay, delay)
+            changed = True
+
+        for worker, (restart_at, delay) in list(self._restarts.items()):
+            if now >= restart_at:
+                del self._restarts[worker]
+                self._delays[worker] = min(2 * delay, self.max_restart_delay)
+                self._spawn(worker)
+                changed = True
+
+        if changed:
+            self.rebalance()
+
+    def run(self):
+        self.start()
+        try:
+            while True:
+                self.check()
+                time.sleep(self.check_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    @staticmethod
+    def _join(process, timeout=10):
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+    def stop(self):
+        for _, commands, _ in self.processes.values():
+            commands.put(("stop",))
+        for process, _, _ in self.processes.values():
+            self._join(process)
+        self.processes.clear()
+        self.assignment.clear()
+        self._restarts.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", required=True, help="comma-separated symbols")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--isolate", default="", help="comma-separated symbols that get a worker each")
+    parser.add_argument("--polling", action="store_true", help="poll the tick nodes instead of streaming")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s")
+    Supervisor(
+        [symbol for symbol in args.symbols.split(",") if symbol],
+        workers=args.workers,
+        isolate=[symbol for symbol in args.isolate.split(",") if symbol],
+        streaming=not args.polling,
+    ).run()
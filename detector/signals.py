@@ -0,0 +1,85 @@
+from .engine import DETECTORS
+
+# Detectors that describe the same setup share a cooldown
+FAMILIES = {
+    "head_and_shoulders": "head_and_shoulders",
+    "inverse_head_and_shoulders": "head_and_shoulders",
+    "double_top": "double",
+    "double_bottom": "double",
+    "triple_top": "triple",
+    "triple_bottom": "triple",
+    "falling_wedge": "wedge",
+    "rising_wedge": "wedge",
+    "flag": "flag",
+    "pennant": "pennant",
+    "ascending_triangle": "triangle",
+    "descending_triangle": "triangle",
+    "symmetrical_triangle": "triangle",
+    "broadening_triangle": "triangle",
+    "diamond": "diamond",
+    "cup_and_handle": "cup_and_handle",
+    "rectangle": "rectangle",
+}
+assert set(FAMILIES) == set(DETECTORS)
+
+
+def reward_risk(detector, signal):
+    """Default score: take-profit distance over stop-loss distance."""
+    risk = abs(signal["entry_price"] - signal["stop_loss"])
+    reward = abs(signal["take_profit"] - signal["entry_price"])
+    return reward / risk if risk else 0.0
+
+
+class SignalRanker:
+    """Score, dedupe and rank every detection from one cycle.
+
+    `score(detector, signal)` returns a float, higher is better. Two signals
+    overlap when they point the same way and their entries are within
+    `entry_tolerance` (relative) of each other; only the higher-scoring one
+    is kept, with ties going to the earlier detector in DETECTORS order.
+    Each pattern family contributes at most one signal per batch.
+    """
+
+    def __init__(self, score=reward_risk, entry_tolerance=0.0005, limit=None):
+        self.score = score
+        self.entry_tolerance = entry_tolerance
+        self.limit = limit
+
+    def overlaps(self, a, b):
+        if a["direction"] != b["direction"]:
+            return False
+        return abs(a["entry_price"] - b["entry_price"]) <= self.entry_tolerance * abs(b["entry_price"])
+
+    def rank(self, detections):
+        """Return [(detector, signal)] best first, each signal tagged with family and score."""
+        scored = []
+        for detector, signal in detections:
+            signal = dict(signal, family=FAMILIES[detector], score=float(self.score(detector, signal)))
+            scored.append((detector, signal))
+        scored.sort(key=lambda item: -item[1]["score"])  # stable: keeps detector order on ties
+
+        kept = []
+        families = set()
+        for detector, signal in scored:
+            if signal["family"] in families or any(self.overlaps(signal, other) for _, other in kept):
+                continue
+            families.add(signal["family"])
+            kept.append((detector, signal))
+            if self.limit is not None and len(kept) >= self.limit:
+                break
+        return kept
+
+
+def signal_key(timestamp_ms, detector, timeframe="tick", symbol=None):
+    """Child key for a signal; sorts chronologically like a push id.
+
+    Bar timeframes and the symbol are part of the key so one batch can hold
+    the same detector on several timeframes, and detectors for different
+    symbols never write to the same key.
+    """
+    key = f"{timestamp_ms:013d}-{detector}"
+    if timeframe != "tick":
+        key += f"-{timeframe}"
+    if symbol is not None:
+        key += f"-{symbol}"
+    return key
@@ -0,0 +1,127 @@
+"""Local stand-in for the Firebase Realtime Database REST API.
+
+Holds a tick node fed by a synthetic random walk and serves it three ways:
+a plain GET returns the node as JSON, a GET with `Accept: text/event-stream`
+streams it (initial `put` at "/", then one `put` per new tick, with
+periodic `keep-alive` events), and POST/PATCH store data (e.g. signals)
+and stream it as `put`/`patch` events, null values deleting children.
+`drop_streams` ends every open stream, as a dropped connection would.
+
+    python -m detector.standin --port 8766
+    # PatternDetector(ticks_url="http://127.0.0.1:8766/ticks/R_25.json", ...)
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from aiohttp import web
+
+
+class StandinFirebaseServer:
+    def __init__(self, node="ticks/R_25", interval=0.5, keepalive=30, seed=None):
+        self.node = node
+        self.interval = interval
+        self.keepalive = keepalive
+        self.random = random.Random(seed)
+        self.data = {node: {}}
+        self.streams = {}  # node -> queues of its open event streams
+        self.epoch = int(time.time())
+        self.quote = 1000.0
+
+    def add_tick(self, epoch=None, quote=None):
+        self.epoch = epoch if epoch is not None else self.epoch + 1
+        self.quote = quote if quote is not None else round(self.quote + self.random.gauss(0, 0.5), 3)
+        key = str(self.epoch)
+        tick = {"symbol": self.node.rsplit("/", 1)[-1], "epoch": self.epoch, "quote": self.quote}
+        self.data[self.node][key] = tick
+        self._broadcast(self.node, "put", f"/{key}", tick)
+
+    def _broadcast(self, node, event, path, data):
+        for queue in list(self.streams.get(node, ())):
+            queue.put_nowait((event, {"path": path, "data": data}))
+
+    def drop_streams(self):
+        for queues in self.streams.values():
+            for queue in list(queues):
+                queue.put_nowait((None, None))
+
+    async def generate(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.add_tick()
+
+    def _node(self, request):
+        return request.match_info["path"][:-len(".json")]
+
+    async def handle_get(self, request):
+        node = self._node(request)
+        if "text/event-stream" not in request.headers.get("Accept", ""):
+            return web.json_response(self.data.get(node))
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        queue = asyncio.Queue()
+        queue.put_nowait(("put", {"path": "/", "data": self.data.get(node)}))
+        streams = self.streams.setdefault(node, set())
+        streams.add(queue)
+        try:
+            while True:
+                try:
+                    event, payload = await asyncio.wait_for(queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    event, payload = "keep-alive", None
+                if event is None:
+                    break  # dropped by drop_streams
+                await response.write(f"event: {event}\ndata: {json.dumps(payload)}\n\n".encode())
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            streams.discard(queue)
+        return response
+
+    async def handle_write(self, request):
+        node = self._node(request)
+        body = await request.json()
+        target = self.data.setdefault(node, {})
+        if request.method == "POST":
+            key = f"-{len(target):08d}"
+            target[key] = body
+            self._broadcast(node, "put", f"/{key}", body)
+            return web.json_response({"name": key})
+        for key, value in body.items():
+            if value is None:
+                target.pop(key, None)
+            else:
+                target[key] = value
+        self._broadcast(node, "patch", "/", body)
+        return web.json_response(body)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/{path:.+\\.json}", self.handle_get)
+        app.router.add_route("POST", "/{path:.+\\.json}", self.handle_write)
+        app.router.add_route("PATCH", "/{path:.+\\.json}", self.handle_write)
+        return app
+
+    async def serve(self, host="127.0.0.1", port=8766):
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        try:
+            await self.generate()
+        finally:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--node", default="ticks/R_25")
+    parser.add_argument("--interval", type=float, default=0.5)
+    args = parser.parse_args()
+
+    asyncio.run(StandinFirebaseServer(args.node, args.interval).serve(args.host, args.port))
@@ -0,0 +1,107 @@
+import numpy as np
+
+
+class TickStore:
+    """Fixed-capacity columnar ring buffer of tick times and prices.
+
+    Times are int64 epoch milliseconds, prices float64. Every value is
+    written twice, at slot `i` and `i + capacity`, so the latest `n` points
+    always form one contiguous slice and `last()` can hand out zero-copy
+    views. Memory is allocated once and stays flat however long the
+    process runs. The oldest points can also be dropped early (`discard`).
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self._times = np.zeros(2 * capacity, dtype=np.int64)
+        self._prices = np.zeros(2 * capacity, dtype=np.float64)
+        self.count = 0  # total points ever appended
+        self.first = 0  # absolute index of the oldest point not discarded
+
+    def __len__(self):
+        return self.count - self.start
+
+    @property
+    def start(self):
+        """Absolute index (0 = first point ever appended) of the oldest point held."""
+        return max(self.first, self.count - self.capacity)
+
+    @property
+    def last_time(self):
+        if not self.count:
+            return None
+        return int(self._times[(self.count - 1) % self.capacity])
+
+    @property
+    def last_price(self):
+        if not self.count:
+            return None
+        return float(self._prices[(self.count - 1) % self.capacity])
+
+    def append(self, time_ms, price):
+        slot = self.count % self.capacity
+        self._times[slot] = self._times[slot + self.capacity] = time_ms
+        self._prices[slot] = self._prices[slot + self.capacity] = price
+        self.count += 1
+
+    def extend(self, times, prices):
+        times = np.asarray(times, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        total = len(times)
+        # Only the last `capacity` points can survive; skip the rest
+        kept = min(total, self.capacity)
+        slots = (self.count + total - kept + np.arange(kept)) % self.capacity
+        self._times[slots] = self._times[slots + self.capacity] = times[total - kept:]
+        self._prices[slots] = self._prices[slots + self.capacity] = prices[total - kept:]
+        self.count += total
+
+    def clear(self):
+        self.count = 0
+        self.first = 0
+
+    def discard(self, times=None):
+        """Drop the oldest points while their time is in `times` (all points if None).
+
+        Only the front goes, as when a node's oldest ticks are trimmed;
+        points deleted from the middle stay held. Returns how many were dropped.
+        """
+        held = self.last()[0]
+        if times is None:
+            dropped = len(held)
+        else:
+            kept = ~np.isin(held, np.fromiter(times, dtype=np.int64))
+            dropped = int(np.argmax(kept)) if kept.any() else len(held)
+        self.first = self.start + dropped
+        return dropped
+
+    def _window(self, n):
+        size = len(self)
+        n = size if n is None else min(n, size)
+        # The next write slot mirrored into the upper half bounds the newest point
+        end = self.count % self.capacity + self.capacity
+        return end - n, end
+
+    def last(self, n=None):
+        """Read-only contiguous views (times, prices) of the latest `n` points."""
+        lo, hi = self._window(n)
+        times = self._times[lo:hi]
+        prices = self._prices[lo:hi]
+        times.flags.writeable = False
+        prices.flags.writeable = False
+        return times, prices
+
+    def prices(self, n=None):
+        return self.last(n)[1]
+
+    def to_frame(self, n=None):
+        """pandas DataFrame (timestamp, price) of the latest `n` points.
+
+        Only for callers that really need pandas; this copies.
+        """
+        import pandas as pd
+
+        times, prices = self.last(n)
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(times, unit="ms"),
+            "price": prices,
+        })
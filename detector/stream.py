@@ -0,0 +1,69 @@
+import asyncio
+import json
+import logging
+import random
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class FirebaseEventStream:
+    """Consume a Firebase REST event stream (`text/event-stream`).
+
+    Yields `(event, path, data)` for every `put` and `patch` event. The
+    first `put` carries the whole node at path "/"; later events carry
+    only the children that changed. Dropped connections, `cancel` and
+    `auth_revoked` events reconnect with jittered exponential backoff.
+    """
+
+    def __init__(self, url, session=None, max_backoff=60):
+        self.url = url
+        self.session = session
+        self.max_backoff = max_backoff
+        self.connects = 0
+
+    async def _events(self, response):
+        event, data = None, []
+        async for raw in response.content:
+            line = raw.decode("utf-8").rstrip("\r\n")
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                data.append(line[5:].strip())
+            elif not line and event:
+                yield event, "\n".join(data)
+                event, data = None, []
+
+    async def __aiter__(self):
+        own_session = self.session is None
+        session = self.session or aiohttp.ClientSession()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    timeout = aiohttp.ClientTimeout(total=None, sock_read=90)
+                    headers = {"Accept": "text/event-stream"}
+                    async with session.get(self.url, headers=headers, timeout=timeout) as response:
+                        if response.status != 200:
+                            raise aiohttp.ClientResponseError(
+                                response.request_info, response.history, status=response.status)
+                        self.connects += 1
+                        logger.info(f"Event stream connected: {self.url}")
+                        async for event, raw in self._events(response):
+                            attempt = 0
+                            if event in ("put", "patch"):
+                                payload = json.loads(raw)
+                                yield event, payload["path"], payload["data"]
+                            elif event in ("cancel", "auth_revoked"):
+                                logger.warning(f"Event stream {event}: {raw}")
+                                break
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    logger.error(f"Event stream error: {str(e)}")
+
+                delay = min(self.max_backoff, 2 ** attempt)
+                attempt += 1
+                await asyncio.sleep(delay / 2 + random.uniform(0, delay / 2))
+        finally:
+            if own_session:
+                await session.close()
@@ -0,0 +1,326 @@
+"""Sweep detector and analyzer thresholds over a tick archive.
+
+Every trial is one backtest (see detector.backtest) with its own parameter
+set. Trials run in a process pool; the archive is copied once into shared
+memory and every worker maps it instead of receiving a pickled copy.
+Results stream into a fixed-width table (and an optional CSV) as trials
+finish.
+
+Parameters are `name=v1,v2,...` (choices) or `name=lo:hi` (uniform range,
+random search only). Engine thresholds use DetectionEngine's names,
+backtest settings use Backtest's (order, stride, ...), analyzer settings
+are `<analyzer>.<kwarg>`:
+
+    python -m detector.sweep ticks.npz --param order=3,5,7 --param hs_tolerance=0.02,0.05
+    python -m detector.sweep ticks.npz --search random --trials 40 --param rectangle_std_ratio=0.01:0.05
+    python -m detector.sweep ticks.npz --search halving --trials 27 --no-detectors \\
+        --param dtb.tolerance=0.002:0.02 --param dtb.retest_window=5,10,20
+"""
+
+import argparse
+import csv
+import itertools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .backtest import ANALYZERS, Backtest, load_ticks, stats
+from .engine import DetectionEngine
+
+ENGINE_PARAMS = ("hs_tolerance", "level_tolerance", "flag_tolerance",
+                 "rectangle_std_ratio", "rectangle_window", "breakout_margin")
+BACKTEST_PARAMS = ("order", "window", "stride", "horizon", "cooldown")
+STATS = ("signals", "hit_rate", "win_rate", "expectancy", "expectancy_r", "total", "max_drawdown")
+
+
+def split_params(params):
+    """Route a flat parameter dict to (Backtest kwargs, engine kwargs, analyzer kwargs)."""
+    backtest, engine, analyzers = {}, {}, {}
+    for name, value in params.items():
+        if "." in name:
+            analyzer, kwarg = name.split(".", 1)
+            if analyzer not in ANALYZERS:
+                raise ValueError(f"unknown analyzer in {name!r}")
+            analyzers.setdefault(analyzer, {})[kwarg] = value
+        elif name in ENGINE_PARAMS:
+            engine[name] = value
+        elif name in BACKTEST_PARAMS:
+            backtest[name] = value
+        else:
+            raise ValueError(f"unknown parameter {name!r}")
+    return backtest, engine, analyzers
+
+
+def parse_space(specs):
+    """`["a=1,2", "b=0.1:0.5"]` -> {"a": [1, 2], "b": (0.1, 0.5)}."""
+    space = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if ":" in values:
+            lo, hi = (_number(v) for v in values.split(":", 1))
+            space[name] = (lo, hi)
+        else:
+            space[name] = [_number(v) for v in values.split(",")]
+    return space
+
+
+def parse_fixed(specs):
+    """`["a=1", "b=0.2"]` -> {"a": 1, "b": 0.2}; one value per name, no lists or ranges."""
+    fixed = {}
+    for spec in specs:
+        name, sep, value = spec.partition("=")
+        if not name or not sep or not value:
+            raise ValueError(f"{spec!r} is not name=value")
+        if "," in value or ":" in value:
+            raise ValueError(f"{spec!r} must set a single value; use --param for lists and ranges")
+        fixed[name] = _number(value)
+    return fixed
+
+
+def _number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def grid(space):
+    """Every combination of the listed choices."""
+    for name, values in space.items():
+        if isinstance(values, tuple):
+            raise ValueError(f"{name} is a range; grid search needs explicit choices")
+    names = list(space)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(space[n] for n in names))]
+
+
+def sample(space, trials, seed=None):
+    """`trials` random configurations; ranges are sampled uniformly."""
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(trials):
+        config = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                lo, hi = values
+                config[name] = rng.randint(lo, hi) if isinstance(lo, int) and isinstance(hi, int) else rng.uniform(lo, hi)
+            else:
+                config[name] = rng.choice(values)
+        configs.append(config)
+    return configs
+
+
+class SharedArchive:
+    """Epochs and prices copied once into shared memory blocks.
+
+    `spec` is all a worker needs to map the same arrays (see `_attach`).
+    """
+
+    def __init__(self, epochs, prices):
+        self._blocks = []
+        self.spec = []
+        for array in (np.ascontiguousarray(epochs, dtype=np.int64), np.ascontiguousarray(prices, dtype=np.float64)):
+            block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+            self._blocks.append(block)
+            self.spec.append((block.name, array.shape, array.dtype.str))
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Archive mapped in this process: (blocks, epochs, prices)
+_archive = None
+
+
+def _attach(spec):
+    global _archive
+    blocks = [shared_memory.SharedMemory(name=name) for name, _, _ in spec]
+    arrays = [np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+              for block, (_, shape, dtype) in zip(blocks, spec)]
+    _archive = (blocks, *arrays)
+
+
+def _run_trial(trial, params, budget, detectors, analyzers):
+    started = time.perf_counter()
+    _, epochs, prices = _archive
+    backtest_kw, engine_kw, analyzer_kw = split_params(params)
+    backtest = Backtest(epochs[:budget], prices[:budget], engine=DetectionEngine(**engine_kw),
+                        analyzer_params=analyzer_kw, **backtest_kw)
+    names = tuple(name for name in ANALYZERS if name in analyzers or name in analyzer_kw)
+    results = backtest.run(detectors, names)
+    return trial, stats(results), time.perf_counter() - started
+
+
+class Sweep:
+    """Run parameter sets against one archive and rank them by `metric`.
+
+    `base` parameters apply to every trial. `on_result(row)` is called as
+    each trial finishes; `rows` keeps them all.
+    """
+
+    def __init__(self, epochs, prices, jobs=None, metric="expectancy", minimize=False,
+                 detectors=True, analyzers=(), base=None, on_result=None):
+        self.epochs = epochs
+        self.prices = prices
+        self.jobs = jobs or os.cpu_count() or 1
+        self.metric = metric
+        self.minimize = minimize
+        self.detectors = detectors
+        self.analyzers = tuple(analyzers)
+        self.base = base or {}
+        self.on_result = on_result
+        self.rows = []
+        self._trials = 0
+
+    def score(self, row):
+        value = row[self.metric]
+        if value != value:  # NaN ranks last
+            return -math.inf
+        return -value if self.minimize else value
+
+    def best(self, rows=None, count=1):
+        return sorted(rows if rows is not None else self.rows, key=self.score, reverse=True)[:count]
+
+    def run(self, configs, budget=None, rung=0):
+        """Evaluate `configs` on the first `budget` ticks; returns their rows."""
+        budget = min(budget or len(self.prices), len(self.prices))
+        tasks = {}
+        for config in configs:
+            tasks[self._trials] = dict(self.base, **config)
+            self._trials += 1
+
+        rows = []
+
+        def record(trial, result, seconds):
+            row = dict(trial=trial, rung=rung, ticks=budget, **tasks[trial])
+            row.update({name: result[name] for name in STATS}, seconds=seconds)
+            rows.append(row)
+            self.rows.append(row)
+            if self.on_result:
+                self.on_result(row)
+
+        if self.jobs == 1:
+            global _archive
+            _archive = (None, self.epochs, self.prices)
+            for trial, params in tasks.items():
+                record(*_run_trial(trial, params, budget, self.detectors, self.analyzers))
+            return rows
+
+        with SharedArchive(self.epochs, self.prices) as archive, \
+                ProcessPoolExecutor(self.jobs, initializer=_attach, initargs=(archive.spec,)) as pool:
+            futures = [pool.submit(_run_trial, trial, params, budget, self.detectors, self.analyzers)
+                       for trial, params in tasks.items()]
+            for future in as_completed(futures):
+                record(*future.result())
+        return rows
+
+    def halving(self, configs, eta=3, min_budget=None):
+        """Successive halving: keep the best 1/eta on eta times more ticks each rung."""
+        n = len(self.prices)
+        rungs = max(0, math.ceil(math.log(max(len(configs), 1), eta)))
+        for rung in range(rungs + 1):
+            # The last rung always sees the whole archive
+            budget = max(min_budget or 0, n // eta ** (rungs - rung))
+            rows = self.run(configs, budget, rung)
+            if len(configs) <= 1 or rung == rungs:
+                break
+            survivors = self.best(rows, max(1, len(configs) // eta))
+            configs = [{name: row[name] for name in configs[0]} for row in survivors]
+        return rows
+
+
+class ResultTable:
+    """Print (and optionally append to CSV) one fixed-width line per trial.
+
+    `fixed` parameters (the same for every trial) only go to the CSV.
+    """
+
+    def __init__(self, param_names, path=None, fixed=()):
+        self.param_names = list(param_names)
+        fixed = [name for name in fixed if name not in self.param_names]
+        self.fields = ["trial", "rung", "ticks"] + self.param_names + fixed + list(STATS) + ["seconds"]
+        self._file = open(path, "w", newline="") if path else None
+        self._writer = csv.DictWriter(self._file, self.fields) if self._file else None
+        if self._writer:
+            self._writer.writeheader()
+        params = " ".join(f"{name[:14]:>14}" for name in self.param_names)
+        print(f"{'trial':>5} {'rung':>4} {'ticks':>9} {params} {'signals':>8} {'hit':>6} {'win':>6} "
+              f"{'exp':>9} {'exp R':>7} {'max dd':>9} {'secs':>6}")
+
+    def __call__(self, row):
+        params = " ".join(f"{_short(row[name]):>14}" for name in self.param_names)
+        print(f"{row['trial']:>5} {row['rung']:>4} {row['ticks']:>9} {params} {row['signals']:>8} "
+              f"{row['hit_rate']:>6.1%} {row['win_rate']:>6.1%} {row['expectancy']:>9.4f} "
+              f"{row['expectancy_r']:>7.2f} {row['max_drawdown']:>9.2f} {row['seconds']:>6.1f}", flush=True)
+        if self._writer:
+            self._writer.writerow(row)
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+def _short(value):
+    return f"{value:.6g}" if isinstance(value, float) else str(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("archive", help="journal directory, .npz, .npy or .csv")
+    parser.add_argument("--symbol")
+    parser.add_argument("--param", action="append", default=[], help="name=v1,v2 or name=lo:hi")
+    parser.add_argument("--set", action="append", default=[], help="fixed name=value for every trial")
+    parser.add_argument("--search", choices=("grid", "random", "halving"), default="grid")
+    parser.add_argument("--trials", type=int, default=20, help="configurations for random/halving")
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--metric", choices=STATS, default="expectancy")
+    parser.add_argument("--minimize", action="store_true")
+    parser.add_argument("--no-detectors", action="store_true")
+    parser.add_argument("--analyzers", nargs="*", choices=ANALYZERS, default=())
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--csv", help="also write every trial to this CSV file")
+    args = parser.parse_args()
+
+    space = parse_space(args.param)
+    try:
+        base = parse_fixed(args.set)
+    except ValueError as e:
+        parser.error(f"--set: {e}")
+    epochs, prices = load_ticks(args.archive, args.symbol)
+
+    table = ResultTable(space, args.csv, fixed=base)
+    sweep = Sweep(epochs, prices, jobs=args.jobs, metric=args.metric, minimize=args.minimize,
+                  detectors=not args.no_detectors, analyzers=args.analyzers, base=base, on_result=table)
+    started = time.perf_counter()
+    try:
+        if args.search == "grid":
+            sweep.run(grid(space))
+        elif args.search == "random":
+            sweep.run(sample(space, args.trials, args.seed))
+        else:
+            sweep.halving(sample(space, args.trials, args.seed) if space else [{}], args.eta)
+    finally:
+        table.close()
+
+    final = [row for row in sweep.rows if row["ticks"] == len(prices)] or sweep.rows
+    if final:
+        best = sweep.best(final)[0]
+        print(f"best {args.metric}: " + ", ".join(f"{name}={_short(best[name])}" for name in space)
+              + f" -> {_short(best[args.metric])}")
+    print(f"{len(sweep.rows)} trials in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,87 @@
+from .engine import DetectionEngine
+from .extrema import IncrementalExtrema
+from .store import TickStore
+
+TICK = "tick"
+
+# Bar label -> bar length in seconds
+TIMEFRAMES = {"1m": 60, "5m": 300, "15m": 900}
+
+
+class Timeframe:
+    """One price series (raw ticks, or bar closes) with its own extrema and engine.
+
+    Ticks are fed through `add`. For the tick timeframe (`seconds` None)
+    every tick is a point of the series. For bars only the open bar's close
+    is tracked; it is appended when the first tick of a later bar arrives,
+    which also marks the timeframe `due` for detection. Bars are keyed by
+    their start time in epoch ms, like the ingester's candles.
+    """
+
+    def __init__(self, label, seconds=None, capacity=1000, order=5, engine=None):
+        self.label = label
+        self.seconds = seconds
+        self.store = TickStore(capacity)
+        self.extrema = IncrementalExtrema(order)
+        self.engine = engine or DetectionEngine()
+        self.due = False
+        self._bar_start = None
+        self._bar_close = None
+
+    def __len__(self):
+        return len(self.store)
+
+    def append(self, time_ms, price):
+        self.store.append(time_ms, price)
+        self.extrema.append(price)
+
+    def add(self, time_ms, price):
+        """Feed one tick; returns True when it adds a point to the series."""
+        if self.seconds is None:
+            self.append(time_ms, price)
+            self.due = True
+            return True
+
+        start = time_ms - time_ms % (self.seconds * 1000)
+        if self._bar_start is not None and start == self._bar_start:
+            self._bar_close = price
+            return False
+        if self._bar_start is not None and start < self._bar_start:
+            return False  # late tick for a bar that has already closed
+
+        closed = self._close_bar()
+        self._bar_start, self._bar_close = start, price
+        return closed
+
+    def _close_bar(self):
+        last = self.store.last_time
+        if self._bar_start is None or (last is not None and self._bar_start <= last):
+            return False  # nothing open, or already loaded from history
+        self.append(self._bar_start, self._bar_close)
+        self.due = True
+        return True
+
+    def seed(self, times, closes):
+        """Append closed bars (e.g. from the candle history) older than any bar seen."""
+        added = 0
+        for time_ms, close in zip(times, closes):
+            last = self.store.last_time
+            if last is not None and time_ms <= last:
+                continue
+            if self._bar_start is not None and time_ms >= self._bar_start:
+                break
+            self.append(int(time_ms), float(close))
+            added += 1
+        return added
+
+    def current_extrema(self):
+        return self.extrema.extrema(self.store.prices(), self.store.start)
+
+    def detect(self):
+        """[(detector, signal)] over the whole series, each signal tagged with this timeframe."""
+        self.due = False
+        max_idx, max_val, min_idx, min_val = self.current_extrema()
+        detections = self.engine.detect(max_idx, max_val, min_idx, min_val, self.store.prices())
+        for _, signal_data in detections:
+            signal_data["timeframe"] = self.label
+        return detections
@@ -0,0 +1,6 @@
+from .writer import FirebaseWriter, create_session
+from .retention import TickRetention
+from .pipeline import SymbolPipeline, tick_key
+from .journal import JournalReplayer, TickJournal
+from .candles import CandleAggregator, candle_node
+from .metrics import IngestMetrics, LatencyHistogram, PipelineMetrics
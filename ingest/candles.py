@@ -0,0 +1,86 @@
+# ingest/candles.py
+
+import time
+
+# Node label -> bucket length in seconds
+TIMEFRAMES = {"1min": 60, "5min": 300, "15min": 900}
+
+
+def candle_node(symbol, label):
+    # R_25 -> 1minVix25, the node PatternDetector.fetch_1min_data reads
+    name = f"Vix{symbol[2:]}" if symbol.startswith("R_") else symbol
+    return f"{label}{name}"
+
+
+class Candle:
+    __slots__ = ("start", "open", "high", "low", "close", "ticks")
+
+    def __init__(self, start, price):
+        self.start = start
+        self.open = self.high = self.low = self.close = price
+        self.ticks = 1
+
+    def add(self, price):
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.ticks += 1
+
+    def record(self, closed):
+        return {
+            "time": self.start * 1000,
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "ticks": self.ticks,
+            "closed": closed,
+        }
+
+
+class CandleAggregator:
+    """Build OHLC candles for several timeframes incrementally from ticks.
+
+    Only the open candle of each timeframe is kept. A candle is handed to
+    `on_close(label, record)` exactly once, when the first tick of the next
+    bucket arrives; `on_update(label, record)` receives the in-progress
+    candle at most once every `update_interval` seconds per timeframe.
+    """
+
+    def __init__(self, timeframes=None, on_close=None, on_update=None, update_interval=5):
+        self.timeframes = dict(timeframes or TIMEFRAMES)
+        self.on_close = on_close
+        self.on_update = on_update
+        self.update_interval = update_interval
+        self.current = {label: None for label in self.timeframes}
+        self._last_update = {label: 0.0 for label in self.timeframes}
+        self.closed = 0
+
+    def add(self, epoch, price, publish=True):
+        now = time.monotonic()
+        for label, seconds in self.timeframes.items():
+            start = epoch - epoch % seconds
+            candle = self.current[label]
+
+            if candle is None or start > candle.start:
+                if candle is not None:
+                    self.closed += 1
+                    if publish and self.on_close:
+                        self.on_close(label, candle.record(True))
+                self.current[label] = candle = Candle(start, price)
+            elif start == candle.start:
+                candle.add(price)
+            else:
+                continue  # late tick for a bucket that has already closed
+
+            if (publish and self.on_update and self.update_interval is not None
+                    and now - self._last_update[label] >= self.update_interval):
+                self._last_update[label] = now
+                self.on_update(label, candle.record(False))
+
+    def seed(self, epochs, prices):
+        """Rebuild the open candles from history without publishing anything."""
+        for epoch, price in zip(epochs, prices):
+            self.add(int(epoch), float(price), publish=False)
@@ -0,0 +1,276 @@
+# ingest/journal.py
+
+import asyncio
+import json
+import mmap
+import os
+import time
+
+import aiohttp
+import numpy as np
+
+# One fixed-size record per tick. Empty slots are all zeros, so a zero
+# epoch marks the end of the written part of a segment.
+RECORD = np.dtype([
+    ("epoch", "<i8"),
+    ("quote", "<f8"),
+    ("symbol", "<u4"),
+    ("flags", "<u4"),
+])
+
+
+class TickJournal:
+    """Append-only memory-mapped tick journal used as a write-ahead buffer.
+
+    Records live in fixed-size segment files; record `seq` is stored at
+    slot `seq % records_per_segment` of segment `seq // records_per_segment`.
+    Every appended record stays pending until `ack` is called for it, and
+    the acknowledged prefix is persisted as a cursor so unacknowledged
+    ticks survive a restart.
+    """
+
+    def __init__(self, directory, segment_size=4 * 1024 * 1024, keep_segments=4):
+        self.directory = directory
+        self.records_per_segment = segment_size // RECORD.itemsize
+        self.segment_size = self.records_per_segment * RECORD.itemsize
+        self.keep_segments = keep_segments
+        os.makedirs(directory, exist_ok=True)
+
+        self._symbols_path = os.path.join(directory, "symbols.json")
+        self._cursor_path = os.path.join(directory, "cursor")
+        self.symbols = []
+        if os.path.exists(self._symbols_path):
+            with open(self._symbols_path) as f:
+                self.symbols = json.load(f)
+        self._symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+        self._file = None
+        self._mm = None
+        self._view = None
+        segments = self.segments()
+        self._open_segment(segments[-1] if segments else 0)
+
+        self.cursor = self._load_cursor()
+        self._saved_cursor = self.cursor
+        # seq -> time it was appended; restored entries are due immediately
+        self.pending = {seq: 0.0 for seq in range(self.cursor + 1, self.next_seq)}
+
+    # Segments
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"segment-{number:08d}.bin")
+
+    def segments(self):
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith("segment-") and name.endswith(".bin"):
+                numbers.append(int(name[8:-4]))
+        return sorted(numbers)
+
+    def _open_segment(self, number):
+        path = self._segment_path(number)
+        self._file = open(path, "a+b")
+        if os.path.getsize(path) < self.segment_size:
+            self._file.truncate(self.segment_size)
+        self._mm = mmap.mmap(self._file.fileno(), self.segment_size)
+        self._view = np.frombuffer(self._mm, dtype=RECORD)
+        self.segment = number
+
+        empty = np.flatnonzero(self._view["epoch"] == 0)
+        self.slot = int(empty[0]) if len(empty) else self.records_per_segment
+
+    def _close_segment(self):
+        self._mm.flush()
+        self._view = None
+        self._mm.close()
+        self._file.close()
+
+    def _rotate(self):
+        self._close_segment()
+        self._open_segment(self.segment + 1)
+        self._drop_old_segments()
+
+    def _drop_old_segments(self):
+        # Only segments that are fully acknowledged and outside the
+        # history window can go
+        acked_segment = (self.cursor + 1) // self.records_per_segment
+        for number in self.segments():
+            if number < acked_segment and number <= self.segment - self.keep_segments:
+                os.remove(self._segment_path(number))
+
+    # Writing
+
+    @property
+    def next_seq(self):
+        return self.segment * self.records_per_segment + self.slot
+
+    def symbol_id(self, symbol):
+        if symbol not in self._symbol_ids:
+            self._symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            tmp = self._symbols_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.symbols, f)
+            os.replace(tmp, self._symbols_path)
+        return self._symbol_ids[symbol]
+
+    def append(self, symbol, epoch, quote):
+        """Write one tick through the memory map and return its sequence number."""
+        if self.slot >= self.records_per_segment:
+            self._rotate()
+        seq = self.next_seq
+        self._view[self.slot] = (epoch, quote, self.symbol_id(symbol), 0)
+        self.slot += 1
+        self.pending[seq] = time.monotonic()
+        return seq
+
+    def ack(self, seqs):
+        for seq in seqs:
+            self.pending.pop(seq, None)
+        self.cursor = (next(iter(self.pending)) if self.pending else self.next_seq) - 1
+
+    def stale(self, older_than, limit=5000):
+        """Return up to `limit` pending sequence numbers appended before `older_than`."""
+        seqs = []
+        for seq, appended in self.pending.items():
+            if appended > older_than or len(seqs) >= limit:
+                break
+            seqs.append(seq)
+        return seqs
+
+    def sync(self):
+        """Flush the mapped segment and persist the acknowledged cursor."""
+        self._mm.flush()
+        if self.cursor != self._saved_cursor:
+            tmp = self._cursor_path + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(str(self.cursor))
+            os.replace(tmp, self._cursor_path)
+            self._saved_cursor = self.cursor
+            self._drop_old_segments()
+
+    def _load_cursor(self):
+        if not os.path.exists(self._cursor_path):
+            return self.segments()[0] * self.records_per_segment - 1
+        with open(self._cursor_path) as f:
+            return int(f.read().strip() or -1)
+
+    def close(self):
+        self.sync()
+        self._close_segment()
+
+    # Reading
+
+    def _segment_records(self, number):
+        if number == self.segment:
+            return self._view[:self.slot]
+        path = self._segment_path(number)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=RECORD)
+        records = np.fromfile(path, dtype=RECORD)
+        return records[records["epoch"] != 0]
+
+    def read(self, seqs):
+        """Return the records for the given sequence numbers, in order."""
+        seqs = np.asarray(seqs, dtype=np.int64)
+        out = np.empty(len(seqs), dtype=RECORD)
+        numbers = seqs // self.records_per_segment
+        for number in np.unique(numbers):
+            mask = numbers == number
+            records = self._segment_records(int(number))
+            out[mask] = records[seqs[mask] % self.records_per_segment]
+        return out
+
+    def history(self, symbol, since_epoch=0, limit=None):
+        """Return (epochs, quotes) arrays for `symbol` from the local segments."""
+        if symbol not in self._symbol_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        sid = self._symbol_ids[symbol]
+        chunks = []
+        count = 0
+        for number in reversed(self.segments()):
+            records = self._segment_records(number)
+            records = records[(records["symbol"] == sid) & (records["epoch"] > since_epoch)]
+            chunks.append(records)
+            count += len(records)
+            if limit is not None and count >= limit:
+                break
+        if not chunks:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        records = np.concatenate(chunks[::-1])
+        if limit is not None:
+            records = records[-limit:]
+        return records["epoch"].copy(), records["quote"].copy()
+
+    def last_epoch(self, symbol):
+        epochs, _ = self.history(symbol, limit=1)
+        return int(epochs[-1]) if len(epochs) else None
+
+
+class JournalReplayer:
+    """Drain journal entries that were never acknowledged back to Firebase.
+
+    Anything still pending `replay_after` seconds after it was journaled
+    (failed flush, dropped from a full queue, or left over from a previous
+    run) is read back in bulk and written with one multi-path PATCH per
+    symbol. Failures back off up to `max_interval`.
+    """
+
+    def __init__(self, journal, session, base_url, pipelines, interval=5,
+                 replay_after=30, batch_size=5000, max_interval=120):
+        self.journal = journal
+        self.session = session
+        self.base_url = base_url
+        self.pipelines = pipelines
+        self.interval = interval
+        self.replay_after = replay_after
+        self.batch_size = batch_size
+        self.max_interval = max_interval
+        self.replayed = 0
+
+    async def replay_once(self):
+        seqs = self.journal.stale(time.monotonic() - self.replay_after, self.batch_size)
+        if not seqs:
+            return True
+
+        records = self.journal.read(seqs)
+        seqs = np.asarray(seqs)
+        ok = True
+        for sid in np.unique(records["symbol"]):
+            symbol = self.journal.symbols[sid]
+            mask = records["symbol"] == sid
+            ticks = {
+                str(int(r["epoch"])): {"symbol": symbol, "epoch": int(r["epoch"]), "quote": float(r["quote"])}
+                for r in records[mask]
+            }
+            url = f"{self.base_url}/ticks/{symbol}.json"
+            try:
+                async with self.session.patch(url, json=ticks) as response:
+                    if response.status != 200:
+                        print("[REPLAY FAILED]", symbol, response.status)
+                        ok = False
+                        continue
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print("[REPLAY ERROR]", symbol, e)
+                ok = False
+                continue
+
+            self.journal.ack(seqs[mask].tolist())
+            self.replayed += len(ticks)
+            pipeline = self.pipelines.get(symbol)
+            if pipeline:
+                for key, tick in ticks.items():
+                    pipeline.retention.add(key, tick["epoch"])
+            print("[REPLAYED]", symbol, len(ticks))
+        return ok
+
+    async def run(self):
+        delay = self.interval
+        while True:
+            await asyncio.sleep(delay)
+            ok = await self.replay_once()
+            self.journal.sync()
+            delay = self.interval if ok else min(delay * 2, self.max_interval)
+
+    def status(self):
+        return {"pending": len(self.journal.pending), "cursor": self.journal.cursor, "replayed": self.replayed}
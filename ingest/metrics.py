@@ -0,0 +1,148 @@
+# ingest/metrics.py
+
+import time
+
+from aiohttp import web
+
+
+class LatencyHistogram:
+    """Fixed-memory log-linear latency histogram (HDR-style).
+
+    Values are stored in microseconds. Below `2 * sub_buckets` every value
+    has its own bucket; above that each power of two is split into
+    `sub_buckets` linear buckets, so any reported percentile is within
+    1/sub_buckets of the true value. Values past `max_seconds` land in the
+    last bucket.
+    """
+
+    def __init__(self, max_seconds=3600, sub_buckets=32):
+        self.sub_bits = sub_buckets.bit_length() - 1
+        self.sub_buckets = 1 << self.sub_bits
+        self.max_value = int(max_seconds * 1_000_000)
+        self.counts = [0] * (self._index(self.max_value) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def _index(self, value):
+        shift = max(0, value.bit_length() - self.sub_bits - 1)
+        return (shift << self.sub_bits) + (value >> shift)
+
+    def _lower_bound(self, index):
+        shift = max(0, (index >> self.sub_bits) - 1)
+        return (index - (shift << self.sub_bits)) << shift
+
+    def record(self, seconds):
+        value = min(max(int(seconds * 1_000_000), 0), self.max_value)
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        """Return the `p`th percentile (0-100) in seconds."""
+        if not self.count:
+            return 0.0
+        target = max(1, int(round(self.count * p / 100)))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                low = self._lower_bound(index)
+                high = self._lower_bound(index + 1)
+                return min((low + high) / 2, self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count / 1_000_000 if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max / 1_000_000,
+        }
+
+
+class PipelineMetrics:
+    """Per-symbol latency histograms for the path from Deriv to Firebase.
+
+    feed:    Deriv tick epoch -> websocket receipt
+    queue:   receipt/enqueue -> start of the flush carrying the tick
+    write:   flush start -> Firebase acknowledgement
+    persist: enqueue -> Firebase acknowledgement
+    """
+
+    def __init__(self):
+        self.feed = LatencyHistogram()
+        self.queue = LatencyHistogram()
+        self.write = LatencyHistogram()
+        self.persist = LatencyHistogram()
+
+    def received(self, epoch, received_at):
+        self.feed.record(received_at - epoch)
+
+    def flushed(self, batch, started, acked):
+        self.write.record(acked - started)
+        for item in batch:
+            self.queue.record(started - item.enqueued_at)
+            self.persist.record(acked - item.enqueued_at)
+
+    def summary(self):
+        return {
+            "feed": self.feed.summary(),
+            "queue": self.queue.summary(),
+            "write": self.write.summary(),
+            "persist": self.persist.summary(),
+        }
+
+
+class IngestMetrics:
+    """Process-wide counters plus a snapshot of every pipeline."""
+
+    def __init__(self, pipelines, replayer=None):
+        self.pipelines = pipelines
+        self.replayer = replayer
+        self.started = time.time()
+        self.reconnects = 0
+
+    def snapshot(self):
+        symbols = {}
+        for symbol, pipeline in self.pipelines.items():
+            symbols[symbol] = {
+                **pipeline.status(),
+                "latency": pipeline.metrics.summary(),
+            }
+        return {
+            "uptime": time.time() - self.started,
+            "reconnects": self.reconnects,
+            "dropped": sum(p.writer.dropped for p in self.pipelines.values()),
+            "retention_deletes": sum(p.retention.deleted for p in self.pipelines.values()),
+            "journal": self.replayer.status() if self.replayer else None,
+            "symbols": symbols,
+        }
+
+    def summary_line(self):
+        parts = [f"reconnects={self.reconnects}"]
+        for symbol, pipeline in self.pipelines.items():
+            persist = pipeline.metrics.persist
+            parts.append(
+                f"{symbol}: ticks={pipeline.received} depth={pipeline.writer.depth} "
+                f"dropped={pipeline.writer.dropped} deleted={pipeline.retention.deleted} "
+                f"feed_p50={pipeline.metrics.feed.percentile(50):.3f}s "
+                f"persist_p50={persist.percentile(50):.3f}s persist_p99={persist.percentile(99):.3f}s"
+            )
+        return " | ".join(parts)
+
+    async def serve(self, host="127.0.0.1", port=9100):
+        """Serve the snapshot as JSON on http://host:port/metrics."""
+        async def handle(request):
+            return web.json_response(self.snapshot())
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        print(f"[METRICS] Serving on http://{host}:{port}/metrics")
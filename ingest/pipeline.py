@@ -0,0 +1,123 @@
+# ingest/pipeline.py
+
+import time
+
+from .candles import TIMEFRAMES, CandleAggregator, candle_node
+from .metrics import PipelineMetrics
+from .retention import TickRetention
+from .writer import FirebaseWriter
+
+
+def tick_key(tick):
+    # Keyed by epoch so a re-sent tick overwrites itself instead of duplicating
+    return str(tick["epoch"])
+
+
+class SymbolPipeline:
+    """Write queue, retention, candles and counters for one subscribed symbol.
+
+    With a journal attached every tick is journaled before it is queued,
+    and acknowledged in the journal once Firebase has accepted it. Each
+    tick also advances the candle aggregator, whose candles are written
+    to one node per timeframe (`1minVix25`, `5minVix25`, ...), each kept
+    to `candle_max_records` candles by its own retention.
+    """
+
+    def __init__(self, session, base_url, symbol, flush_size=200, flush_interval=0.25,
+                 max_queue=10000, max_records=999, retention_interval=10, journal=None,
+                 timeframes=TIMEFRAMES, candle_update_interval=5, candle_max_records=999):
+        self.symbol = symbol
+        self.journal = journal
+        self.writer = FirebaseWriter(
+            session, base_url, f"ticks/{symbol}",
+            flush_size=flush_size, flush_interval=flush_interval, max_queue=max_queue,
+        )
+        self.retention = TickRetention(
+            session, base_url, f"ticks/{symbol}",
+            max_records=max_records, interval=retention_interval,
+        )
+        self.metrics = PipelineMetrics()
+        self.writer.add_listener(self.retention.track)
+        self.writer.add_listener(self._record_flush)
+        if journal is not None:
+            self.writer.add_listener(self._ack)
+
+        self.candle_writers = {
+            label: FirebaseWriter(session, base_url, candle_node(symbol, label), flush_interval=flush_interval)
+            for label in timeframes
+        }
+        self.candle_retention = {
+            label: TickRetention(
+                session, base_url, candle_node(symbol, label),
+                max_records=candle_max_records, interval=retention_interval, order_by="time",
+            )
+            for label in timeframes
+        }
+        for label, writer in self.candle_writers.items():
+            writer.add_listener(self.candle_retention[label].track)
+        self.candles = CandleAggregator(
+            timeframes, on_close=self._write_candle, on_update=self._write_candle,
+            update_interval=candle_update_interval,
+        )
+
+        self.received = 0
+        self.duplicates = 0
+        self.last_epoch = None
+        if journal is not None:
+            # Rebuild the open candles from the journal so a restart does not
+            # publish a truncated candle for the bucket it interrupted
+            since = journal.last_epoch(symbol)
+            if since is not None and timeframes:
+                longest = max(timeframes.values())
+                epochs, quotes = journal.history(symbol, since_epoch=since - since % longest - 1)
+                self.candles.seed(epochs, quotes)
+            self.last_epoch = since
+
+    def push(self, tick, received_at=None):
+        """Journal and queue a tick; ticks at or before the last epoch are dropped.
+
+        `received_at` is the wall-clock receipt time of a live tick; ticks
+        recovered from history leave it unset and skip the feed histogram.
+        """
+        if self.last_epoch is not None and tick["epoch"] <= self.last_epoch:
+            self.duplicates += 1
+            return False
+        if received_at is not None:
+            self.metrics.received(tick["epoch"], received_at)
+        self.received += 1
+        self.last_epoch = tick["epoch"]
+        seq = None
+        if self.journal is not None:
+            seq = self.journal.append(self.symbol, tick["epoch"], tick["quote"])
+        self.writer.submit(tick_key(tick), tick, seq)
+        self.candles.add(tick["epoch"], tick["quote"])
+        return True
+
+    def _write_candle(self, label, record):
+        # Keyed by bucket start: in-progress updates are overwritten by the
+        # final candle when the bucket closes
+        self.candle_writers[label].submit(str(record["time"] // 1000), record)
+
+    def _record_flush(self, batch, ok):
+        if ok:
+            self.metrics.flushed(batch, self.writer.flush_started, time.monotonic())
+
+    def _ack(self, batch, ok):
+        if ok:
+            self.journal.ack(item.token for item in batch)
+
+    def tasks(self):
+        writers = [writer.run() for writer in self.candle_writers.values()]
+        retention = [retention.run() for retention in self.candle_retention.values()]
+        return [self.writer.run(), self.retention.run(), *writers, *retention]
+
+    def status(self):
+        return {
+            "symbol": self.symbol,
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "last_epoch": self.last_epoch,
+            "writer": self.writer.status(),
+            "retention": self.retention.status(),
+            "candles_closed": self.candles.closed,
+        }
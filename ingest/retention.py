@@ -0,0 +1,112 @@
+# ingest/retention.py
+
+import asyncio
+import bisect
+
+import aiohttp
+
+
+class TickRetention:
+    """Keep a Firebase tick (or candle) node bounded to `max_records`.
+
+    Every key the writer acknowledges is added to a local index ordered by
+    its `order_by` field (`epoch` for ticks, `time` for candles), so
+    eviction never has to read the node back: the overflow is removed with
+    one multi-path PATCH that nulls the oldest keys. The index is rebuilt
+    on startup from a single `limitToFirst` query.
+    """
+
+    def __init__(self, session, base_url, path, max_records=999, interval=10, recover_limit=None,
+                 order_by="epoch"):
+        self.session = session
+        self.path = path
+        self.url = f"{base_url}/{path}.json"
+        self.order_by = order_by
+        self.max_records = max_records
+        self.interval = interval
+        self.recover_limit = recover_limit or 2 * max_records
+
+        self.index = []  # (epoch, key), ascending
+        self.keys = set()
+        self.recovered = False
+        self.saturated = False
+        self.deleted = 0
+
+    def __len__(self):
+        return len(self.index)
+
+    def add(self, key, epoch):
+        if key in self.keys:
+            return
+        self.keys.add(key)
+        entry = (epoch, key)
+        if not self.index or entry >= self.index[-1]:
+            self.index.append(entry)
+        else:
+            bisect.insort(self.index, entry)
+
+    def track(self, batch, ok):
+        """Writer listener: index every record once its write is acknowledged."""
+        if ok:
+            for item in batch:
+                self.add(item.key, item.value[self.order_by])
+
+    async def recover(self):
+        """Rebuild the index from the oldest `recover_limit` keys on the node."""
+        url = f"{self.url}?orderBy=\"{self.order_by}\"&limitToFirst={self.recover_limit}"
+        try:
+            async with self.session.get(url) as response:
+                if response.status != 200:
+                    print("[RETENTION] Recovery failed:", self.path, response.status)
+                    return False
+                data = await response.json() or {}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print("[RETENTION] Recovery error:", self.path, e)
+            return False
+
+        known = len(self.keys)
+        for key, tick in data.items():
+            if isinstance(tick, dict):
+                self.add(key, tick.get(self.order_by, 0))
+        # A full page of unseen keys means more may exist past the limit;
+        # look again once this page has been evicted.
+        self.saturated = len(data) >= self.recover_limit and len(self.keys) > known
+        self.recovered = True
+        print("[RETENTION] Recovered", len(data), "keys for", self.path)
+        return True
+
+    async def trim(self):
+        """Evict everything beyond `max_records` in one batched null-PATCH."""
+        overflow = len(self.index) - self.max_records
+        if overflow <= 0:
+            return 0
+
+        stale = self.index[:overflow]
+        payload = {key: None for _, key in stale}
+        try:
+            async with self.session.patch(self.url, json=payload) as response:
+                if response.status != 200:
+                    print("[RETENTION] Trim failed:", self.path, response.status)
+                    return 0
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print("[RETENTION] Trim error:", self.path, e)
+            return 0
+
+        del self.index[:overflow]
+        self.keys.difference_update(payload)
+        self.deleted += overflow
+        print("[DELETED OLD TICKS]", self.path, overflow)
+        return overflow
+
+    async def run(self):
+        while True:
+            if not self.recovered:
+                await self.recover()
+            else:
+                await self.trim()
+                if self.saturated:
+                    await self.recover()
+            await asyncio.sleep(self.interval)
+
+    def status(self):
+        return {"path": self.path, "indexed": len(self.index), "deleted": self.deleted}
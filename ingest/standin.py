@@ -0,0 +1,115 @@
+# ingest/standin.py
+"""Local stand-in for the Deriv websocket API.
+
+Serves `ticks` subscriptions and `ticks_history` requests from a synthetic
+random walk, and deliberately drops every connection after `drop_every`
+ticks. The walk keeps advancing while no client is connected, so each
+reconnect has a real gap to backfill.
+
+    python -m ingest.standin --port 8765 --drop-every 50
+    DERIV_WS_URL=ws://127.0.0.1:8765 python main.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import websockets
+
+
+class StandinDerivServer:
+    def __init__(self, symbols=("R_25",), interval=0.5, drop_every=50, seed=None):
+        self.interval = interval
+        self.drop_every = drop_every
+        self.random = random.Random(seed)
+        start = int(time.time())
+        # Epochs advance by one per generated tick so short test runs still
+        # produce distinct, strictly increasing epochs
+        self.series = {symbol: [(start, 1000.0)] for symbol in symbols}
+        self.subscribers = set()
+        self.connections = 0
+
+    def _advance(self):
+        for symbol, series in self.series.items():
+            epoch, quote = series[-1]
+            series.append((epoch + 1, round(quote + self.random.gauss(0, 0.5), 3)))
+        return {symbol: series[-1] for symbol, series in self.series.items()}
+
+    def _history(self, request):
+        series = self.series.get(request["ticks_history"], [])
+        start = int(request.get("start", 0))
+        count = int(request.get("count", 5000))
+        window = [item for item in series if item[0] >= start][-count:]
+        return {
+            "msg_type": "history",
+            "echo_req": request,
+            "history": {
+                "times": [epoch for epoch, _ in window],
+                "prices": [quote for _, quote in window],
+            },
+        }
+
+    async def generate(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            latest = self._advance()
+            for queue in list(self.subscribers):
+                queue.put_nowait(latest)
+
+    async def handler(self, ws):
+        self.connections += 1
+        queue = asyncio.Queue()
+        symbols = []
+        sent = 0
+        reader = asyncio.ensure_future(ws.recv())
+        waiter = asyncio.ensure_future(queue.get())
+        try:
+            while True:
+                done, _ = await asyncio.wait({reader, waiter}, return_when=asyncio.FIRST_COMPLETED)
+                if reader in done:
+                    request = json.loads(reader.result())
+                    if "ticks_history" in request:
+                        await ws.send(json.dumps(self._history(request)))
+                    elif "ticks" in request:
+                        ticks = request["ticks"]
+                        symbols = [ticks] if isinstance(ticks, str) else list(ticks)
+                        self.subscribers.add(queue)
+                    reader = asyncio.ensure_future(ws.recv())
+                if waiter in done:
+                    latest = waiter.result()
+                    for symbol in symbols:
+                        epoch, quote = latest[symbol]
+                        await ws.send(json.dumps({
+                            "msg_type": "tick",
+                            "tick": {"symbol": symbol, "epoch": epoch, "quote": quote},
+                        }))
+                    sent += 1
+                    if self.drop_every and sent >= self.drop_every:
+                        await ws.close()
+                        return
+                    waiter = asyncio.ensure_future(queue.get())
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.subscribers.discard(queue)
+            reader.cancel()
+            waiter.cancel()
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        async with websockets.serve(self.handler, host, port):
+            await self.generate()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--symbols", default="R_25")
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--drop-every", type=int, default=50)
+    args = parser.parse_args()
+
+    server = StandinDerivServer(args.symbols.split(","), args.interval, args.drop_every)
+    asyncio.run(server.serve(args.host, args.port))
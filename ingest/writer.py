@@ -0,0 +1,112 @@
+# ingest/writer.py
+
+import asyncio
+import time
+from collections import namedtuple
+
+import aiohttp
+
+# `token` is opaque to the writer; callers use it to match acknowledgements
+# back to their own records (e.g. journal sequence numbers).
+WriteItem = namedtuple("WriteItem", ["key", "value", "enqueued_at", "token"])
+
+
+def create_session(limit=8, keepalive=30, timeout=10):
+    """Create a pooled keep-alive HTTP session for Firebase writes."""
+    connector = aiohttp.TCPConnector(limit=limit, keepalive_timeout=keepalive, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout))
+
+
+class FirebaseWriter:
+    """Coalesce writes to one Firebase node into multi-path PATCH requests.
+
+    The receiver calls `submit`, which never waits on the network. `run`
+    drains the bounded queue, groups everything that arrives within
+    `flush_interval` (up to `flush_size` entries) and sends it as a single
+    PATCH of `{key: value}` pairs over the shared session.
+    """
+
+    def __init__(self, session, base_url, path, flush_size=200, flush_interval=0.25, max_queue=10000):
+        self.session = session
+        self.path = path
+        self.url = f"{base_url}/{path}.json"
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.listeners = []
+
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.flush_started = None
+
+    @property
+    def depth(self):
+        return self.queue.qsize()
+
+    def add_listener(self, callback):
+        """Register `callback(batch, ok)`, called after every flush attempt."""
+        self.listeners.append(callback)
+
+    def submit(self, key, value, token=None):
+        """Enqueue a write without blocking; the oldest entry is dropped when the queue is full."""
+        item = WriteItem(key, value, time.monotonic(), token)
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def flush(self, batch):
+        """Send one batch as a multi-path PATCH and notify listeners."""
+        payload = {item.key: item.value for item in batch}
+        self.flush_started = time.monotonic()
+        ok = False
+        try:
+            async with self.session.patch(self.url, json=payload) as response:
+                ok = response.status == 200
+                if not ok:
+                    print("[WRITE FAILED]", self.path, response.status, await response.text())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print("[WRITE ERROR]", self.path, e)
+
+        self.flushes += 1
+        if ok:
+            self.written += len(batch)
+        else:
+            self.failed += len(batch)
+
+        for callback in self.listeners:
+            callback(batch, ok)
+        return ok
+
+    async def run(self):
+        while True:
+            batch = await self._collect()
+            await self.flush(batch)
+
+    def status(self):
+        return {
+            "path": self.path,
+            "depth": self.depth,
+            "written": self.written,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+        }
@@ -2,47 +2,111 @@
 import asyncio
 import websockets
 import json
-import requests
+import os
+import random
 import time
 
+from ingest import IngestMetrics, JournalReplayer, SymbolPipeline, TickJournal, create_session
+
 FIREBASE_URL = "https://company-bdb78-default-rtdb.firebaseio.com"
-DERIV_WS_URL = "wss://ws.derivws.com/websockets/v3?app_id=1089"
-SYMBOL = "R_25"
+DERIV_WS_URL = os.environ.get("DERIV_WS_URL", "wss://ws.derivws.com/websockets/v3?app_id=1089")
+SYMBOLS = ["R_25"]
 MAX_RECORDS = 999
 
-def push_tick(tick_data):
-    url = f"{FIREBASE_URL}/ticks/{SYMBOL}.json"
-    response = requests.post(url, json=tick_data)
-    print("[TICK PUSHED]", tick_data if response.status_code == 200 else response.text)
-
-def trim_old_ticks():
-    url = f"{FIREBASE_URL}/ticks/{SYMBOL}.json?orderBy=\"epoch\"&limitToLast={MAX_RECORDS}"
-    res = requests.get(url)
-    if res.status_code == 200 and res.json():
-        ticks = res.json()
-        keep_keys = set(ticks.keys())
-        all_url = f"{FIREBASE_URL}/ticks/{SYMBOL}.json"
-        full_res = requests.get(all_url)
-        if full_res.status_code == 200 and full_res.json():
-            for k in full_res.json():
-                if k not in keep_keys:
-                    del_url = f"{FIREBASE_URL}/ticks/{SYMBOL}/{k}.json"
-                    requests.delete(del_url)
-                    print("[DELETED OLD TICK]", k)
-
-async def stream_ticks():
+# Writer stage: ticks arriving within FLUSH_INTERVAL seconds (up to FLUSH_SIZE)
+# go out as one multi-path PATCH.
+FLUSH_SIZE = 200
+FLUSH_INTERVAL = 0.25
+WRITE_QUEUE_SIZE = 10000
+RETENTION_INTERVAL = 10
+STATUS_INTERVAL = 30
+
+# Local metrics endpoint: GET http://METRICS_HOST:METRICS_PORT/metrics
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 9100))
+
+# Write-ahead journal: ticks not acknowledged by Firebase within
+# REPLAY_AFTER seconds are replayed from disk in bulk.
+JOURNAL_DIR = "journal"
+JOURNAL_SEGMENT_SIZE = 4 * 1024 * 1024
+REPLAY_INTERVAL = 5
+REPLAY_AFTER = 30
+
+# Reconnects back off exponentially with jitter; after reconnecting, up to
+# BACKFILL_COUNT missed ticks per symbol are fetched with ticks_history.
+RECONNECT_BASE_DELAY = 1
+RECONNECT_MAX_DELAY = 60
+BACKFILL_COUNT = 5000
+
+# Candles are built from the tick stream; open candles are re-published at
+# most every CANDLE_UPDATE_INTERVAL seconds (None publishes closed ones only).
+CANDLE_TIMEFRAMES = {"1min": 60, "5min": 300, "15min": 900}
+CANDLE_UPDATE_INTERVAL = 5
+CANDLE_MAX_RECORDS = 999
+
+async def report_status(metrics):
+    while True:
+        await asyncio.sleep(STATUS_INTERVAL)
+        print("[METRICS]", metrics.summary_line())
+
+def backoff_delay(attempt):
+    """Exponential backoff with equal jitter, capped at RECONNECT_MAX_DELAY."""
+    delay = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+async def request_backfill(ws, pipelines):
+    """Ask for every tick missed since each symbol's last journaled epoch.
+
+    Returns a buffer per symbol; live ticks for that symbol are held there
+    until its history has been merged so the series stays in order.
+    """
+    waiting = {}
+    for symbol, pipeline in pipelines.items():
+        if pipeline.last_epoch is None:
+            continue
+        await ws.send(json.dumps({
+            "ticks_history": symbol,
+            "start": pipeline.last_epoch + 1,
+            "end": "latest",
+            "style": "ticks",
+            "count": BACKFILL_COUNT
+        }))
+        waiting[symbol] = []
+    return waiting
+
+def merge_history(pipeline, history, buffered):
+    times = history.get("times", [])
+    prices = history.get("prices", [])
+    before = pipeline.received
+    for epoch, quote in zip(times, prices):
+        pipeline.push({"symbol": pipeline.symbol, "epoch": epoch, "quote": quote})
+    for tick, received_at in buffered:
+        pipeline.push(tick, received_at)
+    if len(times) >= BACKFILL_COUNT:
+        print("[BACKFILL] History truncated at", BACKFILL_COUNT, "ticks for", pipeline.symbol)
+    print("[BACKFILL]", pipeline.symbol, pipeline.received - before, "ticks merged")
+
+async def stream_ticks(symbols, pipelines, url=DERIV_WS_URL, metrics=None):
+    attempt = 0
     while True:
         try:
-            async with websockets.connect(DERIV_WS_URL) as ws:
+            async with websockets.connect(url) as ws:
+                # One request subscribes every symbol, so a reconnect
+                # resubscribes in a single burst. Subscribing before asking
+                # for history leaves no tick between the two: the overlap is
+                # held back, then dropped as already-seen epochs on merge
                 await ws.send(json.dumps({
-                    "ticks": SYMBOL,
+                    "ticks": list(symbols),
                     "subscribe": 1
                 }))
-                print("[STARTED] Subscribed to ticks")
+                waiting = await request_backfill(ws, pipelines)
+                print("[STARTED] Subscribed to ticks:", ", ".join(symbols))
 
                 while True:
                     msg = await ws.recv()
+                    received_at = time.time()
                     data = json.loads(msg)
+                    attempt = 0
 
                     if "tick" in data:
                         tick = {
@@ -51,11 +115,60 @@ async def stream_ticks():
                             "quote": data["tick"]["quote"]
                         }
 
-                        push_tick(tick)
-                        trim_old_ticks()
+                        if tick["symbol"] in waiting:
+                            waiting[tick["symbol"]].append((tick, received_at))
+                            continue
+                        pipeline = pipelines.get(tick["symbol"])
+                        if pipeline:
+                            pipeline.push(tick, received_at)
+                    elif data.get("msg_type") == "history":
+                        symbol = data["echo_req"]["ticks_history"]
+                        buffered = waiting.pop(symbol, [])
+                        if "error" in data:
+                            print("[BACKFILL ERROR]", symbol, data["error"].get("message"))
+                        merge_history(pipelines[symbol], data.get("history") or {}, buffered)
+                    elif "error" in data:
+                        print("[DERIV ERROR]", data["error"].get("message"))
         except Exception as e:
-            print("[ERROR]", e)
-            time.sleep(5)
+            if metrics is not None:
+                metrics.reconnects += 1
+            delay = backoff_delay(attempt)
+            attempt += 1
+            print("[ERROR]", e, f"- reconnecting in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+async def main(symbols=SYMBOLS):
+    journal = TickJournal(JOURNAL_DIR, segment_size=JOURNAL_SEGMENT_SIZE)
+    print("[JOURNAL] Unacknowledged ticks to replay:", len(journal.pending))
+    try:
+        async with create_session() as session:
+            pipelines = {}
+            for symbol in symbols:
+                pipeline = SymbolPipeline(
+                    session, FIREBASE_URL, symbol,
+                    flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL, max_queue=WRITE_QUEUE_SIZE,
+                    max_records=MAX_RECORDS, retention_interval=RETENTION_INTERVAL, journal=journal,
+                    timeframes=CANDLE_TIMEFRAMES, candle_update_interval=CANDLE_UPDATE_INTERVAL,
+                    candle_max_records=CANDLE_MAX_RECORDS,
+                )
+                pipelines[symbol] = pipeline
+
+            replayer = JournalReplayer(
+                journal, session, FIREBASE_URL, pipelines,
+                interval=REPLAY_INTERVAL, replay_after=REPLAY_AFTER,
+            )
+            metrics = IngestMetrics(pipelines, replayer)
+            await metrics.serve(METRICS_HOST, METRICS_PORT)
+
+            tasks = [task for pipeline in pipelines.values() for task in pipeline.tasks()]
+            await asyncio.gather(
+                *tasks,
+                replayer.run(),
+                stream_ticks(symbols, pipelines, metrics=metrics),
+                report_status(metrics),
+            )
+    finally:
+        journal.close()
 
 if __name__ == "__main__":
-    asyncio.run(stream_ticks())
+    asyncio.run(main())
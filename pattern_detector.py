@@ -1,96 +1,228 @@
 import numpy as np
-import pandas as pd
-from scipy.signal import argrelextrema
 import asyncio
-import aiohttp
 from datetime import datetime
 import json
 import logging
+import time
+
+from detector.extrema import IncrementalExtrema
+from detector.http import ConnectionStats, create_session
+from detector.outcomes import OutcomeTracker
+from detector.signals import FAMILIES, SignalRanker, signal_key
+from detector.stream import FirebaseEventStream
+from detector.timeframes import TICK, TIMEFRAMES, Timeframe
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Firebase URLs
+FIREBASE_URL = "https://data-364f1-default-rtdb.firebaseio.com"
 FIREBASE_TICKS_URL = "https://data-364f1-default-rtdb.firebaseio.com/ticks/R_25.json"
 FIREBASE_1MIN_URL = "https://data-364f1-default-rtdb.firebaseio.com/1minVix25.json"
 FIREBASE_SIGNALS_URL = "https://data-364f1-default-rtdb.firebaseio.com/signals.json"  # URL for storing signals
 
+# Consume the Firebase event stream instead of polling the whole tick node
+USE_STREAMING = True
+
+# Evaluate every pattern and write all ranked signals in one batch, instead
+# of sending only the first pattern that fires
+BATCH_SIGNALS = True
+
+# Symbol whose tick node is read when no URLs are given
+SYMBOL = "R_25"
+
+# Open signals that hit neither take-profit nor stop-loss within this many
+# seconds are closed as timed out; resolved outcomes are written back at
+# most once per OUTCOME_FLUSH_INTERVAL seconds
+OUTCOME_MAX_AGE = 3600
+OUTCOME_FLUSH_INTERVAL = 5
+
+
+def symbol_urls(symbol, base_url=FIREBASE_URL):
+    """(ticks, 1-minute candles) URLs of a symbol, as written by the ingester."""
+    # Same node names as ingest.candles.candle_node: R_25 -> 1minVix25
+    name = f"Vix{symbol[2:]}" if symbol.startswith("R_") else symbol
+    return f"{base_url}/ticks/{symbol}.json", f"{base_url}/1min{name}.json"
+
+
 class PatternDetector:
-    def __init__(self):
-        self.data = pd.DataFrame()
+    def __init__(self, ticks_url=None, one_min_url=None,
+                 signals_url=FIREBASE_SIGNALS_URL, max_points=1000, batch_signals=BATCH_SIGNALS,
+                 extrema_window=5, engine=None, timeframes=TIMEFRAMES, symbol=SYMBOL):
+        default_ticks_url, default_one_min_url = symbol_urls(symbol)
+        self.symbol = symbol
+        self.ticks_url = ticks_url or default_ticks_url
+        self.one_min_url = one_min_url or default_one_min_url
+        self.signals_url = signals_url
         self.last_detected_pattern = None
         self.last_signal_time = None
         self.min_pattern_points = 5  # Minimum number of points to detect a pattern
         self.signal_cooldown = 300  # 5 minutes cooldown between signals
+        self.family_signal_times = {}  # (timeframe, pattern family) -> last signal time (batch mode)
+
+        # Tick series (epoch ms, price) fed by polling or the event stream,
+        # plus bar series built from the same ticks; each keeps its own
+        # peak/trough engine and detector set in step with it
+        self.max_points = max_points
+        self.extrema_window = extrema_window
+        self.timeframes = {TICK: Timeframe(TICK, None, max_points, extrema_window, engine)}
+        for label, seconds in timeframes.items():
+            self.timeframes[label] = Timeframe(label, seconds, max_points, extrema_window)
+        self.data_ready = asyncio.Event()
+
+        # All detect_* predicates evaluated from one shared feature pass
+        self.batch_signals = batch_signals
+        self.ranker = SignalRanker()
+
+        # Sent signals tracked until their take-profit or stop-loss is hit
+        self.outcomes = OutcomeTracker(max_age=OUTCOME_MAX_AGE)
+        self.outcome_flush_interval = OUTCOME_FLUSH_INTERVAL
+        self._outcomes_flushed = 0.0
+
+        # One pooled session for all Firebase I/O, opened by start()
+        self.session = None
+        self.connection_stats = ConnectionStats()
+
+        # Engine behind identify_peaks_and_troughs(df) and the last row it was fed
+        self._frame_extrema = None
+        self._frame_extrema_last = None
+        self._frame_extrema_start = 0
+
+    @property
+    def ticks(self):
+        return self.timeframes[TICK]
+
+    @property
+    def store(self):
+        return self.ticks.store
+
+    @store.setter
+    def store(self, store):
+        self.ticks.store = store
+
+    @property
+    def extrema(self):
+        return self.ticks.extrema
+
+    @extrema.setter
+    def extrema(self, extrema):
+        self.ticks.extrema = extrema
+
+    @property
+    def engine(self):
+        return self.ticks.engine
+
+    @engine.setter
+    def engine(self, engine):
+        self.ticks.engine = engine
+
+    async def start(self):
+        """Open the shared HTTP session (idempotent)."""
+        if self.session is None or self.session.closed:
+            self.session = create_session(self.connection_stats)
+        return self.session
+
+    async def close(self):
+        """Close the shared HTTP session and log its connection reuse."""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+            logger.info(f"Connection stats: {self.connection_stats.as_dict()}")
+        self.session = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
 
     async def fetch_data(self):
-        """Fetch the latest tick data from Firebase."""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(FIREBASE_TICKS_URL) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._process_ticks_data(data)
-                else:
-                    logger.error(f"Failed to fetch data: {response.status}")
-                    return None
+        """Fetch the latest tick data from Firebase into the tick store."""
+        session = await self.start()
+        async with session.get(self.ticks_url) as response:
+            if response.status == 200:
+                data = await response.json()
+                return self._process_ticks_data(data)
+            else:
+                logger.error(f"Failed to fetch data: {response.status}")
+                return None
 
     async def fetch_1min_data(self):
         """Fetch the 1-minute candle data from Firebase."""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(FIREBASE_1MIN_URL) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._process_1min_data(data)
-                else:
-                    logger.error(f"Failed to fetch 1-minute data: {response.status}")
-                    return None
+        session = await self.start()
+        async with session.get(self.one_min_url) as response:
+            if response.status == 200:
+                data = await response.json()
+                return self._process_1min_data(data)
+            else:
+                logger.error(f"Failed to fetch 1-minute data: {response.status}")
+                return None
 
+    @staticmethod
     def detect_patterns(tick_data):
-    """
-    Analyze tick data to detect patterns.
-    Returns a list of dictionaries with keys: entry_price, stop_loss, take_profit, pattern
-    """
-    patterns = []
-    # Your pattern detection logic here
-    # For example:
-    if len(tick_data) >= 3:
-        last_tick = tick_data[-1]
-        prev_tick = tick_data[-2]
-        if last_tick["quote"] > prev_tick["quote"]:
-            pattern = {
-                "entry_price": last_tick["quote"],
-                "stop_loss": last_tick["quote"] - 0.1,
-                "take_profit": last_tick["quote"] + 0.2,
-                "pattern": "Uptrend"
-            }
-            patterns.append(pattern)
-    return patterns
-
+        """
+        Analyze tick data to detect patterns.
+        Returns a list of dictionaries with keys: entry_price, stop_loss, take_profit, pattern
+        """
+        patterns = []
+        # Your pattern detection logic here
+        # For example:
+        if len(tick_data) >= 3:
+            last_tick = tick_data[-1]
+            prev_tick = tick_data[-2]
+            if last_tick["quote"] > prev_tick["quote"]:
+                pattern = {
+                    "entry_price": last_tick["quote"],
+                    "stop_loss": last_tick["quote"] - 0.1,
+                    "take_profit": last_tick["quote"] + 0.2,
+                    "pattern": "Uptrend"
+                }
+                patterns.append(pattern)
+        return patterns
 
     def _process_ticks_data(self, data):
-        """Process raw tick data into usable DataFrame."""
+        """Append ticks newer than the store's latest; returns the store, or None."""
         if not data:
             return None
-            
-        # Convert to DataFrame (adjust according to your actual data structure)
-        df = pd.DataFrame(list(data.values()))
-        
-        # Assuming your data has 'timestamp' and 'price' columns
-        # Adjust column names according to your actual data structure
-        if 'time' in df.columns and 'quote' in df.columns:
-            df = df[['time', 'quote']].rename(columns={'time': 'timestamp', 'quote': 'price'})
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df = df.sort_values('timestamp')
-            return df
-        else:
+
+        added = self.append_ticks(data.values())
+        if not added and not len(self.store):
             logger.error("Expected columns not found in tick data")
             return None
+        return self.store
+
+    async def fetch_1min_bars(self):
+        """Fetch the latest closed 1-minute candles as sorted (time in ms, close) pairs."""
+        session = await self.start()
+        # Only as many as the 1m series holds; candle keys are bucket starts
+        # in epoch seconds, so key order is time order
+        url = f'{self.one_min_url}?orderBy="$key"&limitToLast={self.max_points}'
+        async with session.get(url) as response:
+            if response.status == 200:
+                return self._1min_bars(await response.json())
+            else:
+                logger.error(f"Failed to fetch 1-minute data: {response.status}")
+                return None
+
+    @staticmethod
+    def _1min_bars(data):
+        """(time, close) of every closed candle, without going through pandas."""
+        if not isinstance(data, dict):
+            return []
+        return sorted(
+            (int(candle["time"]), float(candle["close"]))
+            for candle in data.values()
+            if isinstance(candle, dict) and "time" in candle and "close" in candle
+            and candle.get("closed", True)
+        )
 
     def _process_1min_data(self, data):
         """Process 1-minute candle data into usable DataFrame."""
         if not data:
             return None
+
+        import pandas as pd
             
         # Convert to DataFrame (adjust according to your actual data structure)
         df = pd.DataFrame(list(data.values()))
@@ -105,25 +237,121 @@ class PatternDetector:
             logger.error("Expected columns not found in 1-minute data")
             return None
 
-    def identify_peaks_and_troughs(self, df, window=5):
-        """Identify peaks and troughs in the price data."""
+    @staticmethod
+    def _tick_point(tick):
+        """Return (time in ms, price) for a tick, or None if it is not a tick."""
+        if not isinstance(tick, dict) or "quote" not in tick:
+            return None
+        if "time" in tick:
+            return int(tick["time"]), float(tick["quote"])
+        if "epoch" in tick:
+            return int(tick["epoch"]) * 1000, float(tick["quote"])
+        return None
+
+    def append_ticks(self, ticks):
+        """Append ticks newer than the last one held; returns how many were added."""
+        last = self.store.last_time
+        points = [p for p in map(self._tick_point, ticks)
+                  if p is not None and (last is None or p[0] > last)]
+        points.sort()
+        added = 0
+        for time_ms, price in points:
+            if time_ms == last:
+                continue
+            for timeframe in self.timeframes.values():
+                timeframe.add(time_ms, price)
+            if self.outcomes.has_open():
+                self.outcomes.update(self.symbol, time_ms, price)
+            last = time_ms
+            added += 1
+        if added:
+            self.data_ready.set()
+        return added
+
+    def apply_event(self, event, path, data):
+        """Apply one Firebase put/patch event to the in-memory series.
+
+        New ticks are appended. Deleted ones (null values, from retention
+        trimming the node's oldest ticks) are dropped from the front of the
+        tick store; bars already built from them are kept. Returns how many
+        ticks were added.
+        """
+        if path == "/":
+            if data is None:
+                self.store.discard()  # the whole node was deleted
+                return 0
+            children = data if isinstance(data, dict) else {}
+        elif event == "put" and path.count("/") == 1:
+            children = {path[1:]: data}
+        else:
+            return 0  # a change inside one tick
+
+        deleted = [key for key, value in children.items() if value is None]
+        if deleted:
+            self.store.discard(int(key) * 1000 for key in deleted if key.isdigit())
+        return self.append_ticks(value for value in children.values() if value is not None)
+
+    def current_extrema(self):
+        """Peaks and troughs of the stored series as window-relative arrays.
+
+        Returns (peak_idx, peak_values, trough_idx, trough_values), equal to
+        identify_peaks_and_troughs on the same window.
+        """
+        return self.extrema.extrema(self.store.prices(), self.store.start)
+
+    def _sync_extrema(self, df, window):
+        """Feed the extrema engine the rows of `df` it has not seen yet.
+
+        `df` is expected to be the previous window moved forward. Anything
+        else (a gap, reordered or reloaded history, a different window)
+        rebuilds the engine from `df`. Returns the absolute index of the
+        first row.
+        """
+        prices = df['price'].to_numpy(dtype=np.float64)
+        times = df['timestamp'].to_numpy()
+
+        engine = self._frame_extrema
+        seen = 0
+        if engine is not None and engine.order == window and self._frame_extrema_last is not None:
+            last_time, last_price = self._frame_extrema_last
+            seen = int(np.searchsorted(times, last_time, side='right'))
+            start = engine.count - seen
+            if (seen and (start < self._frame_extrema_start
+                          or times[seen - 1] != last_time or prices[seen - 1] != last_price)):
+                seen = 0
+
+        if seen:
+            # Only the new tail goes through the per-price path
+            engine.extend(prices[seen:])
+        else:
+            # First call, a gap or reloaded history: rebuild in one vectorized pass
+            engine = self._frame_extrema = IncrementalExtrema.from_prices(prices, window)
+        self._frame_extrema_last = (times[-1], prices[-1])
+        self._frame_extrema_start = engine.count - len(prices)
+        return self._frame_extrema_start
+
+    def identify_peaks_and_troughs(self, df, window=None):
+        """Identify peaks and troughs in the price data.
+
+        Same result as `argrelextrema(prices, np.greater_equal/np.less_equal,
+        order=window)`, but only rows added since the last call are processed.
+        """
         if df is None or df.empty:
             return None, None
-            
-        # Create a copy to avoid modifying the original
-        data = df.copy()
-        
-        # Get indices of local maxima and minima
-        max_idx = argrelextrema(data['price'].values, np.greater_equal, order=window)[0]
-        min_idx = argrelextrema(data['price'].values, np.less_equal, order=window)[0]
-        
+
+        window = window or self.extrema_window
+        start = self._sync_extrema(df, window)
+        max_idx, max_val, min_idx, min_val = self._frame_extrema.extrema(df['price'].to_numpy(dtype=np.float64), start)
+
         # Create Series for peaks and troughs
-        peaks = pd.Series(data['price'].iloc[max_idx].values, index=data.iloc[max_idx].index)
-        troughs = pd.Series(data['price'].iloc[min_idx].values, index=data.iloc[min_idx].index)
-        
+        import pandas as pd
+
+        peaks = pd.Series(max_val, index=df.index[max_idx])
+        troughs = pd.Series(min_val, index=df.index[min_idx])
+
         return peaks, troughs
 
-    def detect_head_and_shoulders(self, peaks, troughs):
+    def detect_head_and_shoulders(self, peaks, troughs, tolerance=0.05):
         """Detect Head and Shoulders pattern."""
         if len(peaks) < 3 or len(troughs) < 2:
             return False, None
@@ -135,7 +363,7 @@ class PatternDetector:
         # Head and Shoulders: middle peak higher than other two, troughs roughly equal
         if (last_peaks[1] > last_peaks[0] and 
             last_peaks[1] > last_peaks[2] and
-            abs(last_troughs[0] - last_troughs[1]) / last_troughs[0] < 0.05):
+            abs(last_troughs[0] - last_troughs[1]) / last_troughs[0] < tolerance):
             
             # Calculate entry, stop loss and take profit
             entry_price = last_troughs[1]
@@ -152,7 +380,7 @@ class PatternDetector:
         
         return False, None
 
-    def detect_inverse_head_and_shoulders(self, peaks, troughs):
+    def detect_inverse_head_and_shoulders(self, peaks, troughs, tolerance=0.05):
         """Detect Inverse Head and Shoulders pattern."""
         if len(troughs) < 3 or len(peaks) < 2:
             return False, None
@@ -164,7 +392,7 @@ class PatternDetector:
         # Inverse Head and Shoulders: middle trough lower than other two, peaks roughly equal
         if (last_troughs[1] < last_troughs[0] and 
             last_troughs[1] < last_troughs[2] and
-            abs(last_peaks[0] - last_peaks[1]) / last_peaks[0] < 0.05):
+            abs(last_peaks[0] - last_peaks[1]) / last_peaks[0] < tolerance):
             
             # Calculate entry, stop loss and take profit
             entry_price = last_peaks[1]
@@ -604,7 +832,7 @@ class PatternDetector:
         
         return False, None
 
-    def detect_rectangle(self, peaks, troughs, df, window=10):
+    def detect_rectangle(self, peaks, troughs, df, window=10, std_ratio=0.03):
         """Detect Rectangle pattern (consolidation)."""
         if len(peaks) < 2 or len(troughs) < 2:
             return False, None
@@ -625,7 +853,7 @@ class PatternDetector:
         trough_mean = np.mean(recent_troughs.values)
         
         # Check if peaks and troughs are relatively consistent
-        if (peak_std / peak_mean < 0.03 and trough_std / trough_mean < 0.03):
+        if (peak_std / peak_mean < std_ratio and trough_std / trough_mean < std_ratio):
             # Current price to determine breakout direction
             current_price = df['price'].iloc[-1]
             
@@ -750,105 +978,256 @@ class PatternDetector:
         
     async def send_signal(self, signal_data):
         """Send detected pattern signal to Firebase."""
-        # Add timestamp to signal data
+        # Add timestamp and symbol to signal data
         signal_data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        signal_data["symbol"] = self.symbol
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(FIREBASE_SIGNALS_URL, json=signal_data) as response:
-                    if response.status == 200:
-                        logger.info(f"Signal sent successfully: {signal_data['pattern']}")
-                        return True
-                    else:
-                        logger.error(f"Failed to send signal: {response.status}")
-                        return False
+            session = await self.start()
+            async with session.post(self.signals_url, json=signal_data) as response:
+                if response.status == 200:
+                    logger.info(f"Signal sent successfully: {signal_data['pattern']}")
+                    key = (await response.json()).get("name")
+                    if key:
+                        self.track_outcome(key, signal_data)
+                    return True
+                else:
+                    logger.error(f"Failed to send signal: {response.status}")
+                    return False
         except Exception as e:
             logger.error(f"Error sending signal: {str(e)}")
             return False
     
-    def can_send_signal(self):
-        """Check if we can send a signal (cooldown period)."""
-        if self.last_signal_time is None:
+    async def send_signals(self, ranked):
+        """Write a batch of (detector, signal) pairs to Firebase in one PATCH."""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        now_ms = int(time.time() * 1000)
+        payload = {}
+        for detector, signal_data in ranked:
+            signal_data["timestamp"] = timestamp
+            signal_data["symbol"] = self.symbol
+            payload[signal_key(now_ms, detector, signal_data.get("timeframe", TICK), self.symbol)] = signal_data
+
+        try:
+            session = await self.start()
+            async with session.patch(self.signals_url, json=payload) as response:
+                if response.status == 200:
+                    logger.info(f"Sent {len(payload)} signals: {', '.join(s['pattern'] for s in payload.values())}")
+                    for key, signal_data in payload.items():
+                        self.track_outcome(key, signal_data)
+                    return True
+                else:
+                    logger.error(f"Failed to send signals: {response.status}")
+                    return False
+        except Exception as e:
+            logger.error(f"Error sending signals: {str(e)}")
+            return False
+
+    def track_outcome(self, key, signal_data):
+        """Follow a sent signal (child `key` of the signals node) until it resolves."""
+        time_ms = self.store.last_time
+        if time_ms is not None:
+            self.outcomes.add(key, signal_data, self.symbol, time_ms)
+
+    async def flush_outcomes(self, force=False):
+        """Write resolved outcomes under their signals in one multi-path PATCH.
+
+        Outcomes are batched for `outcome_flush_interval` seconds unless
+        `force`; on failure they are kept and retried with the next batch.
+        """
+        if not self.outcomes.pending:
+            return 0
+        now = time.monotonic()
+        if not force and now - self._outcomes_flushed < self.outcome_flush_interval:
+            return 0
+        self._outcomes_flushed = now
+        payload = self.outcomes.flush()
+
+        try:
+            session = await self.start()
+            async with session.patch(self.signals_url, json=payload) as response:
+                if response.status == 200:
+                    logger.info(f"Wrote {len(payload)} signal outcomes")
+                    return len(payload)
+                logger.error(f"Failed to write signal outcomes: {response.status}")
+        except Exception as e:
+            logger.error(f"Error writing signal outcomes: {str(e)}")
+        for path, record in payload.items():
+            self.outcomes.pending.setdefault(path.rsplit("/", 1)[0], record)
+        return 0
+
+    def can_send_signal(self, family=None, timeframe=TICK):
+        """Check if we can send a signal (cooldown period).
+
+        With a pattern family the cooldown is tracked for that family on
+        `timeframe` only; without one it is the global cooldown used by
+        detect_and_signal.
+        """
+        last = self.last_signal_time if family is None else self.family_signal_times.get((timeframe, family))
+        if last is None:
             return True
             
         now = datetime.now()
-        seconds_since_last_signal = (now - self.last_signal_time).total_seconds()
+        seconds_since_last_signal = (now - last).total_seconds()
         
         return seconds_since_last_signal > self.signal_cooldown
     
     async def run_detection(self):
         """Main method to run pattern detection."""
         # Fetch latest data
-        df = await self.fetch_data()
-        if df is None or len(df) < self.min_pattern_points:
+        await self.fetch_data()
+        return await self.detect_signals()
+
+    async def detect_signals(self):
+        """Run one detection cycle in the configured mode; returns the signals sent."""
+        if self.batch_signals:
+            return await self.detect_and_signal_all()
+        signal = await self.detect_and_signal()
+        return [signal] if signal else []
+
+    def due_timeframes(self):
+        """Timeframes to evaluate this cycle: ticks always, bars only once one has closed."""
+        if len(self.store) < self.min_pattern_points:
             logger.warning("Not enough data for pattern detection")
-            return None
-            
-        # Identify peaks and troughs
-        peaks, troughs = self.identify_peaks_and_troughs(df)
-        if peaks is None or troughs is None:
-            logger.warning("Could not identify peaks and troughs")
-            return None
-            
-        # Dictionary to store detection methods and their results
-        detection_methods = [
-            self.detect_head_and_shoulders,
-            self.detect_inverse_head_and_shoulders,
-            self.detect_double_top,
-            self.detect_double_bottom,
-            self.detect_triple_top,
-            self.detect_triple_bottom,
-            lambda p, t: self.detect_falling_wedge(p, t, df),
-            lambda p, t: self.detect_rising_wedge(p, t, df),
-            lambda p, t: self.detect_flag(p, t, df),
-            lambda p, t: self.detect_pennant(p, t, df),
-            lambda p, t: self.detect_ascending_triangle(p, t, df),
-            lambda p, t: self.detect_descending_triangle(p, t, df),
-            lambda p, t: self.detect_diamond(p, t, df),
-            lambda p, t: self.detect_cup_and_handle(p, t, df),
-            lambda p, t: self.detect_rectangle(p, t, df),
-            lambda p, t: self.detect_broadening_triangle(p, t, df),
-            lambda p, t: self.detect_symmetrical_triangle(p, t, df)
+        return [
+            timeframe for timeframe in self.timeframes.values()
+            if (timeframe.seconds is None or timeframe.due) and len(timeframe) >= self.min_pattern_points
         ]
-        
+
+    async def detect_and_signal(self):
+        """Evaluate every pattern over the due series and send the first signal found.
+
+        Patterns are tried in the same order as the detect_* methods (ticks
+        first, then bars from short to long); the engine produces the same
+        (detected, signal) result for each.
+        """
+        timeframes = self.due_timeframes()
+        if not timeframes:
+            return None
+
         # Check if we can send a signal
         if not self.can_send_signal():
             logger.info("Signal cooldown period still active")
             return None
-            
-        # Run all detection methods
-        for detect_method in detection_methods:
-            detected, signal_data = detect_method(peaks, troughs)
-            
-            if detected:
-                logger.info(f"Pattern detected: {signal_data['pattern']}")
-                
+
+        for timeframe in timeframes:
+            for _, signal_data in timeframe.detect():
+                logger.info(f"Pattern detected: {signal_data['pattern']} ({timeframe.label})")
+
                 # Send signal to Firebase
                 if await self.send_signal(signal_data):
                     self.last_detected_pattern = signal_data["pattern"]
                     self.last_signal_time = datetime.now()
                     return signal_data
-                    
+
         return None
 
-async def main():
-    """Main function to run the pattern detector."""
-    detector = PatternDetector()
-    
-    logger.info("Starting pattern detection service")
-    
-    while True:
+    async def detect_and_signal_all(self):
+        """Evaluate every pattern and send all ranked, non-overlapping signals in one write.
+
+        Each due timeframe is ranked on its own. Patterns whose family is
+        still cooling down on that timeframe are skipped before ranking, so
+        they cannot suppress overlapping signals from others.
+        """
+        ranked = []
+        for timeframe in self.due_timeframes():
+            detections = [
+                (detector, signal_data)
+                for detector, signal_data in timeframe.detect()
+                if self.can_send_signal(FAMILIES[detector], timeframe.label)
+            ]
+            if detections:
+                ranked.extend(self.ranker.rank(detections))
+        if not ranked:
+            return []
+
+        if not await self.send_signals(ranked):
+            return []
+
+        now = datetime.now()
+        for _, signal_data in ranked:
+            self.family_signal_times[(signal_data["timeframe"], signal_data["family"])] = now
+        self.last_detected_pattern = ranked[0][1]["pattern"]
+        self.last_signal_time = now
+        return [signal_data for _, signal_data in ranked]
+
+    async def load_history(self):
+        """Seed the 1m series with the closed candles from the 1-minute node."""
+        timeframe = self.timeframes.get("1m")
+        if timeframe is None or not self.one_min_url:
+            return 0
         try:
-            signal = await detector.run_detection()
-            if signal:
-                logger.info(f"Signal sent: {signal['pattern']} at price {signal['entry_price']}")
-            
-            # Sleep for a bit before checking again
-            await asyncio.sleep(5)  # Check every 5 seconds
-            
+            bars = await self.fetch_1min_bars()
         except Exception as e:
-            logger.error(f"Error in main loop: {str(e)}")
-            await asyncio.sleep(10)  # Sleep a bit longer on error
+            logger.warning(f"Could not load 1-minute history: {str(e)}")
+            return 0
+        if not bars:
+            return 0
+        times, closes = zip(*bars)
+        added = timeframe.seed(times, closes)
+        logger.info(f"Loaded {added} 1-minute bars")
+        return added
+
+    async def consume_stream(self, stream=None):
+        """Append ticks from the Firebase event stream as they arrive."""
+        stream = stream or FirebaseEventStream(self.ticks_url, session=await self.start())
+        async for event, path, data in stream:
+            self.apply_event(event, path, data)
+
+    async def run_streaming(self, stream=None):
+        """Detect patterns as soon as new ticks arrive on the event stream.
+
+        Detection runs on the latest series; ticks arriving while a cycle is
+        in progress are picked up by the next one.
+        """
+        await self.load_history()
+        consumer = asyncio.ensure_future(self.consume_stream(stream))
+        try:
+            while True:
+                await self.data_ready.wait()
+                self.data_ready.clear()
+                if consumer.done():
+                    consumer.result()  # surface a crashed consumer
+                try:
+                    for signal in await self.detect_signals():
+                        logger.info(f"Signal sent: {signal['pattern']} ({signal['timeframe']}) at price {signal['entry_price']}")
+                    await self.flush_outcomes()
+                except Exception as e:
+                    logger.error(f"Error in detection: {str(e)}")
+        finally:
+            consumer.cancel()
+            await self.flush_outcomes(force=True)
+
+    async def run_polling(self, interval=5):
+        """Fetch the tick node and run detection every `interval` seconds."""
+        await self.load_history()
+        cycles = 0
+        while True:
+            try:
+                for signal in await self.run_detection():
+                    logger.info(f"Signal sent: {signal['pattern']} ({signal['timeframe']}) at price {signal['entry_price']}")
+                await self.flush_outcomes()
+
+                cycles += 1
+                if cycles % 60 == 0:
+                    logger.info(f"Connection stats: {self.connection_stats.as_dict()}")
+
+                # Sleep for a bit before checking again
+                await asyncio.sleep(interval)
+
+            except Exception as e:
+                logger.error(f"Error in main loop: {str(e)}")
+                await asyncio.sleep(2 * interval)  # Sleep a bit longer on error
+
+async def main(streaming=USE_STREAMING):
+    """Main function to run the pattern detector."""
+    async with PatternDetector() as detector:
+        logger.info("Starting pattern detection service")
+
+        if streaming:
+            await detector.run_streaming()
+        else:
+            await detector.run_polling()
 
 if __name__ == "__main__":
     asyncio.run(main())
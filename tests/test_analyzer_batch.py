@@ -0,0 +1,78 @@
+"""Analyzer.update_many against one Analyzer.update call per tick."""
+
+import numpy as np
+import pytest
+
+from analyzer.analyzer import Analyzer
+from analyzer.extrema import HIGH, LOW
+
+WINDOW = 50
+
+
+def state(analyzer):
+    """Everything that decides an Analyzer's future output."""
+    snapshot = {
+        "window": (analyzer.window.count, analyzer.window.prices().tolist(), analyzer.window.times().tolist()),
+        "tracker": (analyzer.extrema.count, list(analyzer.extrema._recent),
+                    list(analyzer.extrema._max), list(analyzer.extrema._min)),
+    }
+    for name in ("hs_analyzer", "dtb_analyzer", "trendline_analyzer"):
+        sub = getattr(analyzer, name)
+        snapshot[name] = (
+            sub.pending_retest, sub.size,
+            sub.extrema.highs(), sub.extrema.lows(), sub.extrema.trend(HIGH), sub.extrema.trend(LOW),
+        )
+    trendline = analyzer.trendline_analyzer
+    snapshot["trendline"] = (trendline.trend, trendline.extrema.fit(HIGH), trendline.extrema.fit(LOW)) + tuple(
+        getattr(trendline, attr, None) for attr in (
+            "support_slope", "support_intercept", "support_residual",
+            "resistance_slope", "resistance_intercept", "resistance_residual"))
+    channel = analyzer.channel_analyzer
+    snapshot["channel"] = (channel.bar, list(channel.bars), list(channel.highs), list(channel.lows),
+                          channel.current, channel.last_signal_time)
+    return snapshot
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_update_many_matches_tick_by_tick(seed):
+    rng = np.random.default_rng(seed)
+    n = 6000
+    prices = 100 + np.cumsum(rng.normal(0, 0.05, n))
+    if seed % 2:
+        prices = np.round(prices, 1)  # ties between extrema
+    timestamps = 1_700_000_000 + np.arange(n)
+
+    reference, batched = Analyzer(WINDOW), Analyzer(WINDOW)
+    expected, emitted = {}, {}
+    # The second chunk crosses the window_size eviction boundary
+    sizes = [30, 40] + rng.integers(1, 3 * WINDOW, n).tolist()
+    pending_seen = set()
+    start = 0
+    for size in sizes:
+        if start >= n:
+            break
+        stop = min(n, start + size)
+        for i in range(start, stop):
+            signals = reference.update(float(prices[i]), int(timestamps[i]))
+            if signals:
+                expected[i] = signals
+        chunk = batched.update_many(prices[start:stop], timestamps[start:stop],
+                                    chunk_size=int(rng.integers(1, 100)))
+        emitted.update({start + i: signals for i, signals in chunk.items()})
+        assert emitted == expected
+        assert state(batched) == state(reference)
+        for name in ("hs_analyzer", "dtb_analyzer", "trendline_analyzer"):
+            if getattr(reference, name).pending_retest:
+                pending_seen.add(name)
+        start = stop
+
+    assert emitted == expected
+    # The retest paths were exercised, not only the pattern scans
+    assert "dtb_analyzer" in pending_seen
+    patterns = {signal.get("pattern") for signals in expected.values() for signal in signals}
+    assert any("Double" in str(pattern) for pattern in patterns)
+
+
+def test_update_many_rejects_mismatched_lengths():
+    with pytest.raises(ValueError):
+        Analyzer().update_many([1.0, 2.0], [1])
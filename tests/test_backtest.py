@@ -0,0 +1,91 @@
+"""simulate_outcomes against a per-signal loop, and the parallel detector scan against the serial one."""
+
+import numpy as np
+import pytest
+
+from detector.backtest import SL, TIMEOUT, TP, Backtest, simulate_outcomes, stats, summarize
+
+
+def resolve_one(prices, t, direction, take_profit, stop_loss, horizon):
+    """(outcome, exit_price, exit_at) stepping tick by tick; a stop wins a shared tick."""
+    last = t
+    for i in range(t + 1, min(t + 1 + horizon, len(prices))):
+        price = prices[i]
+        if (price <= stop_loss) if direction > 0 else (price >= stop_loss):
+            return SL, stop_loss, i
+        if (price >= take_profit) if direction > 0 else (price <= take_profit):
+            return TP, take_profit, i
+        last = i
+    return TIMEOUT, prices[last], last
+
+
+def random_trades(rng, n, count):
+    entry_at = rng.integers(0, n, count)
+    direction = rng.choice([-1, 1], count)
+    reward, risk = rng.uniform(0.05, 3.0, count), rng.uniform(0.05, 3.0, count)
+    return entry_at, direction, reward, risk
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_per_signal_loop(seed):
+    rng = np.random.default_rng(seed)
+    prices = 100.0 + np.cumsum(rng.normal(0, 0.3, 3000))
+    entry_at, direction, reward, risk = random_trades(rng, len(prices), 1500)
+    entry = prices[entry_at]
+    take_profit = entry + direction * reward
+    stop_loss = entry - direction * risk
+    horizon = int(rng.integers(5, 200))
+
+    # A chunk smaller than the trade count, so several chunks and a ragged last one
+    outcome, exit_price, exit_at = simulate_outcomes(prices, entry_at, direction, take_profit, stop_loss,
+                                                     horizon, chunk=97)
+    for i in range(len(entry_at)):
+        expected = resolve_one(prices, entry_at[i], direction[i], take_profit[i], stop_loss[i], horizon)
+        assert (outcome[i], exit_price[i], exit_at[i]) == expected, i
+
+    assert {TP, SL, TIMEOUT} <= set(outcome.tolist())
+    # Chunking does not change anything
+    whole = simulate_outcomes(prices, entry_at, direction, take_profit, stop_loss, horizon)
+    for ours, theirs in zip((outcome, exit_price, exit_at), whole):
+        assert np.array_equal(ours, theirs)
+
+
+def test_edge_cases():
+    prices = np.array([100.0, 100.5, 103.0, 96.0, 100.0, 101.0])
+    outcome, exit_price, exit_at = simulate_outcomes(
+        prices,
+        entry_at=[0, 0, 1, 1, 4, 5, 2],
+        direction=[1, -1, 1, 1, 1, 1, -1],
+        take_profit=[102.0, 99.0, 102.0, 110.0, 110.0, 110.0, 96.0],
+        stop_loss=[99.0, 101.0, 103.0, 90.0, 90.0, 90.0, 104.0],
+        horizon=2, chunk=3,
+    )
+    assert outcome.tolist() == [
+        TP,       # touched at tick 2
+        SL,       # 103 is past a short's stop at 101
+        SL,       # tick 2 reaches both 102 and 103: the stop wins
+        TIMEOUT,  # neither within two ticks: exits at the horizon's last price
+        TIMEOUT,  # the archive ends after one more tick
+        TIMEOUT,  # entered on the last tick
+        TP,       # short reaches 96 on tick 3
+    ]
+    assert exit_price.tolist() == [102.0, 101.0, 103.0, 96.0, 101.0, 101.0, 96.0]
+    assert exit_at.tolist() == [2, 2, 2, 3, 5, 5, 3]
+
+    empty = simulate_outcomes(prices, [], [], [], [], horizon=5)
+    assert [len(column) for column in empty] == [0, 0, 0]
+
+
+def test_parallel_scan_matches_serial():
+    rng = np.random.default_rng(7)
+    n = 4000
+    prices = 100.0 + np.cumsum(rng.normal(0, 0.4, n))
+    epochs = 1_700_000_000 + np.arange(n)
+    serial = Backtest(epochs, prices, window=200, stride=3, horizon=100, cooldown=30).run(jobs=1)
+    parallel = Backtest(epochs, prices, window=200, stride=3, horizon=100, cooldown=30).run(jobs=2)
+
+    assert len(serial["entry_at"]) > 50
+    for key, column in serial.items():
+        assert np.array_equal(column, parallel[key], equal_nan=column.dtype.kind == "f"), key
+    assert stats(serial) == stats(parallel)
+    assert summarize(serial) == summarize(parallel)
@@ -0,0 +1,108 @@
+"""Candles from the tick stream: published once per closed bucket, kept bounded, read back bounded."""
+
+import asyncio
+
+from ingest import CandleAggregator, SymbolPipeline
+from pattern_detector import PatternDetector
+
+
+class FakeResponse:
+    def __init__(self, data=None):
+        self.status = 200
+        self.data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self):
+        return self.data
+
+
+class FakeSession:
+    closed = False
+
+    def __init__(self, data=None):
+        self.data = data
+        self.gets = []
+        self.patches = []
+
+    def get(self, url):
+        self.gets.append(url)
+        return FakeResponse(self.data)
+
+    def patch(self, url, json):
+        self.patches.append((url, dict(json)))
+        return FakeResponse()
+
+
+def test_candle_published_once_when_its_bucket_closes():
+    closed = []
+    candles = CandleAggregator({"1min": 60, "5min": 300}, on_close=lambda label, record: closed.append((label, record)),
+                               update_interval=None)
+    start = 1_700_000_100  # a 5-minute boundary
+    for offset, price in [(0, 10.0), (10, 12.0), (50, 9.0), (59, 11.0)]:
+        candles.add(start + offset, price)
+    assert closed == []
+
+    candles.add(start + 61, 11.5)  # first tick of the next minute closes the first
+    candles.add(start + 30, 50.0)  # late for the closed minute, still inside the open 5 minutes
+    candles.add(start + 65, 11.7)
+    assert closed == [("1min", {"time": start * 1000, "open": 10.0, "high": 12.0, "low": 9.0,
+                                "close": 11.0, "ticks": 4, "closed": True})]
+
+    candles.add(start + 300, 13.0)
+    assert [(label, record["time"] // 1000) for label, record in closed[1:]] == [
+        ("1min", start + 60), ("5min", start)]
+    assert (closed[1][1]["high"], closed[1][1]["ticks"]) == (11.7, 2)
+    assert (closed[2][1]["high"], closed[2][1]["close"], closed[2][1]["ticks"]) == (50.0, 11.7, 7)
+    assert candles.closed == 3
+
+
+def test_seeded_candles_are_not_republished():
+    closed = []
+    candles = CandleAggregator({"1min": 60}, on_close=lambda label, record: closed.append(record),
+                               update_interval=None)
+    start = 1_700_000_040
+    candles.seed([start, start + 10, start + 70], [1.0, 2.0, 3.0])
+    assert closed == []
+    candles.add(start + 121, 4.0)
+    assert [record["time"] // 1000 for record in closed] == [start + 60]
+
+
+def test_pipeline_candle_nodes_are_trimmed():
+    session = FakeSession()
+    pipeline = SymbolPipeline(session, "https://db.example", "R_25", timeframes={"1min": 60},
+                              candle_update_interval=None, candle_max_records=3)
+    start = 1_700_000_040
+    for minute in range(6):
+        pipeline.push({"symbol": "R_25", "epoch": start + 60 * minute, "quote": 100.0 + minute})
+
+    writer = pipeline.candle_writers["1min"]
+    retention = pipeline.candle_retention["1min"]
+
+    async def run():
+        await writer.flush(await writer._collect())
+        return await retention.trim()
+
+    assert asyncio.run(run()) == 2
+    url, candles = session.patches[0]
+    assert url == "https://db.example/1minVix25.json"
+    assert sorted(candles) == [str(start + 60 * minute) for minute in range(5)]
+    assert session.patches[1] == ("https://db.example/1minVix25.json",
+                                  {str(start): None, str(start + 60): None})
+
+
+def test_history_fetch_is_bounded():
+    start = 1_700_000_040
+    data = {str(start + 60 * i): {"time": (start + 60 * i) * 1000, "close": float(i), "closed": True}
+            for i in range(5)}
+    data[str(start + 300)] = {"time": (start + 300) * 1000, "close": 9.0, "closed": False}
+    detector = PatternDetector(one_min_url="https://db.example/1minVix25.json", max_points=250)
+    detector.session = FakeSession(data)
+
+    assert asyncio.run(detector.load_history()) == 5
+    assert detector.session.gets == ['https://db.example/1minVix25.json?orderBy="$key"&limitToLast=250']
+    assert detector.timeframes["1m"].store.last_time == (start + 240) * 1000
@@ -0,0 +1,92 @@
+"""ChannelAnalyzer's levels and signals, streaming and from candles."""
+
+import numpy as np
+import pytest
+
+from analyzer.channel import ChannelAnalyzer
+
+
+def candles_of(ticks, bar_seconds=60):
+    """Bars from in-order ticks, as update builds them."""
+    bars = []
+    for price, timestamp in ticks:
+        start = timestamp - timestamp % bar_seconds
+        if bars and bars[-1]['time'] == start:
+            bar = bars[-1]
+            bar['high'] = max(bar['high'], price)
+            bar['low'] = min(bar['low'], price)
+            bar['close'] = price
+        else:
+            bars.append({'time': start, 'high': price, 'low': price, 'close': price})
+    return bars
+
+
+def expected_channel(bars, window=20, min_bars=10):
+    recent = bars[-window:]
+    if len(recent) < min_bars:
+        return None
+    x = np.array([b['time'] / 60 for b in recent])
+    high_slope = np.polyfit(x, [b['high'] for b in recent], 1)[0]
+    low_slope = np.polyfit(x, [b['low'] for b in recent], 1)[0]
+    if abs(high_slope - low_slope) >= 0.2:
+        return None
+    kind = 'sideways' if abs(high_slope) < 0.01 else 'up' if high_slope > 0 else 'down'
+    return kind, max(b['high'] for b in recent), min(b['low'] for b in recent)
+
+
+def test_detect_channel_levels_are_window_extremes():
+    # Highs and lows alternate, so the fitted lines sit inside the extremes
+    candles = [{'time': 1_700_000_000 + 60 * i,
+                'high': 1.0010 if i % 2 else 1.0008,
+                'low': 0.9990 if i % 2 else 0.9992,
+                'close': 1.0} for i in range(25)]
+    candles[2]['high'] = 1.0050  # out of the last 20 bars
+    analyzer = ChannelAnalyzer()
+    assert analyzer.detect_channel(candles) == {'type': 'sideways', 'high': 1.0010, 'low': 0.9990}
+
+    candles[-1]['close'] = 1.0008
+    signal = analyzer.generate_signal(candles)
+    assert (signal['type'], signal['direction']) == ('sideways', 'sell')
+    assert (signal['entry'], signal['tp'], signal['sl']) == (1.0008, 0.999, 1.0014)
+    assert analyzer.generate_signal(candles) is None  # one per candle
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_update_levels_and_signals(seed):
+    rng = np.random.default_rng(seed)
+    n = 20_000
+    prices = 1.0 + np.cumsum(rng.normal(0, 0.0002, n))
+    times = 1_700_000_000 + np.cumsum(rng.integers(1, 8, n))
+    ticks = list(zip(prices.tolist(), times.tolist()))
+
+    bars = candles_of(ticks)
+    # Bars closed by the time of each tick: all before the tick's own
+    closed = np.searchsorted([b['time'] for b in bars], times - times % 60).tolist()
+    channels = [expected_channel(bars[:k]) for k in range(len(bars))]
+
+    analyzer = ChannelAnalyzer()
+    signals = 0
+    for i, (price, timestamp) in enumerate(ticks):
+        signal = analyzer.update(price, timestamp)
+        expected = channels[closed[i]]
+        current = analyzer.current
+        if expected is None:
+            assert current is None
+            assert signal is None
+            continue
+        kind, high, low = expected
+        assert (current['type'], current['high'], current['low']) == (kind, high, low)
+        if signal:
+            signals += 1
+            if signal['direction'] == 'sell':
+                assert abs(price - high) <= analyzer.min_distance
+                assert signal['tp'] == round(low, 5)
+                assert signal['sl'] == round(high + (high - low) * 0.2, 5)
+            else:
+                assert abs(price - low) <= analyzer.min_distance
+                assert signal['tp'] == round(high, 5)
+                assert signal['sl'] == round(low - (high - low) * 0.2, 5)
+    assert signals > 0
+    # The monotonic deques only hold bars of the window
+    assert 0 < len(analyzer.highs) <= analyzer.window and 0 < len(analyzer.lows) <= analyzer.window
+    assert {b['time'] for b in analyzer.highs} | {b['time'] for b in analyzer.lows} <= {b['time'] for b in analyzer.bars}
@@ -0,0 +1,88 @@
+"""DetectionEngine.detect against PatternDetector's detect_* methods."""
+
+import inspect
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from detector.engine import DETECTORS, DetectionEngine
+from detector.extrema import relative_extrema
+from pattern_detector import PatternDetector
+
+pd = pytest.importorskip("pandas")
+
+# (engine keyword arguments, the same settings as detect_* keyword arguments)
+SETTINGS = [
+    ({}, {}),
+    ({"hs_tolerance": 0.01, "rectangle_window": 6, "rectangle_std_ratio": 0.01},
+     {"head_and_shoulders": {"tolerance": 0.01}, "inverse_head_and_shoulders": {"tolerance": 0.01},
+      "rectangle": {"window": 6, "std_ratio": 0.01}}),
+    ({"hs_tolerance": 0.2, "rectangle_window": 3, "rectangle_std_ratio": 0.06},
+     {"head_and_shoulders": {"tolerance": 0.2}, "inverse_head_and_shoulders": {"tolerance": 0.2},
+      "rectangle": {"window": 3, "std_ratio": 0.06}}),
+]
+
+
+def series(seed, n=400):
+    # Random walks with changing volatility and drift, around a level where
+    # the detectors' relative tolerances bite
+    rng = np.random.default_rng(seed)
+    scale = np.repeat(rng.uniform(0.05, 1.5, n // 50 + 1), 50)[:n]
+    drift = np.repeat(rng.normal(0, 0.1, n // 50 + 1), 50)[:n]
+    prices = 100.0 + np.cumsum(rng.normal(drift, scale))
+    # Half the series on a coarse tick, so equal peaks and troughs occur
+    return np.round(prices * 4) / 4 if seed % 2 else prices
+
+
+def method_results(detector, df, peaks, troughs, kwargs):
+    results = {}
+    for name in DETECTORS:
+        method = getattr(detector, f"detect_{name}")
+        args = (peaks, troughs, df) if "df" in inspect.signature(method).parameters else (peaks, troughs)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fired, signal = method(*args, **kwargs.get(name, {}))
+        if fired:
+            results[name] = signal
+    return results
+
+
+@pytest.mark.parametrize("engine_kwargs,method_kwargs", SETTINGS)
+def test_engine_matches_detect_methods(engine_kwargs, method_kwargs):
+    detector = PatternDetector(one_min_url=None)
+    engine = DetectionEngine(**engine_kwargs)
+    fired = Counter()
+    windows = 0
+
+    for seed in range(8):
+        prices = series(seed)
+        for end in range(12, len(prices) + 1, 7):
+            for length in (15, 40, 120):
+                window = prices[max(0, end - length):end]
+                order = 1 + (end + length) % 5
+                # With extrema of the whole window the last price can never
+                # be past the last peak or trough (clipping makes it one), so
+                # some windows leave their newest prices out of the extrema
+                lag = (end // 7) % 3 * 3
+                peaks_mask, troughs_mask = relative_extrema(window[:len(window) - lag], order)
+                peak_idx, trough_idx = np.flatnonzero(peaks_mask), np.flatnonzero(troughs_mask)
+
+                df = pd.DataFrame({"price": window})
+                peaks = pd.Series(window[peak_idx], index=df.index[peak_idx])
+                troughs = pd.Series(window[trough_idx], index=df.index[trough_idx])
+
+                expected = method_results(detector, df, peaks, troughs, method_kwargs)
+                detections = engine.detect(peak_idx, window[peak_idx], trough_idx, window[trough_idx], window)
+                assert [name for name, _ in detections] == [name for name in DETECTORS if name in expected]
+                for name, signal in detections:
+                    assert signal.keys() == expected[name].keys()
+                    assert signal["pattern"] == expected[name]["pattern"]
+                    assert signal["direction"] == expected[name]["direction"]
+                    for key in ("entry_price", "stop_loss", "take_profit"):
+                        assert signal[key] == pytest.approx(expected[name][key], rel=1e-12), (name, key)
+                fired.update(expected.keys())
+                windows += 1
+
+    assert windows > 500
+    # Every detector fired, and so was compared on firing windows too
+    assert set(fired) == set(DETECTORS), set(DETECTORS) - set(fired)
@@ -0,0 +1,114 @@
+"""PatternDetector.consume_stream against the stand-in Firebase server's event stream."""
+
+import asyncio
+
+import aiohttp
+import numpy as np
+from aiohttp import web
+
+from detector.extrema import relative_extrema
+from detector.standin import StandinFirebaseServer
+from detector.stream import FirebaseEventStream
+from pattern_detector import PatternDetector
+
+EPOCH = 1_700_000_000
+
+
+def held_epochs(detector):
+    return [int(t) // 1000 for t in detector.store.last()[0]]
+
+
+def node_epochs(server):
+    return sorted(int(key) for key in server.data[server.node])
+
+
+async def until(condition, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("timed out waiting for the stream")
+
+
+def test_stream_snapshot_updates_deletions_and_resume():
+    server = StandinFirebaseServer(seed=0)
+    for i in range(5):
+        server.add_tick(epoch=EPOCH + i)
+
+    async def run():
+        runner = web.AppRunner(server.app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        url = f"http://127.0.0.1:{port}/ticks/R_25.json"
+
+        async with PatternDetector(ticks_url=url, one_min_url=None, signals_url=None) as detector:
+            stream = FirebaseEventStream(url, session=detector.session, max_backoff=0.05)
+            consumer = asyncio.ensure_future(detector.consume_stream(stream))
+            try:
+                # Initial put of the whole node at "/"
+                await until(lambda: len(detector.store) == 5)
+                assert held_epochs(detector) == node_epochs(server)
+                assert detector.store.last_price == server.quote
+
+                # Incremental put of one child
+                server.add_tick()
+                await until(lambda: len(detector.store) == 6)
+                assert held_epochs(detector)[-1] == EPOCH + 5
+
+                # Patch of several children at once
+                ticks = {str(EPOCH + i): {"symbol": "R_25", "epoch": EPOCH + i, "quote": 1000.0 + i}
+                         for i in (6, 7)}
+                async with aiohttp.ClientSession() as client:
+                    async with client.patch(url, json=ticks) as response:
+                        assert response.status == 200
+                    await until(lambda: len(detector.store) == 8)
+                    assert detector.store.last_price == 1007.0
+
+                    # Null values delete the oldest ticks, as retention does
+                    trim = {str(EPOCH + i): None for i in range(3)}
+                    async with client.patch(url, json=trim) as response:
+                        assert response.status == 200
+                    await until(lambda: len(detector.store) == 5)
+                assert held_epochs(detector) == node_epochs(server) == list(range(EPOCH + 3, EPOCH + 8))
+
+                # A dropped connection reconnects and the snapshot fills the gap
+                server.drop_streams()
+                await until(lambda: not server.streams[server.node])
+                server.add_tick(epoch=EPOCH + 8)
+                server.add_tick()
+                await until(lambda: stream.connects == 2 and len(detector.store) == 7)
+                server.add_tick()
+                await until(lambda: len(detector.store) == 8)
+                assert held_epochs(detector) == node_epochs(server) == list(range(EPOCH + 3, EPOCH + 11))
+                assert not consumer.done()
+            finally:
+                consumer.cancel()
+                await asyncio.gather(consumer, return_exceptions=True)
+                server.drop_streams()  # instead of waiting for the next keep-alive
+                await runner.cleanup()
+
+    asyncio.run(run())
+
+
+def test_apply_event_deletions():
+    detector = PatternDetector(ticks_url="http://firebase.invalid/ticks/R_25.json", one_min_url=None)
+    ticks = {str(EPOCH + i): {"epoch": EPOCH + i, "quote": 100.0 + i} for i in range(6)}
+    assert detector.apply_event("put", "/", ticks) == 6
+
+    # Only the front goes: a tick deleted from the middle stays held
+    assert detector.apply_event("put", f"/{EPOCH + 3}", None) == 0
+    assert len(detector.store) == 6
+    assert detector.apply_event("patch", "/", {str(EPOCH): None, str(EPOCH + 1): None,
+                                               str(EPOCH + 6): {"epoch": EPOCH + 6, "quote": 106.0}}) == 1
+    assert held_epochs(detector) == list(range(EPOCH + 2, EPOCH + 7))
+    # The extrema window follows the store
+    peaks, troughs = relative_extrema(detector.store.prices(), detector.extrema.order)
+    peak_idx, _, trough_idx, _ = detector.current_extrema()
+    assert peak_idx.tolist() == np.flatnonzero(peaks).tolist()
+    assert trough_idx.tolist() == np.flatnonzero(troughs).tolist()
+
+    assert detector.apply_event("patch", f"/{EPOCH + 6}", {"quote": 1.0}) == 0
+    assert detector.apply_event("put", "/", None) == 0
+    assert len(detector.store) == 0
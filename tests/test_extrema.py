@@ -0,0 +1,119 @@
+"""IncrementalExtrema against scipy's argrelextrema."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.signal import argrelextrema
+
+from detector.extrema import IncrementalExtrema, relative_extrema
+from pattern_detector import PatternDetector
+
+
+def scipy_extrema(prices, order):
+    peaks = argrelextrema(prices, np.greater_equal, order=order)[0]
+    troughs = argrelextrema(prices, np.less_equal, order=order)[0]
+    return peaks, troughs
+
+
+def random_prices(rng, n):
+    # Rounded walks keep plenty of ties, including runs of equal prices
+    prices = np.round(100 + np.cumsum(rng.normal(0, 1, n)), int(rng.integers(0, 2)))
+    flat = rng.integers(0, max(1, n - 10))
+    prices[flat:flat + 10] = prices[flat]
+    return prices
+
+
+def assert_same(result, prices, order):
+    peaks, troughs = scipy_extrema(prices, order)
+    peak_idx, peak_val, trough_idx, trough_val = result
+    np.testing.assert_array_equal(peak_idx, peaks)
+    np.testing.assert_array_equal(peak_val, prices[peaks])
+    np.testing.assert_array_equal(trough_idx, troughs)
+    np.testing.assert_array_equal(trough_val, prices[troughs])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_relative_extrema_matches_scipy(seed):
+    rng = np.random.default_rng(seed)
+    prices = random_prices(rng, int(rng.integers(1, 300)))
+    order = int(rng.integers(1, 12))
+    peaks, troughs = relative_extrema(prices, order)
+    expected_peaks, expected_troughs = scipy_extrema(prices, order)
+    np.testing.assert_array_equal(np.flatnonzero(peaks), expected_peaks)
+    np.testing.assert_array_equal(np.flatnonzero(troughs), expected_troughs)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_windows_match_scipy(seed):
+    rng = np.random.default_rng(seed)
+    prices = random_prices(rng, 600)
+    order = int(rng.integers(1, 12))
+
+    appended = IncrementalExtrema(order)
+    for price in prices[:200].tolist():
+        appended.append(price)
+    appended.extend(prices[200:])
+    built = IncrementalExtrema.from_prices(prices, order)
+
+    for engine in (appended, built):
+        assert engine.count == len(prices)
+        # Any window, including ones shorter than the edge re-check and ones
+        # ending before the latest price; both edges are clipped
+        for _ in range(30):
+            start = int(rng.integers(0, len(prices)))
+            stop = int(rng.integers(start + 1, len(prices) + 1))
+            window = prices[start:stop]
+            assert_same(engine.window(window, start), window, order)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_moving_window_extrema_match_scipy(seed):
+    rng = np.random.default_rng(seed)
+    prices = random_prices(rng, 1500)
+    order = int(rng.integers(1, 8))
+    size = int(rng.integers(2, 200))
+
+    engine = IncrementalExtrema.from_prices(prices[:size], order)
+    assert_same(engine.extrema(prices[:size]), prices[:size], order)
+    end = size
+    while end < len(prices):
+        step = int(rng.integers(1, 40))
+        engine.extend(prices[end:end + step])
+        end = min(end + step, len(prices))
+        window = prices[max(0, end - size):end]
+        assert_same(engine.extrema(window, end - len(window)), window, order)
+
+
+def test_append_state_matches_from_prices():
+    rng = np.random.default_rng(99)
+    prices = random_prices(rng, 400)
+    for order in (1, 3, 5, 9):
+        for n in (0, 1, order, 2 * order + 1, 400):
+            appended = IncrementalExtrema(order)
+            appended.extend(prices[:n])
+            built = IncrementalExtrema.from_prices(prices[:n], order)
+            assert list(appended._recent) == list(built._recent)
+            for name in ("_peak_idx", "_peak_val", "_trough_idx", "_trough_val"):
+                np.testing.assert_array_equal(getattr(appended, name).view(), getattr(built, name).view())
+
+
+def test_detector_rebuilds_match_scipy():
+    """identify_peaks_and_troughs over moving, gapped and reloaded frames."""
+    rng = np.random.default_rng(5)
+    prices = random_prices(rng, 3000)
+    timestamps = pd.to_datetime(1_700_000_000 + np.arange(len(prices)), unit="s")
+    frame = pd.DataFrame({"timestamp": timestamps, "price": prices})
+    detector = PatternDetector()
+    order = detector.extrema_window
+
+    end = 300
+    while end < len(prices):
+        start = max(0, end - 300)
+        if rng.random() < 0.1:
+            start = int(rng.integers(0, end - 1))  # reloaded history
+        window = frame.iloc[start:end]
+        peaks, troughs = detector.identify_peaks_and_troughs(window)
+        expected_peaks, expected_troughs = scipy_extrema(window["price"].to_numpy(), order)
+        np.testing.assert_array_equal(peaks.index, window.index[expected_peaks])
+        np.testing.assert_array_equal(troughs.index, window.index[expected_troughs])
+        end += int(rng.integers(1, 60)) if rng.random() < 0.9 else 400  # occasional gap
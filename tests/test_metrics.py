@@ -0,0 +1,46 @@
+"""LatencyHistogram percentiles against np.percentile."""
+
+import numpy as np
+import pytest
+
+from ingest.metrics import LatencyHistogram
+
+
+@pytest.mark.parametrize("sub_buckets", [8, 32, 128])
+@pytest.mark.parametrize("seed", range(3))
+def test_percentiles_within_documented_error(sub_buckets, seed):
+    rng = np.random.default_rng(seed)
+    # Sub-millisecond to tens of seconds, as the feed and write latencies span
+    latencies = np.concatenate([
+        rng.lognormal(np.log(0.02), 1.5, 20_000),
+        rng.uniform(0, 0.0002, 500),
+        rng.exponential(2.0, 2_000),
+    ])
+    histogram = LatencyHistogram(sub_buckets=sub_buckets)
+    for latency in latencies.tolist():
+        histogram.record(latency)
+
+    # Whole microseconds, as recorded
+    values = np.floor(latencies * 1_000_000) / 1_000_000
+    for p in (50, 90, 99, 99.9):
+        expected = np.percentile(values, p, method="inverted_cdf")
+        assert histogram.percentile(p) == pytest.approx(expected, rel=1 / sub_buckets, abs=1e-6)
+
+    summary = histogram.summary()
+    assert summary["count"] == len(latencies)
+    assert summary["max"] == pytest.approx(values.max())
+    assert summary["mean"] == pytest.approx(values.mean(), rel=1e-9)
+
+
+def test_small_values_are_exact_and_large_values_are_capped():
+    histogram = LatencyHistogram(max_seconds=1, sub_buckets=32)
+    for microseconds in range(1, 64):
+        histogram.record(microseconds / 1_000_000)
+    # One bucket per microsecond below 2 * sub_buckets: the midpoint is within half a microsecond
+    assert histogram.percentile(50) == pytest.approx(32.5e-6)
+
+    histogram.record(-1)
+    histogram.record(5.0)
+    assert histogram.max == 1_000_000
+    assert histogram.percentile(100) == pytest.approx(1.0)
+    assert LatencyHistogram().percentile(50) == 0.0
@@ -0,0 +1,144 @@
+"""OutcomeTracker's sorted levels, lazy deletion and expiry against a brute-force tracker."""
+
+import numpy as np
+import pytest
+
+from detector.outcomes import OutcomeTracker
+
+T0 = 1_700_000_000_000
+
+
+def bullish(entry, tp, sl):
+    return {"entry_price": entry, "take_profit": tp, "stop_loss": sl, "direction": "Bullish"}
+
+
+def bearish(entry, tp, sl):
+    return {"entry_price": entry, "take_profit": tp, "stop_loss": sl, "direction": "Bearish"}
+
+
+def index_entries(tracker):
+    return sum(len(book.above) + len(book.below) for book in tracker.books.values())
+
+
+def test_take_profit_and_stop_loss():
+    tracker = OutcomeTracker()
+    tracker.add("long", bullish(100.0, 102.0, 99.0), "R_25", T0)
+    tracker.add("short", bearish(100.0, 97.0, 101.0), "R_25", T0)
+    tracker.add("other", bullish(100.0, 100.5, 99.5), "R_50", T0)
+    assert tracker.has_open() and len(tracker) == 3
+
+    assert tracker.update("R_25", T0 + 1000, 100.9) == []
+    assert tracker.update("R_25", T0 + 2000, 101.0) == ["short"]  # its stop, touched exactly
+    assert tracker.update("R_25", T0 + 3000, 102.5) == ["long"]
+    assert len(tracker) == 1 and tracker.has_open()
+
+    assert tracker.pending["short"] == {"outcome": "sl", "exit_price": 101.0, "exit_time": T0 + 2000,
+                                        "pnl": -1.0, "duration": 2.0}
+    assert tracker.pending["long"] == {"outcome": "tp", "exit_price": 102.0, "exit_time": T0 + 3000,
+                                       "pnl": 2.0, "duration": 3.0}
+    assert tracker.flush() == {"short/outcome": tracker_record("sl", 101.0, 2000, -1.0),
+                               "long/outcome": tracker_record("tp", 102.0, 3000, 2.0)}
+    assert tracker.pending == {}
+
+    assert tracker.update("R_50", T0 + 4000, 99.0) == ["other"]
+    assert not tracker.has_open() and len(tracker) == 0
+    assert tracker.pending["other"]["outcome"] == "sl"
+
+
+def tracker_record(outcome, exit_price, after_ms, pnl):
+    return {"outcome": outcome, "exit_price": exit_price, "exit_time": T0 + after_ms, "pnl": pnl,
+            "duration": after_ms / 1000}
+
+
+def test_one_tick_past_both_levels_is_a_stop():
+    tracker = OutcomeTracker()
+    # Inverted levels so a single price is past both
+    tracker.add("long", bullish(100.0, 100.5, 101.0), "R_25", T0)
+    assert tracker.update("R_25", T0 + 1, 100.7) == ["long"]
+    tracker.add("short", bearish(100.0, 99.5, 99.0), "R_25", T0)
+    assert tracker.update("R_25", T0 + 2, 99.2) == ["short"]
+    assert tracker.pending["long"]["outcome"] == tracker.pending["short"]["outcome"] == "sl"
+    # Neither left an entry behind
+    assert index_entries(tracker) == 0 and tracker._dead == 0
+
+
+def test_expiry_after_max_age():
+    tracker = OutcomeTracker(max_age=60)
+    tracker.add("a", bullish(100.0, 110.0, 90.0), "R_25", T0)
+    tracker.add("b", bearish(100.0, 90.0, 110.0), "R_25", T0 + 30_000)
+    assert tracker.update("R_25", T0 + 59_999, 101.0) == []
+    assert tracker.update("R_25", T0 + 60_000, 102.0) == ["a"]
+    assert tracker.pending["a"] == {"outcome": "timeout", "exit_price": 102.0, "exit_time": T0 + 60_000,
+                                    "pnl": 2.0, "duration": 60.0}
+    # A tick on another symbol expires it too, at its own symbol's last price
+    assert tracker.update("R_50", T0 + 90_000, 5.0) == ["b"]
+    assert tracker.pending["b"]["exit_price"] == 102.0 and tracker.pending["b"]["pnl"] == -2.0
+    assert not tracker.has_open()
+    # Both index entries of each expired signal are dead until compaction
+    assert tracker._dead == index_entries(tracker) == 4
+
+
+class BruteForce:
+    def __init__(self, max_age):
+        self.max_age = max_age
+        self.open = {}
+
+    def update(self, symbol, time_ms, price):
+        resolved = []
+        for key, (sym, signal, opened) in list(self.open.items()):
+            if sym == symbol:
+                up = signal["direction"] == "Bullish"
+                tp = price >= signal["take_profit"] if up else price <= signal["take_profit"]
+                sl = price <= signal["stop_loss"] if up else price >= signal["stop_loss"]
+                if sl or tp:
+                    resolved.append((key, "sl" if sl else "tp"))
+                    del self.open[key]
+                    continue
+            if self.max_age is not None and opened + self.max_age * 1000 <= time_ms:
+                resolved.append((key, "timeout"))
+                del self.open[key]
+        return resolved
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_brute_force_through_compactions(seed, monkeypatch):
+    rng = np.random.default_rng(seed)
+    max_age = None if seed == 0 else int(rng.integers(20, 200))
+    tracker = OutcomeTracker(max_age=max_age)
+    reference = BruteForce(max_age)
+    compactions = []
+    compact = tracker._compact
+    monkeypatch.setattr(tracker, "_compact", lambda: (compactions.append(tracker._dead), compact()))
+
+    prices = {"R_25": 100.0, "R_50": 50.0}
+    time_ms = T0
+    for step in range(6000):
+        time_ms += 1000
+        symbol = "R_25" if rng.random() < 0.7 else "R_50"
+        for _ in range(int(rng.integers(0, 4))):
+            entry = prices[symbol]
+            reward, risk = rng.uniform(0.1, 3.0), rng.uniform(0.1, 3.0)
+            if rng.random() < 0.5:
+                signal = bullish(entry, entry + reward, entry - risk)
+            else:
+                signal = bearish(entry, entry - reward, entry + risk)
+            key = f"k{step}-{len(reference.open)}-{rng.integers(1 << 30)}"
+            tracker.add(key, signal, symbol, time_ms)
+            reference.open[key] = (symbol, signal, time_ms)
+
+        prices[symbol] += rng.normal(0, 0.4)
+        resolved = tracker.update(symbol, time_ms, prices[symbol])
+        expected = reference.update(symbol, time_ms, prices[symbol])
+        assert sorted(resolved) == sorted(key for key, _ in expected)
+        for key, outcome in expected:
+            assert tracker.pending[key]["outcome"] == outcome
+        tracker.flush()
+
+        assert len(tracker) == len(reference.open)
+        assert tracker.has_open() == bool(reference.open)
+        assert set(entry[0] for entry in tracker.open.values()) == set(reference.open)
+        # Every index entry is live (two per open signal) or counted as dead
+        assert index_entries(tracker) == 2 * len(tracker) + tracker._dead
+
+    assert tracker.resolved > 1000
+    assert len(compactions) > 5
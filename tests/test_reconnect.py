@@ -0,0 +1,74 @@
+"""stream_ticks against the stand-in Deriv server, which drops connections on purpose."""
+
+import asyncio
+
+import numpy as np
+import websockets
+
+import main
+from ingest import SymbolPipeline, TickJournal
+from ingest.standin import StandinDerivServer
+
+DROPS = 8
+
+
+def test_reconnects_backfill_every_gap(tmp_path, monkeypatch):
+    # The walk advances every 10 ms and each reconnect waits 50 ms, so every
+    # drop leaves a few ticks for the backfill to recover
+    monkeypatch.setattr(main, "backoff_delay", lambda attempt: 0.05)
+    merges = []
+    merge_history = main.merge_history
+
+    def recording_merge(pipeline, history, buffered):
+        before = pipeline.last_epoch
+        merge_history(pipeline, history, buffered)
+        merges.append((before, list(history.get("times", [])), [tick["epoch"] for tick, _ in buffered],
+                       pipeline.last_epoch))
+
+    monkeypatch.setattr(main, "merge_history", recording_merge)
+
+    journal = TickJournal(str(tmp_path / "journal"))
+    # Writers are never run, so nothing is sent to Firebase; the journal is the record
+    pipeline = SymbolPipeline(None, "http://firebase.invalid", "R_25", journal=journal)
+    server = StandinDerivServer(interval=0.01, drop_every=5, seed=1)
+
+    async def run():
+        async with websockets.serve(server.handler, "127.0.0.1", 0) as listener:
+            port = listener.sockets[0].getsockname()[1]
+            generator = asyncio.ensure_future(server.generate())
+            streamer = asyncio.ensure_future(
+                main.stream_ticks(["R_25"], {"R_25": pipeline}, url=f"ws://127.0.0.1:{port}"))
+            try:
+                for _ in range(1000):
+                    if len(merges) >= DROPS:
+                        break
+                    await asyncio.sleep(0.01)
+            finally:
+                streamer.cancel()
+                generator.cancel()
+                await asyncio.gather(streamer, generator, return_exceptions=True)
+
+    try:
+        asyncio.run(run())
+        epochs, _ = journal.history("R_25")
+    finally:
+        journal.close()
+
+    assert server.connections > DROPS
+    assert len(merges) >= DROPS
+    # Contiguous across every reconnect: no gaps, no duplicates
+    assert len(epochs) > 0
+    np.testing.assert_array_equal(epochs, np.arange(epochs[0], epochs[0] + len(epochs)))
+    assert pipeline.received == len(epochs)
+
+    # Each backfill starts right after the last journaled tick and runs up to
+    # the live ticks held back while it was pending
+    gaps = 0
+    for before, times, buffered, after in merges:
+        if times:
+            assert times == list(range(before + 1, before + 1 + len(times)))
+            gaps += 1
+        if buffered:
+            assert buffered[0] <= (times[-1] if times else before) + 1
+        assert after == max([before, *times, *buffered])
+    assert gaps >= DROPS - 1
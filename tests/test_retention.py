@@ -0,0 +1,121 @@
+"""TickRetention's index recovery and null-PATCH trim, against a fake Firebase node."""
+
+import asyncio
+import re
+
+import numpy as np
+
+from ingest.retention import TickRetention
+from ingest.writer import WriteItem
+
+
+class FakeResponse:
+    def __init__(self, status, data=None):
+        self.status = status
+        self.data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self):
+        return self.data
+
+
+class FakeNode:
+    """One node's {key: tick}, answering orderBy="epoch"&limitToFirst and multi-path PATCH."""
+
+    def __init__(self, ticks):
+        self.ticks = dict(ticks)
+        self.gets = []
+        self.patches = []
+
+    def get(self, url):
+        self.gets.append(url)
+        limit = int(re.search(r"limitToFirst=(\d+)", url).group(1))
+        assert 'orderBy="epoch"' in url
+        oldest = sorted(self.ticks.items(), key=lambda item: item[1]["epoch"])[:limit]
+        return FakeResponse(200, dict(oldest))
+
+    def patch(self, url, json):
+        self.patches.append(dict(json))
+        for key, value in json.items():
+            if value is None:
+                self.ticks.pop(key, None)
+            else:
+                self.ticks[key] = value
+        return FakeResponse(200)
+
+
+def seeded_node(count, seed=0):
+    rng = np.random.default_rng(seed)
+    epochs = 1_700_000_000 + rng.permutation(count)
+    return FakeNode({f"key{rng.integers(1 << 30):010d}{i}": {"epoch": int(epoch), "quote": 1.0}
+                     for i, epoch in enumerate(epochs)})
+
+
+def oldest_keys(ticks, count):
+    return [key for key, _ in sorted(ticks.items(), key=lambda item: item[1]["epoch"])[:count]]
+
+
+def test_trim_nulls_exactly_the_oldest_overflow():
+    node = seeded_node(35)
+    retention = TickRetention(node, "https://db.example", "ticks/R_25", max_records=20)
+    expected = oldest_keys(node.ticks, 15)
+
+    async def run():
+        assert await retention.recover()
+        return await retention.trim()
+
+    assert asyncio.run(run()) == 15
+    assert len(node.gets) == 1
+    assert node.patches == [{key: None for key in expected}]
+    assert len(node.ticks) == 20
+    assert retention.deleted == 15
+    assert sorted(key for _, key in retention.index) == sorted(node.ticks)
+
+
+def test_saturated_recovery_pages_through_the_backlog():
+    # More keys than one limitToFirst page: the trim frees room, then recovery looks again
+    node = seeded_node(70, seed=1)
+    original = dict(node.ticks)
+    retention = TickRetention(node, "https://db.example", "ticks/R_25", max_records=20)
+    assert retention.recover_limit == 40
+
+    async def run():
+        # The order run() follows: recover, then trim and recover again while saturated
+        await retention.recover()
+        saturated = [retention.saturated]
+        while True:
+            await retention.trim()
+            if not retention.saturated:
+                break
+            await retention.recover()
+            saturated.append(retention.saturated)
+        return saturated
+
+    assert asyncio.run(run()) == [True, True, False]
+    order = oldest_keys(original, 70)
+    assert node.patches == [{key: None for key in order[:20]},
+                            {key: None for key in order[20:40]},
+                            {key: None for key in order[40:50]}]
+    assert set(node.ticks) == set(order[50:])
+    assert len(retention) == 20
+
+
+def test_acknowledged_writes_are_indexed_in_epoch_order():
+    node = seeded_node(0)
+    retention = TickRetention(node, "https://db.example", "ticks", max_records=3)
+    batch = [WriteItem(f"k{epoch}", {"epoch": epoch}, 0.0, None) for epoch in (5, 1, 4, 2, 3)]
+    retention.track(batch, ok=False)
+    assert len(retention) == 0
+    retention.track(batch, ok=True)
+    retention.track(batch[:2], ok=True)  # repeats are ignored
+    assert retention.index == [(1, "k1"), (2, "k2"), (3, "k3"), (4, "k4"), (5, "k5")]
+
+    assert asyncio.run(retention.trim()) == 2
+    assert node.patches == [{"k1": None, "k2": None}]
+    assert asyncio.run(retention.trim()) == 0
+    assert len(node.patches) == 1
@@ -0,0 +1,157 @@
+"""HashRing stability and Supervisor rebalancing, with a fake process context."""
+
+import queue
+
+import pytest
+
+from detector import shard
+from detector.shard import HashRing, Supervisor
+
+SYMBOLS = [f"SYM_{i}" for i in range(2000)]
+
+
+def owners(ring):
+    return {symbol: ring.lookup(symbol) for symbol in SYMBOLS}
+
+
+def test_assignment_is_deterministic_across_instances():
+    workers = [f"worker-{i}" for i in range(6)]
+    a = HashRing(workers)
+    b = HashRing(reversed(workers))
+    assert owners(a) == owners(b)
+    assert a.assign(SYMBOLS) == b.assign(SYMBOLS)
+    # Reasonably even: no worker more than twice its fair share
+    sizes = [len(keys) for keys in a.assign(SYMBOLS).values()]
+    assert max(sizes) < 2 * len(SYMBOLS) / len(workers)
+
+
+@pytest.mark.parametrize("count", [3, 8])
+def test_adding_a_worker_moves_about_one_nth(count):
+    ring = HashRing(f"worker-{i}" for i in range(count))
+    before = owners(ring)
+    ring.add("worker-new")
+    after = owners(ring)
+    moved = [symbol for symbol in SYMBOLS if before[symbol] != after[symbol]]
+    # Only to the new worker, and about 1/(count + 1) of the symbols
+    assert {after[symbol] for symbol in moved} == {"worker-new"}
+    share = len(moved) / len(SYMBOLS)
+    assert 0.5 / (count + 1) < share < 1.6 / (count + 1)
+
+
+@pytest.mark.parametrize("count", [3, 8])
+def test_removing_a_worker_moves_only_its_symbols(count):
+    ring = HashRing(f"worker-{i}" for i in range(count))
+    before = owners(ring)
+    ring.remove("worker-1")
+    after = owners(ring)
+    moved = [symbol for symbol in SYMBOLS if before[symbol] != after[symbol]]
+    assert set(moved) == {symbol for symbol in SYMBOLS if before[symbol] == "worker-1"}
+    assert 0.5 / count < len(moved) / len(SYMBOLS) < 1.6 / count
+    assert "worker-1" not in set(after.values())
+
+    ring.add("worker-1")
+    assert owners(ring) == before
+    with pytest.raises(LookupError):
+        HashRing().lookup("R_25")
+
+
+class FakeProcess:
+    pids = 0
+
+    def __init__(self, target, name, daemon, args):
+        self.name = name
+        self.alive = False
+        self.exitcode = None
+        FakeProcess.pids += 1
+        self.pid = FakeProcess.pids
+
+    def start(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def kill(self):
+        self.alive, self.exitcode = False, -9
+
+    def join(self, timeout=None):
+        pass
+
+    def terminate(self):
+        self.kill()
+
+
+class FakeContext:
+    Process = FakeProcess
+
+    @staticmethod
+    def Queue():
+        return queue.Queue()
+
+
+def hosted(supervisor):
+    """{worker: symbols} as each fake worker would host them after its queued commands."""
+    result = {}
+    for worker, (_, commands, _) in supervisor.processes.items():
+        symbols = None
+        while not commands.empty():
+            command, *args = commands.get_nowait()
+            symbols = args[0] if command == "assign" else symbols
+        if symbols is not None:
+            result[worker] = sorted(symbols)
+    return result
+
+
+def test_supervisor_reassigns_a_dead_workers_symbols(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(shard.time, "monotonic", lambda: clock[0])
+    symbols = [f"R_{i}" for i in range(10, 60)]
+    supervisor = Supervisor(symbols, workers=3, isolate=["R_100"], replicas=50,
+                            restart_delay=5.0, context=FakeContext())
+    supervisor.start()
+    initial = hosted(supervisor)
+    assert set(initial) == {"worker-0", "worker-1", "worker-2", "isolated-R_100"}
+    assert initial["isolated-R_100"] == ["R_100"]
+    assert sorted(s for group in initial.values() for s in group) == sorted(symbols + ["R_100"])
+
+    # worker-1 dies: only its symbols move, to the survivors, at once
+    supervisor.processes["worker-1"][0].kill()
+    supervisor.check()
+    assert "worker-1" not in supervisor.processes
+    moved = hosted(supervisor)
+    assert set(moved) == {"worker-0", "worker-2"}
+    for worker in moved:
+        assert set(initial[worker]) <= set(moved[worker])
+    assert sorted(moved["worker-0"] + moved["worker-2"]) == sorted(
+        initial["worker-0"] + initial["worker-1"] + initial["worker-2"])
+
+    # The isolated worker dies too: the ring hosts its symbol meanwhile
+    supervisor.processes["isolated-R_100"][0].kill()
+    supervisor.check()
+    assert "R_100" in supervisor.assignment["worker-0"] + supervisor.assignment["worker-2"]
+
+    # Not due yet; once restarted both take their symbols back and back off
+    clock[0] += 4.0
+    supervisor.check()
+    assert set(supervisor.processes) == {"worker-0", "worker-2"}
+    clock[0] += 2.0
+    supervisor.check()
+    assert {worker: sorted(group) for worker, group in supervisor.assignment.items()} == initial
+    assert hosted(supervisor) == initial
+    assert supervisor._delays == {"worker-1": 10.0, "isolated-R_100": 10.0}
+
+    supervisor.stop()
+    assert supervisor.processes == {}
+
+
+def test_remove_worker_rebalances_before_stopping_it():
+    supervisor = Supervisor([f"R_{i}" for i in range(20)], workers=2, replicas=50, context=FakeContext())
+    supervisor.start()
+    _, commands, _ = supervisor.processes["worker-1"]
+    supervisor.remove_worker("worker-1")
+    assert supervisor.assignment == {"worker-0": tuple(f"R_{i}" for i in range(20))}
+    # The removed worker was told to stop after its last assignment
+    last = None
+    while not commands.empty():
+        last = commands.get_nowait()
+    assert last == ("stop",)
@@ -0,0 +1,135 @@
+"""SignalRanker dedupe and the per-family, per-timeframe signal cooldown."""
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from detector.signals import FAMILIES, SignalRanker, signal_key
+from pattern_detector import PatternDetector
+
+
+def signal(entry, stop, target, direction="Bearish", pattern="P"):
+    return {"pattern": pattern, "entry_price": entry, "stop_loss": stop, "take_profit": target,
+            "direction": direction}
+
+
+def test_one_signal_per_family_highest_score_first():
+    ranked = SignalRanker().rank([
+        ("double_top", signal(100.0, 101.0, 98.0)),      # score 2
+        ("double_bottom", signal(90.0, 89.0, 93.0, "Bullish")),  # score 3, same family
+        ("triple_top", signal(120.0, 121.0, 119.0)),     # score 1
+    ])
+    assert [detector for detector, _ in ranked] == ["double_bottom", "triple_top"]
+    assert [(s["family"], s["score"]) for _, s in ranked] == [("double", 3.0), ("triple", 1.0)]
+
+
+def test_overlapping_entries_keep_the_better_signal():
+    ranker = SignalRanker(entry_tolerance=0.001)
+    ranked = ranker.rank([
+        ("falling_wedge", signal(100.0, 99.0, 102.0, "Bullish")),   # score 2
+        ("flag", signal(100.05, 99.05, 103.05, "Bullish")),         # score 3, overlaps
+        ("pennant", signal(100.05, 101.05, 97.05, "Bearish")),      # other direction
+        ("rectangle", signal(100.2, 99.2, 102.2, "Bullish")),       # past the tolerance
+    ])
+    assert [detector for detector, _ in ranked] == ["flag", "pennant", "rectangle"]
+
+
+def test_ties_go_to_the_earlier_detector_and_limit_applies():
+    detections = [(name, signal(100.0 + i, 101.0 + i, 99.0 + i)) for i, name in
+                  enumerate(["head_and_shoulders", "double_top", "triple_top", "flag"])]
+    # Equal scores: each overlaps the ones within 2%, and the earliest detector wins
+    assert [d for d, _ in SignalRanker(entry_tolerance=0.02).rank(detections)] == ["head_and_shoulders", "flag"]
+    assert [d for d, _ in SignalRanker(limit=3).rank(detections)] == ["head_and_shoulders", "double_top", "triple_top"]
+    assert SignalRanker().rank([("flag", signal(1.0, 1.0, 2.0))])[0][1]["score"] == 0.0
+
+
+def test_signal_keys_are_distinct_per_timeframe_and_symbol():
+    keys = {signal_key(1_700_000_000_000, d, tf, s) for d in ("flag", "pennant")
+            for tf in ("tick", "1m") for s in (None, "R_25")}
+    assert len(keys) == 8
+    assert signal_key(5, "flag") == "0000000000005-flag"
+
+
+class FixedEngine:
+    """Stands in for DetectionEngine: the same detections every cycle."""
+
+    def __init__(self, detections):
+        self.detections = detections
+
+    def detect(self, *series):
+        return [(detector, dict(signal)) for detector, signal in self.detections]
+
+
+class FakeResponse:
+    status = 200
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    closed = False
+
+    def __init__(self):
+        self.patches = []
+
+    def patch(self, url, json):
+        self.patches.append(dict(json))
+        return FakeResponse()
+
+
+def test_cooldown_is_per_family_and_timeframe():
+    detector = PatternDetector(one_min_url=None, signals_url="https://db.example/signals.json",
+                               batch_signals=True)
+    detector.session = FakeSession()
+    start = 1_700_000_040_000
+    detector.append_ticks({"time": start + 60_000 * i, "quote": 100.0 + i} for i in range(8))
+
+    double_top = ("double_top", signal(100.0, 101.0, 98.0))
+    flag = ("flag", signal(110.0, 111.0, 108.0))
+    wedge = ("rising_wedge", signal(120.0, 121.0, 117.0))
+    detector.timeframes["tick"].engine = FixedEngine([double_top, flag])
+    detector.timeframes["1m"].engine = FixedEngine([double_top])
+
+    def cycle():
+        detector.timeframes["1m"].due = True
+        sent = asyncio.run(detector.detect_signals())
+        return sorted((s["timeframe"], s["family"]) for s in sent)
+
+    assert cycle() == [("1m", "double"), ("tick", "double"), ("tick", "flag")]
+    assert len(detector.session.patches) == 1 and len(detector.session.patches[0]) == 3
+
+    # Everything is cooling down: nothing is sent, not even an empty PATCH
+    assert cycle() == []
+    assert len(detector.session.patches) == 1
+
+    # A new family on the tick series goes through; double_bottom shares double_top's cooldown
+    detector.timeframes["tick"].engine = FixedEngine(
+        [double_top, flag, wedge, ("double_bottom", signal(90.0, 89.0, 93.0, "Bullish"))])
+    assert cycle() == [("tick", "wedge")]
+
+    # Once the cooldown has passed for one family on one timeframe, only it is sent again
+    key = ("tick", FAMILIES["flag"])
+    detector.family_signal_times[key] -= timedelta(seconds=detector.signal_cooldown + 1)
+    assert cycle() == [("tick", "flag")]
+    assert cycle() == []
+
+
+def test_cooldown_times_are_kept_when_the_write_fails():
+    detector = PatternDetector(one_min_url=None, signals_url="https://db.example/signals.json")
+    detector.session = FakeSession()
+    FakeResponse.status = 500
+    try:
+        detector.append_ticks({"time": 1_700_000_000_000 + i, "quote": 1.0} for i in range(6))
+        detector.timeframes["tick"].engine = FixedEngine([("flag", signal(1.0, 0.5, 2.0, "Bullish"))])
+        assert asyncio.run(detector.detect_signals()) == []
+        assert detector.family_signal_times == {}
+    finally:
+        FakeResponse.status = 200
+    assert [s["family"] for s in asyncio.run(detector.detect_signals())] == ["flag"]
+    assert detector.can_send_signal("flag", "tick") is False
+    assert detector.can_send_signal("flag", "1m") is True
@@ -0,0 +1,85 @@
+"""TickStore's mirrored ring buffer against a plain list of everything appended."""
+
+import numpy as np
+import pytest
+
+from detector.store import TickStore
+
+
+@pytest.mark.parametrize("capacity", [1, 7, 64])
+def test_views_stay_contiguous_across_wraparound(capacity):
+    rng = np.random.default_rng(capacity)
+    store = TickStore(capacity)
+    base = store._times.ctypes.data
+    times, prices = [], []
+    time_ms = 1_700_000_000_000
+
+    # Many times the capacity, mixing single appends and batches of every size
+    while len(times) < 50 * capacity + 13:
+        if rng.random() < 0.5:
+            time_ms += int(rng.integers(1, 1000))
+            price = float(rng.normal())
+            store.append(time_ms, price)
+            times.append(time_ms)
+            prices.append(price)
+        else:
+            size = int(rng.integers(0, 3 * capacity + 2))
+            batch_times = time_ms + np.cumsum(rng.integers(1, 1000, size))
+            batch_prices = rng.normal(size=size)
+            if size:
+                time_ms = int(batch_times[-1])
+            store.extend(batch_times, batch_prices)
+            times.extend(batch_times.tolist())
+            prices.extend(batch_prices.tolist())
+
+        held = min(len(times), capacity)
+        assert len(store) == held
+        assert store.count == len(times)
+        assert store.start == len(times) - held
+        assert store.last_time == times[-1] and store.last_price == prices[-1]
+        for n in (None, 1, held // 2, held + 5):
+            view_times, view_prices = store.last(n)
+            expected = held if n is None else min(n, held)
+            assert view_times.tolist() == times[len(times) - expected:]
+            assert view_prices.tolist() == prices[len(prices) - expected:]
+            # Zero-copy, read-only slices of the backing arrays
+            assert view_times.base is not None and view_prices.flags.c_contiguous
+            assert not view_times.flags.writeable and not view_prices.flags.writeable
+
+    # Allocated once
+    assert store._times.ctypes.data == base
+
+
+def test_discard_drops_only_the_front():
+    store = TickStore(8)
+    store.extend(np.arange(12) * 1000, np.arange(12.0))
+    assert store.start == 4
+
+    # Deleted times past the front are ignored until the front reaches them
+    assert store.discard([5000, 4000, 7000]) == 2
+    assert store.start == 6 and store.last()[0].tolist() == [6000, 7000, 8000, 9000, 10000, 11000]
+    assert store.discard([3000]) == 0
+
+    # Appends wrap over the discarded slots; the start stays where it was until the ring passes it
+    store.append(12000, 12.0)
+    assert store.start == 6 and len(store) == 7
+    store.extend([13000, 14000], [13.0, 14.0])
+    assert store.start == 7 and store.prices().tolist() == [7.0, 8.0, 9.0, 10.0, 11.0, 12.0, 13.0, 14.0]
+
+    assert store.discard() == 8
+    assert len(store) == 0 and store.last()[0].tolist() == []
+    store.append(15000, 15.0)
+    assert store.last()[0].tolist() == [15000]
+
+    store.clear()
+    assert (len(store), store.start, store.last_time) == (0, 0, None)
+
+
+def test_to_frame_matches_the_views():
+    pd = pytest.importorskip("pandas")
+    store = TickStore(4)
+    store.extend(np.arange(6) * 1000 + 1_700_000_000_000, np.arange(6.0))
+    frame = store.to_frame()
+    assert frame["price"].tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert frame["timestamp"].tolist() == [pd.Timestamp(1_700_000_000_000 + t * 1000, unit="ms")
+                                           for t in range(2, 6)]
@@ -0,0 +1,18 @@
+import pytest
+
+from detector.sweep import parse_fixed, parse_space
+
+
+def test_parse_fixed_takes_single_values():
+    assert parse_fixed(["window=300", "tolerance=0.02", "cooldown=-1"]) == {
+        "window": 300, "tolerance": 0.02, "cooldown": -1}
+
+
+@pytest.mark.parametrize("spec", ["window=1:2", "window=1,2", "window", "window=", "=3"])
+def test_parse_fixed_rejects_ranges_lists_and_missing_values(spec):
+    with pytest.raises(ValueError):
+        parse_fixed([spec])
+
+
+def test_parse_space_keeps_lists_and_ranges():
+    assert parse_space(["a=1,2", "b=0.1:0.5"]) == {"a": [1, 2], "b": (0.1, 0.5)}
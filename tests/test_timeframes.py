@@ -0,0 +1,90 @@
+"""Timeframe bar closing, `due` and seeding from candle history."""
+
+from detector.timeframes import TICK, Timeframe
+from pattern_detector import PatternDetector
+
+MINUTE = 60_000
+START = 1_700_000_040_000  # a minute boundary
+
+
+def points(timeframe):
+    times, prices = timeframe.store.last()
+    return list(zip(times.tolist(), prices.tolist()))
+
+
+def test_tick_timeframe_takes_every_tick():
+    timeframe = Timeframe(TICK, None, capacity=10)
+    assert timeframe.add(START, 1.0) and timeframe.add(START + 5, 2.0)
+    assert timeframe.due
+    assert points(timeframe) == [(START, 1.0), (START + 5, 2.0)]
+
+
+def test_bar_closes_on_the_first_tick_of_a_later_bar():
+    timeframe = Timeframe("1m", 60, capacity=10)
+    assert not timeframe.add(START + 1_000, 10.0)
+    assert not timeframe.add(START + 30_000, 11.0)
+    assert not timeframe.add(START + 59_999, 12.0)
+    assert len(timeframe) == 0 and not timeframe.due
+
+    # Next minute: the first bar closes at its last price, keyed by its start
+    assert timeframe.add(START + MINUTE, 13.0)
+    assert timeframe.due
+    assert points(timeframe) == [(START, 12.0)]
+
+    # Late tick for the closed bar is ignored
+    assert not timeframe.add(START + 40_000, 99.0)
+    # A gap of several minutes closes only the open bar
+    assert timeframe.add(START + 5 * MINUTE + 1, 14.0)
+    assert points(timeframe) == [(START, 12.0), (START + MINUTE, 13.0)]
+
+    timeframe.detect()
+    assert not timeframe.due
+    assert not timeframe.add(START + 5 * MINUTE + 2, 15.0)
+    assert not timeframe.due
+
+
+def test_seed_fills_history_before_the_open_bar():
+    timeframe = Timeframe("1m", 60, capacity=10)
+    timeframe.add(START + 3 * MINUTE + 10, 20.0)  # bar 3 is open
+    history = [(START + i * MINUTE, float(i)) for i in range(5)]
+    # Only the bars before the open one go in
+    assert timeframe.seed(*zip(*history)) == 3
+    assert points(timeframe) == history[:3]
+    assert not timeframe.due
+
+    # Seeding again, or with older bars, adds nothing
+    assert timeframe.seed(*zip(*history)) == 0
+    assert timeframe.seed([START - MINUTE], [9.0]) == 0
+
+    assert timeframe.add(START + 4 * MINUTE, 21.0)
+    assert points(timeframe)[-1] == (START + 3 * MINUTE, 20.0)
+
+
+def test_bar_already_loaded_from_history_is_not_appended_again():
+    timeframe = Timeframe("1m", 60, capacity=10)
+    timeframe.seed([START, START + MINUTE], [1.0, 2.0])
+    # Ticks for a bar the history already holds, then the next bar
+    assert not timeframe.add(START + MINUTE + 5, 2.5)
+    assert not timeframe.add(START + 2 * MINUTE, 3.0)
+    assert not timeframe.due
+    assert points(timeframe) == [(START, 1.0), (START + MINUTE, 2.0)]
+    assert timeframe.add(START + 3 * MINUTE, 4.0)
+    assert points(timeframe)[-1] == (START + 2 * MINUTE, 3.0)
+
+
+def test_detector_feeds_every_timeframe_and_picks_the_due_ones():
+    detector = PatternDetector(one_min_url=None, max_points=50)
+    # Ticks every 10 s for 16 minutes
+    detector.append_ticks({"time": START + 10_000 * i, "quote": 100.0 + i % 7} for i in range(96))
+    assert len(detector.timeframes[TICK]) == 50
+    assert len(detector.timeframes["1m"]) == 15
+    assert len(detector.timeframes["5m"]) == 3
+    assert [timeframe.label for timeframe in detector.due_timeframes()] == [TICK, "1m"]
+
+    for timeframe in detector.due_timeframes():
+        timeframe.detect()
+    assert [timeframe.label for timeframe in detector.due_timeframes()] == [TICK]
+    # 1m and 5m extrema engines follow their own series
+    for label in ("1m", "5m"):
+        timeframe = detector.timeframes[label]
+        assert timeframe.extrema.count == len(timeframe)
@@ -0,0 +1,127 @@
+"""TrendlineAnalyzer's running-sum fits against np.linalg.lstsq."""
+
+import numpy as np
+import pytest
+
+from analyzer.extrema import HIGH, LOW, LineFit
+from analyzer.trendline import TrendlineAnalyzer
+
+RTOL = 1e-9
+
+
+def lstsq(indices, values):
+    x = np.asarray(indices, dtype=np.float64)
+    y = np.asarray(values, dtype=np.float64)
+    A = np.vstack([x, np.ones(len(x))]).T
+    (slope, intercept), residuals, _, _ = np.linalg.lstsq(A, y, rcond=None)
+    return slope, intercept, residuals[0] if len(residuals) else 0.0
+
+
+def assert_matches(fit, indices, values):
+    slope, intercept, residual = lstsq(indices, values)
+    scale = np.abs(values).max()
+    spread = max(float(((np.asarray(values) - np.mean(values)) ** 2).sum()), scale ** 2 * 1e-12)
+    # Slope over the window's x range and intercept on the price scale; the
+    # residual relative to the spread of the points it is left from
+    assert abs(fit[0] - slope) * max(indices[-1], 1) <= RTOL * scale
+    assert abs(fit[1] - intercept) <= RTOL * scale
+    assert abs(fit[2] - residual) <= 1e-6 * spread
+
+
+def random_walk(rng, n, base, step):
+    return base + np.cumsum(rng.normal(0, step, n))
+
+
+def staircase(rng, n, base):
+    # Zigzags of higher highs and higher lows (or lower and lower), then a break
+    prices, x = [], base
+    while len(prices) < n:
+        up = rng.random() < 0.5
+        for leg in range(int(rng.integers(4, 12))):
+            length = int(rng.integers(5, 12))
+            move = (1 if (leg % 2 == 0) == up else -0.6) * rng.uniform(0.3, 1.0)
+            prices.extend((x + move * np.arange(1, length + 1) / length + rng.normal(0, 0.01, length)).tolist())
+            x = prices[-1]
+        prices.extend(np.linspace(x, x + rng.uniform(-3, 3), 6)[1:].tolist())
+        x = prices[-1]
+    return np.array(prices[:n])
+
+
+SERIES = [
+    ("walk", 25, lambda rng: random_walk(rng, 40000, 100.0, 0.05)),
+    ("walk", 1000, lambda rng: random_walk(rng, 20000, 5000.0, 0.5)),
+    ("high_price", 50, lambda rng: random_walk(rng, 30000, 1e6, 0.001)),
+    ("trending", 50, lambda rng: staircase(rng, 30000, 100.0)),
+    ("trending", 200, lambda rng: staircase(rng, 30000, 100.0)),
+]
+
+
+@pytest.mark.parametrize("name,window_size,make", SERIES, ids=[f"{s[0]}-{s[1]}" for s in SERIES])
+def test_fits_match_lstsq(name, window_size, make):
+    rng = np.random.default_rng(window_size)
+    prices = make(rng)
+    analyzer = TrendlineAnalyzer(window_size=window_size)
+    origins = set()
+    checked = 0
+
+    for i, price in enumerate(prices.tolist()):
+        analyzer.update(price, i)
+
+        # The analyzer's own support/resistance line, when it fitted one this tick
+        if analyzer.trend in ("uptrend", "downtrend"):
+            support = analyzer.trend == "uptrend"
+            indices, values = analyzer.extrema.lows() if support else analyzer.extrema.highs()
+            prefix = "support" if support else "resistance"
+            fit = tuple(getattr(analyzer, f"{prefix}_{part}") for part in ("slope", "intercept", "residual"))
+            if len(indices) >= 2:
+                assert_matches(fit, indices, values)
+                checked += 1
+            else:
+                assert fit == (None, None, None)
+
+        # Both kinds every few ticks, whatever the trend
+        if i % 5 == 0:
+            for kind in (HIGH, LOW):
+                fit = analyzer.extrema.fit(kind)
+                indices, values = analyzer.extrema.highs() if kind == HIGH else analyzer.extrema.lows()
+                if len(indices) < 2:
+                    assert fit is None
+                else:
+                    assert_matches(fit, indices, values)
+            origins.add(analyzer.extrema._fits[LOW].x0)
+
+    # The sums were re-centred many times over the run
+    assert len(origins) > len(prices) // (2 * window_size) // 2
+    if name == "trending":
+        assert checked > 100
+
+
+def test_line_fit_add_remove_and_reset():
+    rng = np.random.default_rng(1)
+    points = [(int(x), float(y)) for x, y in zip(np.sort(rng.choice(10_000, 400, replace=False)),
+                                                rng.normal(100, 1, 400))]
+    fit = LineFit(x0=points[0][0])
+    live = []
+    for i, point in enumerate(points):
+        fit.add(*point)
+        live.append(point)
+        if i % 3 == 0:
+            fit.remove(*live.pop(0))
+        if len(live) >= 2:
+            x, y = zip(*live)
+            slope, intercept, residual = fit.line(at=0)
+            expected = lstsq(x, y)
+            assert slope == pytest.approx(expected[0], rel=1e-9, abs=1e-12)
+            assert intercept == pytest.approx(expected[1], rel=1e-9)
+            assert residual == pytest.approx(expected[2], rel=1e-6, abs=1e-9)
+
+    # Re-centring on a new origin gives the same line
+    before = fit.line(at=live[-1][0])
+    fit.reset(live, live[0][0])
+    assert fit.line(at=live[-1][0]) == pytest.approx(before, rel=1e-9)
+
+    # Removing the last point clears the sums
+    while live:
+        fit.remove(*live.pop())
+    assert (fit.n, fit.sx, fit.sy, fit.sxx, fit.sxy, fit.syy) == (0, 0.0, 0.0, 0.0, 0.0, 0.0)
+    assert fit.line() is None
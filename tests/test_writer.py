@@ -0,0 +1,104 @@
+"""FirebaseWriter's bounded queue and coalesced PATCHes, against a fake session."""
+
+import asyncio
+
+from ingest.writer import FirebaseWriter
+
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def text(self):
+        return "error"
+
+
+class FakeSession:
+    def __init__(self, status=200):
+        self.status = status
+        self.patches = []
+
+    def patch(self, url, json):
+        self.patches.append((url, dict(json)))
+        return FakeResponse(self.status)
+
+
+def test_one_patch_per_flush_with_every_queued_key():
+    session = FakeSession()
+    writer = FirebaseWriter(session, "https://db.example", "ticks/R_25", flush_size=100, flush_interval=0.01)
+    flushed = []
+    writer.add_listener(lambda batch, ok: flushed.append(([item.key for item in batch], ok)))
+    for i in range(30):
+        writer.submit(f"k{i:03d}", {"price": i}, token=i)
+
+    async def run():
+        task = asyncio.ensure_future(writer.run())
+        for _ in range(100):
+            if writer.written == 30:
+                break
+            await asyncio.sleep(0.005)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    assert len(session.patches) == 1
+    url, payload = session.patches[0]
+    assert url == "https://db.example/ticks/R_25.json"
+    assert payload == {f"k{i:03d}": {"price": i} for i in range(30)}
+    assert flushed == [([f"k{i:03d}" for i in range(30)], True)]
+    assert (writer.flushes, writer.written, writer.failed, writer.dropped) == (1, 30, 0, 0)
+
+
+def test_flush_size_splits_batches():
+    session = FakeSession()
+    writer = FirebaseWriter(session, "https://db.example", "ticks", flush_size=10, flush_interval=0.01)
+    for i in range(25):
+        writer.submit(str(i), i)
+
+    async def run():
+        for _ in range(3):
+            await writer.flush(await writer._collect())
+
+    asyncio.run(run())
+    assert [len(payload) for _, payload in session.patches] == [10, 10, 5]
+    assert writer.depth == 0
+
+
+def test_full_queue_drops_oldest():
+    session = FakeSession()
+    writer = FirebaseWriter(session, "https://db.example", "ticks", flush_size=100, flush_interval=0.01,
+                            max_queue=5)
+
+    async def run():
+        for i in range(12):
+            writer.submit(str(i), i)
+        assert writer.depth == 5
+        await writer.flush(await writer._collect())
+
+    asyncio.run(run())
+    assert writer.dropped == 7
+    # Only the newest entries are sent
+    assert session.patches[0][1] == {str(i): i for i in range(7, 12)}
+    assert writer.status()["dropped"] == 7
+
+
+def test_failed_flush_is_counted_and_reported():
+    session = FakeSession(status=500)
+    writer = FirebaseWriter(session, "https://db.example", "ticks", flush_interval=0.01)
+    results = []
+    writer.add_listener(lambda batch, ok: results.append((len(batch), ok)))
+    writer.submit("a", 1)
+    writer.submit("b", 2)
+
+    async def run():
+        return await writer.flush(await writer._collect())
+
+    assert asyncio.run(run()) is False
+    assert results == [(2, False)]
+    assert (writer.written, writer.failed) == (0, 2)